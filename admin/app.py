@@ -4,52 +4,471 @@
 Flask Admin Application for Managing Laboratory Website Data
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_from_directory
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, redirect, url_for, flash, send_from_directory, has_request_context, g
+from flask import get_template_attribute
+from flask import before_render_template, template_rendered
+from werkzeug.local import LocalProxy
+import io
 import json
 import os
+import functools
+import hashlib
 from datetime import datetime
-from werkzeug.utils import secure_filename
-import requests
-from bs4 import BeautifulSoup
 import re
+import time
+from urllib.parse import urlsplit
+from dataset_store import DatasetModel, DatasetStore, thaw
+from jobs import DebouncedTask, JobRunner
+from crawl_state import CrawlState
+from static_export import StaticExporter
+from prerender import Prerenderer
+import image_variants
+from asset_store import store_stream, asset_record, is_content_addressed
+from payload_cache import PayloadCache
+from list_query import ListQuery, QueryError, is_query, parse_query
+from search_index import SearchIndex, SEARCH_FIELDS, MAX_RESULTS
+from record_patch import PatchError, PatchTestFailed, apply_json_patch, apply_merge_patch, record_version
+from duplicates import DuplicateIndex, alias_map, describe, find_duplicates, merge_records
+from journal import Journal, JournalConflict, JournalError
+from change_feed import ChangeFeed, record_events
+from publication_io import FORMATS, ID_PREFIXES, PublicationFormatError, detect_format, export_publications, read_publications
+from metrics import Metrics
+from profiling import RequestProfiler
 
 # 配置
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATASET_DIR = os.path.join(BASE_DIR, 'dataset')
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'asset')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
-# 創建 Flask 應用，設定靜態文件路徑指向上層目錄
-app = Flask(__name__,
-            static_folder=BASE_DIR,
-            static_url_path='/static')
-app.secret_key = 'your-secret-key-change-this-in-production'
-
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+class DefaultConfig:
+    """預設設定；以環境變數 ADMIN_<設定名稱> 或 create_app(config) 覆寫"""
+    SECRET_KEY = 'your-secret-key-change-this-in-production'
+    SITE_DIR = BASE_DIR             # 網站根目錄：/static/、預先渲染的頁面（professor / laboratory / events）
+    DATASET_DIR = DATASET_DIR
+    UPLOAD_FOLDER = None            # 上傳的照片（網址的 asset/），預設為 SITE_DIR/asset
+    STORAGE_BACKEND = 'json'        # 'json'（dataset/*.json）或 'sqlite'（見 sqlite_store.py）
+    SQLITE_PATH = None              # 預設為 DATASET_DIR/dataset.sqlite3
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    DBLP_FETCH_WORKERS = 4          # 同時抓取 conference 頁面的數量
+    DBLP_HOST_DELAY = 0.5           # 同一主機的請求間隔（秒）
+    DBLP_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'dblp')
+    DBLP_CACHE_TTL = [
+        (r'/db/conf/', 30 * 24 * 3600),  # proceedings 頁面發表後幾乎不會變動
+        (r'/pid/', 3600),                # 個人頁面
+    ]
+    DBLP_OFFLINE = False            # True 時只從快取（或 fixture 目錄）讀取
+    DBLP_PARSER = 'auto'            # 'html' / 'lxml'（解析網頁）或 'xml'（DBLP 的 XML 匯出）；'auto' 有 lxml 時使用 lxml
+    IMAGE_VARIANTS = True           # 上傳後在背景產生縮圖與 WebP / AVIF（需要 Pillow）
+    STATIC_EXPORT = True            # 儲存後重新產生公開網站使用的 bundle
+    EXPORT_DELAY = 1.0              # 儲存後在背景等待幾秒再匯出，期間的儲存合併為一次
+    STATIC_PRERENDER = True         # 匯出 bundle 時一併把資料渲染進 professor / laboratory / events 頁面
+    DBLP_STATE_FILE = os.path.join(BASE_DIR, '.cache', 'crawl_state.json')  # 增量爬取的 watermark
+    JOURNAL = True                  # 記錄每次儲存的變更（復原 / 重做 / 回溯）
+    JOURNAL_DIR = os.path.join(BASE_DIR, '.journal')
+    JOURNAL_SNAPSHOT_EVERY = 200    # 每幾筆紀錄寫一份完整快照
+    PROFILING = False               # True 時帶 X-Profile: 1 header 的請求會被 profile（結果寫入 PROFILE_DIR）
+    PROFILE_DIR = os.path.join(BASE_DIR, '.cache', 'profiles')
+    SERVER_HOST = '0.0.0.0'         # python3 admin/app.py 使用的位址、port 與 debug 模式
+    SERVER_PORT = 5000
+    SERVER_DEBUG = True
+    WARMUP = True                   # 啟動時預先載入 dataset 與快取，第一個請求不需等待
+
+def create_store(config):
+    """依 STORAGE_BACKEND 建立資料存取後端"""
+    if config['STORAGE_BACKEND'] == 'sqlite':
+        from sqlite_store import SqliteStore  # 只有使用 SQLite 時才載入 sqlite3
+        return SqliteStore(config['SQLITE_PATH'] or os.path.join(config['DATASET_DIR'], 'dataset.sqlite3'))
+    return DatasetStore(config['DATASET_DIR'])
+
+# 請求延遲、資料讀寫與外部請求的統計（GET /metrics）
+metrics = Metrics()
+request_seconds = metrics.histogram('admin_request_seconds', 'Request latency by route', ('method', 'route', 'status'))
+dataset_seconds = metrics.histogram('admin_dataset_seconds', 'Dataset get / load / save time', ('op', 'dataset'))
+parse_seconds = metrics.histogram('admin_json_parse_seconds', 'Dataset parse time after a cache miss', ('dataset',))
+serialize_seconds = metrics.histogram('admin_json_serialize_seconds', 'API payload serialize and compress time', ('dataset',))
+template_seconds = metrics.histogram('admin_template_seconds', 'Template render time', ('template',))
+http_seconds = metrics.histogram('admin_http_request_seconds', 'Outbound HTTP time (DBLP)', ('host', 'status', 'cache'),
+                                 buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+class Services:
+    """一個 app 的資料存取後端、快取、背景工作與變更推送（create_app() 依 app 的設定建立）"""
+
+    def __init__(self, app):
+        config = app.config
+
+        # 資料存取後端（JSON：已解析的文件快取，依 mtime/size 失效）
+        self.store = create_store(config)
+        self.store.on_parse = lambda filename, seconds: parse_seconds.observe(seconds, dataset=filename)
+
+        # GET /api/* 回傳的 JSON（序列化與壓縮結果依文件版本快取）
+        self.payloads = PayloadCache(lambda doc: app.json.response(doc).get_data(),
+                                     observe=lambda filename, seconds: serialize_seconds.observe(seconds, dataset=filename))
+
+        # 列表 API 的篩選 / 排序 / 分頁（索引依文件版本快取）
+        self.queries = ListQuery()
+
+        # 全文檢索（倒排索引，儲存後只更新有變更的記錄）
+        self.search = SearchIndex()
+
+        # 公開網站使用的靜態 bundle（dataset/dist）
+        self.exporter = StaticExporter(os.path.join(config['DATASET_DIR'], 'dist'), self.store.get)
+
+        # 預先渲染的公開頁面（professor / laboratory / events 的 index.html）
+        self.prerenderer = Prerenderer(config['SITE_DIR'], self.store.get)
+
+        # 儲存後在背景更新 dataset/*.json（SQLite 模式）、bundle 與頁面，不佔用請求的時間
+        self.exports = DebouncedTask(export_derived, delay=config['EXPORT_DELAY'], name='static-export',
+                                     context=app.app_context)
+
+        # 變更紀錄（append-only，定期寫入快照）
+        self.journal = Journal(config['JOURNAL_DIR'], snapshot_every=config['JOURNAL_SNAPSHOT_EVERY'])
+
+        # 推送給管理頁面的記錄變更（GET /api/changes）
+        self.changes = ChangeFeed()
+
+        # 背景工作（DBLP 爬蟲）
+        self.jobs = JobRunner(max_workers=1, context=app.app_context)
+
+        # 背景工作（照片縮圖），與爬蟲分開以免互相等待
+        self.image_jobs = JobRunner(max_workers=2, context=app.app_context)
+
+def service(name):
+    """目前 app（current_app）的服務，request、job 與背景匯出中都可以使用"""
+    return LocalProxy(lambda: getattr(current_app.extensions['admin'], name))
+
+store = service('store')
+payloads = service('payloads')
+queries = service('queries')
+search = service('search')
+exporter = service('exporter')
+prerenderer = service('prerenderer')
+exports = service('exports')
+journal = service('journal')
+changes = service('changes')
+jobs = service('jobs')
+image_jobs = service('image_jobs')
+
+def cache_counts():
+    """各快取的 (名稱, 命中, 未命中)"""
+    stats = store.stats()
+    return [('dataset', stats['hits'], stats['misses']), ('payload', payloads.hits, payloads.misses)]
+
+metrics.collector('admin_cache_hits_total', 'Cache hits', ('cache',),
+                  lambda: [((name,), hits) for name, hits, _ in cache_counts()], kind='counter')
+metrics.collector('admin_cache_misses_total', 'Cache misses', ('cache',),
+                  lambda: [((name,), misses) for name, _, misses in cache_counts()], kind='counter')
+metrics.collector('admin_cache_hit_ratio', 'Cache hit ratio', ('cache',),
+                  lambda: [((name,), round(hits / (hits + misses), 4) if hits + misses else 0.0)
+                           for name, hits, misses in cache_counts()])
+metrics.collector('admin_dataset_writes_total', 'Dataset saves', (), lambda: [((), store.stats()['writes'])],
+                  kind='counter')
+metrics.collector('admin_change_stream_clients', 'Open /api/changes connections', (),
+                  lambda: [((), changes.stats()['clients'])])
+metrics.collector('admin_search_records', 'Records in the search index', (),
+                  lambda: [((), search.stats()['records'])])
 
 # ==================== Helper Functions ====================
 
+def endpoint_name():
+    """目前請求的 view 名稱（不含 blueprint 名稱），作為變更紀錄與 profile 的操作名稱"""
+    return request.endpoint.rpartition('.')[2] if request.endpoint else None
+
+def observe_http(url, seconds, status, result):
+    http_seconds.observe(seconds, host=urlsplit(url).netloc, status=status, cache=result)
+
+def dblp_cache():
+    """依目前的設定建立 DBLP 頁面快取"""
+    from http_cache import HttpCache  # requests 只在爬取時載入
+    return HttpCache(current_app.config['DBLP_CACHE_DIR'],
+                     ttl_rules=current_app.config['DBLP_CACHE_TTL'],
+                     offline=current_app.config['DBLP_OFFLINE'],
+                     observe=observe_http)
+
+def view_json(filename):
+    """載入 JSON 文件（唯讀，供 GET 使用）"""
+    try:
+        with dataset_seconds.time(op='get', dataset=filename):
+            return store.get(filename)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return None
+
 def load_json(filename):
-    """載入 JSON 文件"""
-    filepath = os.path.join(DATASET_DIR, filename)
+    """載入 JSON 文件（可修改的複本）"""
+    try:
+        with dataset_seconds.time(op='load', dataset=filename):
+            return store.load(filename)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return None
+
+def load_model(filename):
+    """載入可修改的 DatasetModel（含 id 索引，需在 @locked 內使用）"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return store.model(filename)
     except Exception as e:
         print(f"Error loading {filename}: {e}")
         return None
 
-def save_json(filename, data):
-    """儲存 JSON 文件"""
-    filepath = os.path.join(DATASET_DIR, filename)
+def save_json(filename, data, op=None, **meta):
+    """儲存 JSON 文件或 DatasetModel（原子寫入，改寫整份檔案），成功後再追加變更紀錄
+
+    op 為紀錄中的操作名稱，預設為目前的 endpoint；meta 會一併寫入紀錄。
+    """
+    with store.mutation(filename):
+        old = view_json(filename)
+        try:
+            with dataset_seconds.time(op='save', dataset=filename):
+                saved = store.save(filename, data)
+        except Exception as e:
+            print(f"Error saving {filename}: {e}")
+            return False
+        record_change(filename, old, saved, op, meta)
+        publish_changes(filename, old, data)
+    schedule_export(filename)
+    json_payload(filename)
+    sync_search(filename)
+    return True
+
+def record_change(filename, old, new, op=None, meta=None):
+    """記錄已完成的儲存（需持有 mutation 鎖）；紀錄失敗不影響儲存，下一次記錄時會補上 external 紀錄"""
+    if not current_app.config['JOURNAL']:
+        return None
+    if op is None:
+        op = (endpoint_name() if has_request_context() else None) or 'save'
+    try:
+        return journal.record(filename, old, new, op, **(meta or {}))
+    except Exception as e:
+        print(f"Error journaling {filename}: {e}")
+        return None
+
+def publish_changes(filename, old, data):
+    """把儲存前後的差異推送給 /api/changes 的連線（需持有 mutation 鎖，事件依儲存順序）"""
+    dataset = os.path.splitext(filename)[0]
+    new = data.doc if isinstance(data, DatasetModel) else data
+    try:
+        changes.publish(dataset, record_events(dataset, old, new))
+    except Exception as e:
+        print(f"Error publishing changes for {filename}: {e}")
+
+def recover_datasets():
+    """dataset 檔案遺失或損毀時，從快照與紀錄重建"""
+    if not os.path.isdir(current_app.config['JOURNAL_DIR']):
+        return []
+    recovered = []
+    for name in sorted(os.listdir(current_app.config['JOURNAL_DIR'])):
+        filename = f'{name}.json'
+        try:
+            store.get(filename)
+            continue
+        except Exception:
+            pass
+        try:
+            doc = journal.recover(filename)
+            store.save(filename, doc)
+        except Exception as e:
+            print(f"Error recovering {filename}: {e}")
+            continue
+        print(f"Recovered {filename} from journal")
+        mirror_json(filename)
+        export_static(filename)
+        recovered.append(filename)
+    return recovered
+
+def schedule_export(filename):
+    """在背景重新產生 filename 的衍生檔案（EXPORT_DELAY 秒內的儲存合併為一次匯出）"""
+    if current_app.config['STATIC_EXPORT'] or current_app.config['STORAGE_BACKEND'] == 'sqlite':
+        exports.trigger(filename)
+
+def export_derived(filenames):
+    """背景匯出：SQLite 模式下先寫回 dataset/*.json，再產生靜態 bundle 與頁面"""
+    mirror_json(*filenames)
+    export_static(*filenames)
+
+def mirror_json(*filenames):
+    """SQLite 模式下把 dataset 寫回 dataset/*.json（靜態網站與 data-loader.js 讀取的檔案）"""
+    if current_app.config['STORAGE_BACKEND'] != 'sqlite':
+        return
+    try:
+        store.write_json(current_app.config['DATASET_DIR'], *filenames)
+    except Exception as e:
+        print(f"Error writing {', '.join(filenames) or 'dataset'} to JSON: {e}")
+
+def export_static(*filenames):
+    """重新產生靜態 bundle 與預先渲染的頁面；失敗不影響已完成的儲存"""
+    if not current_app.config['STATIC_EXPORT']:
+        return None
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
+        bundles = exporter.export(*filenames)
     except Exception as e:
-        print(f"Error saving {filename}: {e}")
-        return False
+        print(f"Error exporting {', '.join(filenames) or 'dataset'}: {e}")
+        return None
+    if current_app.config['STATIC_PRERENDER']:
+        try:
+            prerenderer.render(*filenames, bundles=bundles)
+        except Exception as e:
+            print(f"Error prerendering {', '.join(filenames) or 'pages'}: {e}")
+    return bundles
+
+def sync_search(filename):
+    """以 dataset 目前的內容更新搜尋索引（沒有變更時不做任何事）"""
+    dataset = os.path.splitext(filename)[0]
+    if dataset not in SEARCH_FIELDS:
+        return
+    data = view_json(filename)
+    if data is not None:
+        search.sync(dataset, data.get(dataset, []))
+
+def json_payload(filename):
+    """取得文件序列化、壓縮後的 Payload（儲存後預先產生，GET 時直接使用）"""
+    data = view_json(filename)
+    if data is None:
+        return None
+    mtime = store.last_modified(filename)
+    last_modified = datetime.fromtimestamp(int(mtime)) if mtime else None
+    return payloads.get(filename, data, last_modified)
+
+def json_response(filename):
+    """以快取的 Payload 回應 GET：支援 ETag / If-Modified-Since（304）與 gzip / brotli"""
+    payload = json_payload(filename)
+    if payload is None:
+        return jsonify(None)
+
+    encoding = payloads.choose_encoding(payload, request.accept_encodings)
+    response = current_app.response_class(payload.bodies[encoding], mimetype=current_app.json.mimetype)
+    response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    # 每種編碼的內容不同，ETag 也要不同
+    response.set_etag(payload.etag if encoding == 'identity' else f"{payload.etag}-{encoding}")
+    if payload.last_modified:
+        response.last_modified = payload.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def list_response(filename):
+    """列表 API：有查詢參數時只回傳符合條件的那一頁（見 list_query.py），否則回傳整份文件"""
+    if not is_query(request.args):
+        return json_response(filename)
+    try:
+        query = parse_query(request.args)
+    except QueryError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    payload = json_payload(filename)
+    if payload is None:
+        return jsonify(None)
+    key = os.path.splitext(filename)[0]
+    page = queries.run(filename, payload.doc.get(key, []), query)
+
+    response = jsonify({key: page.items, 'total': page.total, 'next_cursor': page.next_cursor})
+    # 同一文件版本與相同參數的結果相同
+    response.set_etag(hashlib.sha256(f"{payload.etag}?{request.query_string.decode()}".encode()).hexdigest()[:32])
+    if payload.last_modified:
+        response.last_modified = payload.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def find_record(filename, record_id):
+    """以 id 取得唯讀的單筆記錄（使用列表查詢的 id 索引）"""
+    data = view_json(filename)
+    if data is None:
+        return None
+    key = os.path.splitext(filename)[0]
+    items = data.get(key, [])
+    pos = queries.index(filename, items).position(record_id)
+    return None if pos is None else items[pos]
+
+def record_json(name, record):
+    """回傳單筆記錄，ETag 為記錄的版本（更新時以 If-Match 帶回）"""
+    response = jsonify({'success': True, name: record})
+    response.set_etag(record_version(record))
+    response.cache_control.no_cache = True
+    return response
+
+def version_conflict(record):
+    """If-Match 與記錄目前的版本不同時回傳 412（記錄已被其他人修改），否則回傳 None"""
+    if request.if_match and not request.if_match.contains(record_version(record)):
+        return jsonify({'success': False, 'error': 'Record was modified by someone else, reload and try again',
+                        'version': record_version(record)}), 412
+    return None
+
+def patch_record(filename, name, record_id, prepare=None):
+    """以 JSON Patch（application/json-patch+json）或 Merge Patch 更新單筆記錄（需在 @locked 內呼叫）"""
+    model = load_model(filename)
+    if model is None:
+        return jsonify({'success': False, 'error': 'No data found'}), 404
+    record = model.get(record_id)
+    if record is None:
+        return jsonify({'success': False, 'error': f'{name.capitalize()} not found'}), 404
+    conflict = version_conflict(record)
+    if conflict:
+        return conflict
+
+    body = request.get_json(silent=True)
+    if body is None:
+        return jsonify({'success': False, 'error': 'Invalid JSON'}), 400
+    try:
+        if request.mimetype == 'application/json-patch+json':
+            updated = apply_json_patch(thaw(record), body)
+        else:
+            updated = apply_merge_patch(record, body)
+    except PatchTestFailed as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except PatchError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not isinstance(updated, dict) or updated.get('id') != record_id:
+        return jsonify({'success': False, 'error': 'id cannot be changed'}), 400
+
+    if prepare is not None:
+        updated = prepare(updated)
+    model.replace(record_id, updated)
+    if save_json(filename, model):
+        return record_json(name, updated)
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
+
+def move_records(filename):
+    """移動記錄：{"id": "x", "before": "y"}、{"id": "x", "after": "y"} 或 {"moves": [...]}（需在 @locked 內呼叫）
+
+    If-Match 可帶入整份列表的 ETag，列表有任何變更時拒絕（412）。
+    """
+    options = request.get_json(silent=True) or {}
+    moves = options.get('moves', [options])
+    if not isinstance(moves, list) or not moves or not all(isinstance(move, dict) and move.get('id') for move in moves):
+        return jsonify({'success': False, 'error': 'No moves provided'}), 400
+
+    payload = json_payload(filename)
+    if request.if_match and payload is not None and not request.if_match.contains(payload.etag):
+        return jsonify({'success': False, 'error': 'List was modified by someone else, reload and try again'}), 412
+
+    model = load_model(filename)
+    if model is None:
+        return jsonify({'success': False, 'error': 'No data found'}), 404
+    for move in moves:
+        if not model.move(move['id'], before=move.get('before'), after=move.get('after')):
+            # 沒有儲存，已套用的移動一併捨棄
+            return jsonify({'success': False, 'error': f"Cannot move {move['id']}: record not found"}), 409
+
+    if save_json(filename, model):
+        return jsonify({'success': True, 'moved': len(moves)})
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
+
+def locked(filename):
+    """在整個 request 期間鎖定 dataset 檔案，避免 read-modify-write 互相覆蓋"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with store.mutation(filename):
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def attach_photo_variants(record):
+    """加上照片已存在的縮圖（縮圖可能在記錄儲存前就已產生）"""
+    if record.get('photo'):
+        variants = image_variants.find_variants(current_app.config['UPLOAD_FOLDER'], record['photo'])
+        return image_variants.with_variants(record, variants)
+    return record
 
 def allowed_file(filename):
     """檢查文件類型是否允許"""
@@ -57,18 +476,32 @@ def allowed_file(filename):
 
 # ==================== Routes ====================
 
-@app.route('/asset/<path:subpath>')
+# 所有路由都在 blueprint 上，create_app() 註冊到每個 app
+bp = Blueprint('admin', __name__)
+
+@bp.route('/asset/<path:subpath>')
 def serve_asset(subpath):
     """提供靜態資源文件"""
-    asset_dir = os.path.join(BASE_DIR, 'asset')
-    return send_from_directory(asset_dir, subpath)
-
-@app.route('/')
+    asset_dir = current_app.config['UPLOAD_FOLDER']
+    # send_from_directory 已處理 If-None-Match / If-Modified-Since 與 Range
+    if not is_content_addressed(subpath):
+        return send_from_directory(asset_dir, subpath)
+
+    # 以內容雜湊命名的檔案永遠不會改變：以雜湊作為 strong ETag，並可以永久快取
+    response = send_from_directory(asset_dir, subpath, etag=os.path.basename(subpath))
+    if response.status_code in (200, 206, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    return response
+
+@bp.route('/')
 def index():
     """Dashboard 首頁"""
-    publications = load_json('publications.json')
-    members = load_json('members.json')
-    events = load_json('events.json')
+    publications = view_json('publications.json')
+    members = view_json('members.json')
+    events = view_json('events.json')
 
     stats = {
         'publications': len(publications.get('publications', [])) if publications else 0,
@@ -79,396 +512,494 @@ def index():
 
     return render_template('dashboard.html', stats=stats)
 
+@bp.route('/api/dataset/stats', methods=['GET'])
+def dataset_stats():
+    """Dataset 快取命中統計"""
+    return jsonify(store.stats())
+
+@bp.route('/api/search', methods=['GET'])
+def search_dataset():
+    """全文檢索：q 為查詢字串（前綴比對），dataset 可限制範圍（逗號分隔）"""
+    text = request.args.get('q', '').strip()
+    datasets = [name for name in request.args.get('dataset', '').split(',') if name] or list(SEARCH_FIELDS)
+    unknown = [name for name in datasets if name not in SEARCH_FIELDS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown dataset: {', '.join(unknown)}"}), 400
+    try:
+        limit = min(int(request.args.get('limit', 20)), MAX_RESULTS)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+    # 檔案可能在 admin 之外被修改
+    for dataset in datasets:
+        sync_search(f'{dataset}.json')
+    hits, total = search.search(text, datasets, max(limit, 1))
+    return jsonify({
+        'query': text,
+        'total': total,
+        'results': [{'dataset': hit.dataset, 'score': hit.score, 'record': hit.record} for hit in hits],
+    })
+
+@bp.route('/api/export', methods=['POST'])
+def export_dataset():
+    """重新產生全部靜態 bundle（SQLite 模式下也寫回 dataset/*.json）"""
+    mirror_json()
+    bundles = export_static()
+    if bundles is None:
+        return jsonify({'success': False, 'error': 'Failed to export'}), 500
+    return jsonify({'success': True, 'bundles': bundles})
+
+# ==================== Metrics ====================
+
+@bp.before_app_request
+def start_request_timer():
+    """記錄請求開始時間；PROFILING 開啟且帶有 X-Profile header 時開始 profiling"""
+    g.request_start = time.perf_counter()
+    if current_app.config['PROFILING'] and request.headers.get('X-Profile'):
+        profiler = RequestProfiler(current_app.config['PROFILE_DIR'], endpoint_name())
+        g.profiler = profiler if profiler.start() else None
+
+@bp.after_app_request
+def record_request_metrics(response):
+    """依 route（URL 規則，不含實際參數）記錄延遲，並以 Server-Timing 回傳處理時間"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-Output'] = profiler.stop()
+    start = g.pop('request_start', None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_seconds.observe(elapsed, method=request.method, route=route, status=response.status_code)
+        response.headers['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}'
+    return response
+
+@bp.teardown_app_request
+def stop_profiler(exc):
+    """請求中途失敗時也要結束 profiling"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault('template_start', {})[template.name] = time.perf_counter()
+
+def record_template_time(sender, template, context, **extra):
+    start = g.get('template_start', {}).pop(template.name, None)
+    if start is not None:
+        template_seconds.observe(time.perf_counter() - start, template=template.name)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text format 的統計資料"""
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# ==================== Changes ====================
+
+# 管理頁面中每個 dataset 的列表：[(容器的 id, templates/_rows.html 的 macro, macro 的其他參數)]
+ROW_CONTAINERS = {
+    'publications': [('publicationsTableAll', 'publication_row', ('all',)),
+                     ('publicationsTableJournal', 'publication_row', ('journal',)),
+                     ('publicationsTableConference', 'publication_row', ('conference',)),
+                     ('publicationsTableBook', 'publication_row', ('book',))],
+    'members': [('membersTable', 'member_row', ())],
+    'events': [('eventsGrid', 'event_card', ())],
+}
+
+@bp.route('/api/changes', methods=['GET'])
+def change_stream():
+    """記錄變更的 Server-Sent Events 串流（見 change_feed.py）
+
+    ?datasets=publications,members 只接收指定的 dataset；重新連線時以 Last-Event-ID 補送中斷期間的事件。
+    """
+    datasets = set(filter(None, request.args.get('datasets', '').split(','))) or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = current_app.response_class(changes.stream(last_event_id, datasets), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 不讓 nginx 等 proxy 緩衝
+    return response
+
+@bp.route('/rows/<dataset>/<record_id>', methods=['GET'])
+def record_rows(dataset, record_id):
+    """單筆記錄在管理頁面各列表中的 HTML（收到變更事件後只更新這一筆），不屬於該列表時為空字串"""
+    containers = ROW_CONTAINERS.get(dataset)
+    if containers is None:
+        return jsonify({'success': False, 'error': 'Unknown dataset'}), 404
+    record = find_record(f'{dataset}.json', record_id)
+    if record is None:
+        return jsonify({'success': False, 'error': 'Record not found'}), 404
+    rows = {container: str(get_template_attribute('_rows.html', macro)(record, *args)).strip()
+            for container, macro, args in containers}
+    return jsonify({'success': True, 'version': record_version(record), 'rows': rows})
+
+# ==================== History ====================
+
+# 可以在 admin 中復原 / 回溯的 dataset
+HISTORY_DATASETS = ('publications', 'members', 'events', 'assets')
+
+def history_dataset(name):
+    """檢查 dataset 名稱，回傳檔名；不支援時回傳 None"""
+    return f'{name}.json' if name in HISTORY_DATASETS else None
+
+def summarize_entry(entry):
+    """紀錄的摘要（不含記錄內容）"""
+    summary = {field: entry[field] for field in ('seq', 'ts', 'op', 'undoes', 'redoes', 'rollback_to') if field in entry}
+    summary['time'] = datetime.fromtimestamp(entry['ts']).isoformat(timespec='seconds')
+    summary['changes'] = [{'id': change['id'],
+                           'action': 'add' if change['before'] is None else 'delete' if change['after'] is None else 'update'}
+                          for change in entry.get('changes', [])]
+    summary['fields'] = sorted(entry.get('fields', {}))
+    summary['reordered'] = 'order' in entry
+    return summary
+
+@bp.route('/api/history', methods=['GET'])
+def history():
+    """變更紀錄（由新到舊），以及目前可以復原 / 重做的紀錄"""
+    filename = history_dataset(request.args.get('dataset', 'publications'))
+    if filename is None:
+        return jsonify({'success': False, 'error': 'Unknown dataset'}), 400
+    try:
+        limit = max(int(request.args.get('limit', 50)), 1)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+
+    entries = journal.entries(filename)
+    done, undone = journal.stacks(filename)
+    return jsonify({
+        'entries': [summarize_entry(entry) for entry in reversed(entries[-limit:])],
+        'total': len(entries),
+        'undo': done[-1] if done else None,
+        'redo': undone[-1] if undone else None,
+    })
+
+def history_action(action, filename, **meta):
+    """在鎖定 dataset 的情況下套用 action(doc) 的結果並儲存"""
+    with store.mutation(filename):
+        doc = view_json(filename) or {}
+        # 先補上 admin 之外的修改，復原的對象才會是最近一次變更
+        record_change(filename, doc, doc, 'external')
+        try:
+            doc, extra = action(doc)
+        except JournalConflict as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        except JournalError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if save_json(filename, doc, op=endpoint_name(), **extra, **meta):
+            return jsonify({'success': True, **extra})
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
+
+@bp.route('/api/history/undo', methods=['POST'])
+def history_undo():
+    """復原最近一次變更；記錄已被之後的變更修改時回傳 409"""
+    filename = history_dataset((request.json or {}).get('dataset'))
+    if filename is None:
+        return jsonify({'success': False, 'error': 'Unknown dataset'}), 400
+    return history_action(lambda doc: journal.undo(filename, doc), filename)
+
+@bp.route('/api/history/redo', methods=['POST'])
+def history_redo():
+    """重做最近一次復原的變更"""
+    filename = history_dataset((request.json or {}).get('dataset'))
+    if filename is None:
+        return jsonify({'success': False, 'error': 'Unknown dataset'}), 400
+    return history_action(lambda doc: journal.redo(filename, doc), filename)
+
+@bp.route('/api/history/rollback', methods=['POST'])
+def history_rollback():
+    """回到某一筆紀錄（to 為 seq）或某個時間點（to 為 ISO 8601 時間）的內容；回溯本身也可以復原"""
+    data = request.json or {}
+    filename = history_dataset(data.get('dataset'))
+    if filename is None:
+        return jsonify({'success': False, 'error': 'Unknown dataset'}), 400
+    target = data.get('to')
+    try:
+        if isinstance(target, int) and not isinstance(target, bool):
+            point = {'seq': target}
+        else:
+            point = {'ts': datetime.fromisoformat(str(target)).timestamp()}
+    except ValueError:
+        return jsonify({'success': False, 'error': 'to must be a seq number or an ISO 8601 time'}), 400
+    return history_action(lambda doc: (journal.state_at(filename, **point), {}), filename, rollback_to=target)
+
 # ==================== Publications ====================
 
-@app.route('/publications')
+@bp.route('/publications')
 def publications():
     """出版物管理頁面"""
-    data = load_json('publications.json')
+    data = view_json('publications.json')
     return render_template('publications.html', publications=data.get('publications', []) if data else [])
 
-@app.route('/api/publications', methods=['GET'])
+@bp.route('/api/publications', methods=['GET'])
 def get_publications():
-    """獲取所有出版物"""
-    data = load_json('publications.json')
-    return jsonify(data)
+    """獲取出版物（可篩選、排序、分頁，見 list_query.py）"""
+    return list_response('publications.json')
 
-@app.route('/api/publications', methods=['POST'])
+@bp.route('/api/publications', methods=['POST'])
+@locked('publications.json')
 def add_publication():
     """新增出版物"""
-    data = load_json('publications.json')
+    model = load_model('publications.json')
     new_pub = request.json
 
-    # 生成新 ID (手動新增使用 z 開頭)
-    existing_ids = [p['id'] for p in data['publications']]
-    pub_type = new_pub.get('type', 'journal')
-
-    # 根據類型決定 ID 前綴
-    if pub_type == 'journal':
-        prefix = 'jz'
-    elif pub_type == 'conference':
-        prefix = 'cz'
-    elif pub_type == 'book':
-        prefix = 'bz'
-    else:
-        prefix = 'jz'  # 預設
-
-    # 找到該前綴的最大編號
-    max_num = 0
-    for id_str in existing_ids:
-        if id_str.startswith(prefix):
-            try:
-                num = int(id_str[2:])  # 跳過前兩個字元 (例如 'jz')
-                max_num = max(max_num, num)
-            except ValueError:
-                continue
+    # 生成新 ID (手動新增使用 z 開頭，依類型決定前綴)
+    prefix = ID_PREFIXES.get(new_pub.get('type', 'journal'), 'jz')
 
-    new_pub['id'] = f"{prefix}{max_num + 1}"
+    # 該前綴的最大編號 + 1（由索引維護）
+    new_pub['id'] = model.next_id(prefix)
 
     # 手動新增的 publication 插入到最前面
-    data['publications'].insert(0, new_pub)
+    model.insert(0, new_pub)
 
-    if save_json('publications.json', data):
+    if save_json('publications.json', model):
         return jsonify({'success': True, 'publication': new_pub})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/publications/<pub_id>', methods=['PUT'])
+@bp.route('/api/publications/<pub_id>', methods=['PUT'])
+@locked('publications.json')
 def update_publication(pub_id):
     """更新出版物"""
-    data = load_json('publications.json')
+    model = load_model('publications.json')
     updated_pub = request.json
-    
-    for i, pub in enumerate(data['publications']):
-        if pub['id'] == pub_id:
-            data['publications'][i] = updated_pub
-            if save_json('publications.json', data):
-                return jsonify({'success': True, 'publication': updated_pub})
-            return jsonify({'success': False, 'error': 'Failed to save'}), 500
-    
-    return jsonify({'success': False, 'error': 'Publication not found'}), 404
 
-@app.route('/api/publications/<pub_id>', methods=['DELETE'])
+    existing = model.get(pub_id)
+    if existing is None:
+        return jsonify({'success': False, 'error': 'Publication not found'}), 404
+    conflict = version_conflict(existing)
+    if conflict:
+        return conflict
+    # aliases 由合併重複記錄時維護，編輯表單不會帶回
+    if existing.get('aliases') and 'aliases' not in updated_pub:
+        updated_pub['aliases'] = existing['aliases']
+    model.replace(pub_id, updated_pub)
+
+    if save_json('publications.json', model):
+        return record_json('publication', updated_pub)
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
+
+@bp.route('/api/publications/<pub_id>', methods=['GET'])
+def get_publication(pub_id):
+    """獲取單筆出版物（ETag 為記錄的版本）"""
+    pub = find_record('publications.json', pub_id)
+    if pub is None:
+        return jsonify({'success': False, 'error': 'Publication not found'}), 404
+    return record_json('publication', pub)
+
+@bp.route('/api/publications/<pub_id>', methods=['PATCH'])
+@locked('publications.json')
+def patch_publication(pub_id):
+    """部分更新出版物（JSON Patch / Merge Patch）"""
+    return patch_record('publications.json', 'publication', pub_id)
+
+@bp.route('/api/publications/<pub_id>', methods=['DELETE'])
+@locked('publications.json')
 def delete_publication(pub_id):
     """刪除出版物"""
-    data = load_json('publications.json')
+    model = load_model('publications.json')
 
-    data['publications'] = [p for p in data['publications'] if p['id'] != pub_id]
+    model.remove(pub_id)
 
-    if save_json('publications.json', data):
+    if save_json('publications.json', model):
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/publications/reorder', methods=['POST'])
+@bp.route('/api/publications/move', methods=['POST'])
+@locked('publications.json')
+def move_publications():
+    """移動出版物到另一筆之前 / 之後（拖曳排序）"""
+    return move_records('publications.json')
+
+@bp.route('/api/publications/reorder', methods=['POST'])
+@locked('publications.json')
 def reorder_publications():
     """重新排序出版物"""
-    data = load_json('publications.json')
+    model = load_model('publications.json')
     new_order = request.json.get('order', [])
 
     if not new_order:
         return jsonify({'success': False, 'error': 'No order provided'}), 400
 
-    # 建立 ID 到出版物的映射
-    pub_map = {pub['id']: pub for pub in data['publications']}
-
-    # 根據新順序重新排列
+    # 根據新順序重新排列（透過 id 索引取得出版物）
     reordered_pubs = []
+    seen = set()
     for pub_id in new_order:
-        if pub_id in pub_map:
-            reordered_pubs.append(pub_map[pub_id])
+        pub = model.get(pub_id)
+        if pub is not None and pub_id not in seen:
+            reordered_pubs.append(pub)
+            seen.add(pub_id)
 
     # 添加任何不在新順序中的出版物（以防萬一）
-    for pub in data['publications']:
-        if pub['id'] not in new_order:
+    for pub in model.items:
+        if pub['id'] not in seen:
             reordered_pubs.append(pub)
 
-    data['publications'] = reordered_pubs
+    model.reorder(reordered_pubs)
 
-    if save_json('publications.json', data):
+    if save_json('publications.json', model):
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-def crawl_dblp(existing_pubs=None):
-    """從 DBLP 爬取出版物資料
+@bp.route('/api/publications/duplicates', methods=['GET'])
+def publication_duplicates():
+    """列出可能重複的出版物（例如手動新增後又被爬蟲抓到的同一篇論文）"""
+    data = view_json('publications.json')
+    pubs = data.get('publications', []) if data else []
+    return jsonify({'success': True, 'duplicates': describe(find_duplicates(pubs), pubs)})
+
+@bp.route('/api/publications/merge', methods=['POST'])
+@locked('publications.json')
+def merge_publications():
+    """合併兩筆重複的出版物：保留 keep，補上 remove 才有的欄位後刪除 remove"""
+    model = load_model('publications.json')
+    options = request.get_json(silent=True) or {}
+    keep_id, remove_id = options.get('keep'), options.get('remove')
+
+    if not keep_id or not remove_id or keep_id == remove_id:
+        return jsonify({'success': False, 'error': 'keep and remove must be two different IDs'}), 400
+    keep, remove = model.get(keep_id), model.get(remove_id)
+    if keep is None or remove is None:
+        return jsonify({'success': False, 'error': 'Publication not found'}), 404
+
+    merged = merge_records(keep, remove)
+    model.replace(keep_id, merged)
+    model.remove(remove_id)
+
+    if save_json('publications.json', model):
+        return jsonify({'success': True, 'publication': merged})
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-    Args:
-        existing_pubs: 現有的出版物列表，用於檢查是否需要進入 conference 連結
-    """
-    url = "https://dblp.org/pid/p/HsingKuoKennethPao.html"
+# 匯入時最多回報的錯誤數
+MAX_IMPORT_ERRORS = 100
 
-    # 建立現有資料的映射（ID -> publication）
-    existing_map = {}
-    if existing_pubs:
-        existing_map = {pub['id']: pub for pub in existing_pubs}
+@bp.route('/api/publications/import', methods=['POST'])
+def import_publications():
+    """批次匯入出版物（BibTeX / CSV / NDJSON）
 
+    上傳檔案（multipart 的 file 欄位）或直接以 body 送出，格式依 ?format=、副檔名或 Content-Type 判斷。
+    逐行解析並驗證全部記錄，有任何錯誤時不寫入（回傳各行的錯誤）；
+    通過後一次指派 jz / cz / bz ID 並插入到最前面，只寫入一次。?dry_run=1 只驗證。
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    fmt = request.args.get('format') or detect_format(upload.filename if upload else None,
+                                                      upload.content_type if upload else request.content_type)
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"Unknown format, use one of: {', '.join(FORMATS)}"}), 400
+
+    # 解析與驗證不需要持有鎖
+    snapshot = view_json('publications.json')
+    highlights = sorted({pub.get('highlight_author') for pub in (snapshot or {}).get('publications', [])
+                         if pub.get('highlight_author')}, key=len, reverse=True)
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    pubs, errors, invalid = [], [], 0
     try:
-        # 發送請求
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        # 解析 HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        publications = []
-
-        # 找到所有的出版物項目
-        entries = soup.find_all('li', class_='entry')
-
-        for entry in entries:
-            # 找到 ID (nr div)
-            nr_div = entry.find('div', class_='nr')
-            if not nr_div:
+        for line, pub, error in read_publications(fmt, lines, highlights):
+            if error is None:
+                pubs.append(pub)
                 continue
+            invalid += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append({'line': line, 'error': str(error)})
+    except PublicationFormatError as e:
+        invalid += 1
+        errors.append({'line': e.line, 'error': str(e)})
+    except UnicodeDecodeError:
+        invalid += 1
+        errors.append({'line': None, 'error': 'File is not UTF-8'})
+    if errors:
+        return jsonify({'success': False, 'error': f'{invalid} invalid records', 'errors': errors}), 400
+    if not pubs:
+        return jsonify({'success': False, 'error': 'No publications found'}), 400
+
+    # 與現有資料相似的記錄只回報，由使用者決定是否合併（?duplicates=0 略過）；
+    # 比對以匯入前的內容為準，在取得鎖之前完成
+    matches = [[] for _ in pubs]
+    if request.args.get('duplicates', '1') != '0':
+        duplicate_index = DuplicateIndex((snapshot or {}).get('publications', []))
+        matches = [duplicate_index.match(pub) for pub in pubs]
+
+    with store.mutation('publications.json'):
+        model = load_model('publications.json')
+        if model is None:
+            return jsonify({'success': False, 'error': 'No data found'}), 500
+
+        # 依前綴接續編號（整批只查一次索引）
+        next_num = {}
+        for pub in pubs:
+            prefix = ID_PREFIXES.get(pub['type'], 'jz')
+            num = next_num.get(prefix) or model.index.next_num(prefix)
+            pub['id'] = f'{prefix}{num}'
+            next_num[prefix] = num + 1
+
+        duplicates = [pair._replace(id=pub['id']) for pub, pairs in zip(pubs, matches) for pair in pairs]
+
+        if request.args.get('dry_run'):
+            return jsonify({'success': True, 'dry_run': True, 'count': len(pubs), 'publications': pubs,
+                            'duplicates': describe(duplicates, pubs + list(model.items))})
+
+        # 手動新增的 publication 放在最前面，維持檔案中的順序
+        model.reorder(pubs + list(model.items))
+        if not save_json('publications.json', model, count=len(pubs), format=fmt):
+            return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-            # 提取 ID
-            id_match = re.search(r'\[(j\d+|c\d+)\]', nr_div.text)
-            if not id_match:
-                continue
-
-            pub_id = id_match.group(1)
-
-            # 只處理 journal (j) 和 conference (c)
-            if not (pub_id.startswith('j') or pub_id.startswith('c')):
-                continue
-
-            # 確定類型
-            pub_type = 'journal' if pub_id.startswith('j') else 'conference'
-
-            # 找到標題
-            title_tag = entry.find('span', class_='title')
-            if not title_tag:
-                continue
-            title = title_tag.text.strip()
-
-            # 找到作者
-            authors_list = []
-            for author in entry.find_all('span', itemprop='author'):
-                author_name = author.find('span', itemprop='name')
-                if author_name:
-                    authors_list.append(author_name.text.strip())
-            authors = ', '.join(authors_list)
-
-            # 獲取完整的文字內容來提取 venue, volume, pages, year
-            # DBLP 的格式通常是：Title. Venue Volume: Pages (Year)
-            entry_text = entry.get_text(separator=' ', strip=True)
-
-            # 初始化變數
-            venue = ''
-            year = 0
-            volume = ''
-            pages = ''
-            location = ''
-            date = ''
-
-            # 提取年份（通常在括號中）
-            year_match = re.search(r'\((\d{4})\)', entry_text)
-            if year_match:
-                year = int(year_match.group(1))
-
-            if pub_type == 'journal':
-                # Journal 格式: Title. Venue Volume: Pages (Year)
-                # 例如: Interpretable deep model pruning. Neurocomputing 647: 130485 (2025)
-
-                # 嘗試匹配 "Venue Volume: Pages (Year)" 格式
-                # 在標題後面找到 venue 資訊
-                title_end = entry_text.find(title) + len(title)
-                if title_end > 0:
-                    remaining_text = entry_text[title_end:].strip()
-                    # 移除開頭的句點
-                    if remaining_text.startswith('.'):
-                        remaining_text = remaining_text[1:].strip()
-
-                    # 匹配格式: Venue Volume : Pages ( Year )
-                    # 注意：DBLP 的文字中可能有額外的空格
-                    # 例如: Neurocomputing 647 : 130485 ( 2025 )
-                    # 或: IEEE Trans. ... 2 ( 3 ) : 162-175 ( 2010 )
-
-                    # 先嘗試匹配帶 issue 的格式: Venue Volume ( Issue ) : Pages ( Year )
-                    venue_match = re.match(r'([^0-9]+?)\s+(\d+)\s*\(\s*\d+\s*\)\s*:\s*([0-9\-]+)\s*\(\s*(\d{4})\s*\)', remaining_text)
-                    if venue_match:
-                        venue = venue_match.group(1).strip()
-                        volume = venue_match.group(2).strip()
-                        pages = venue_match.group(3).strip()
-                        year = int(venue_match.group(4))
-                    else:
-                        # 嘗試匹配簡單格式: Venue Volume : Pages ( Year )
-                        venue_match = re.match(r'([^0-9]+?)\s+(\d+)\s*:\s*([0-9\-]+)\s*\(\s*(\d{4})\s*\)', remaining_text)
-                        if venue_match:
-                            venue = venue_match.group(1).strip()
-                            volume = venue_match.group(2).strip()
-                            pages = venue_match.group(3).strip()
-                            year = int(venue_match.group(4))
-                        else:
-                            # 嘗試只匹配 venue 和 year（沒有 volume 和 pages）
-                            venue_match2 = re.match(r'([^(]+?)\s*\(\s*(\d{4})\s*\)', remaining_text)
-                            if venue_match2:
-                                venue_text = venue_match2.group(1).strip()
-                                year = int(venue_match2.group(2))
-                                # 嘗試從 venue_text 中分離 venue, volume, pages
-                                # 格式可能是: "Venue Volume: Pages"
-                                parts_match = re.match(r'([^0-9]+?)\s+(\d+)\s*:\s*([0-9\-]+)', venue_text)
-                                if parts_match:
-                                    venue = parts_match.group(1).strip()
-                                    volume = parts_match.group(2).strip()
-                                    pages = parts_match.group(3).strip()
-                                else:
-                                    venue = venue_text
-
-            elif pub_type == 'conference':
-                # Conference 格式: Title. Venue Year: Pages
-                # 例如: Reconsider Time Series Analysis. IEEE Big Data 2024: 1558-1565
-
-                # 先從主頁面提取基本資訊
-                title_end = entry_text.find(title) + len(title)
-                if title_end > 0:
-                    remaining_text = entry_text[title_end:].strip()
-                    # 移除開頭的句點
-                    if remaining_text.startswith('.'):
-                        remaining_text = remaining_text[1:].strip()
-
-                    # 匹配格式: Venue Year : Pages
-                    # 注意：DBLP 的文字中可能有額外的空格
-                    venue_match = re.match(r'(.+?)\s+(\d{4})\s*:\s*([0-9\-]+)', remaining_text)
-                    if venue_match:
-                        venue = venue_match.group(1).strip()
-                        year = int(venue_match.group(2))
-                        pages = venue_match.group(3).strip()
-                    else:
-                        # 嘗試只匹配 venue 和 year（沒有 pages）
-                        venue_match2 = re.match(r'(.+?)\s+(\d{4})', remaining_text)
-                        if venue_match2:
-                            venue = venue_match2.group(1).strip()
-                            year = int(venue_match2.group(2))
-
-                # 檢查是否需要進入 conference 連結
-                # 只有在現有資料沒有 location 時才進入
-                should_fetch_details = True
-                if pub_id in existing_map:
-                    existing_pub = existing_map[pub_id]
-                    if existing_pub.get('location') and existing_pub.get('location') != '':
-                        # 已有 location，不需要再抓取
-                        should_fetch_details = False
-                        # 使用現有的 location 和 date
-                        location = existing_pub.get('location', '')
-                        date = existing_pub.get('date', '')
-
-                # 嘗試進入 conference 連結抓取完整資訊
-                if should_fetch_details:
-                    try:
-                        # 找到 conference 的連結
-                        conf_link = entry.find('a', href=re.compile(r'/db/conf/'))
-                        if conf_link and conf_link.get('href'):
-                            href = conf_link['href']
-                            # 檢查是否已經是完整 URL
-                            if href.startswith('http'):
-                                conf_url = href
-                            else:
-                                conf_url = 'https://dblp.org' + href
-                            # 移除錨點（#xxx）
-                            conf_url = conf_url.split('#')[0]
-
-                            # 發送請求到 conference 頁面
-                            conf_response = requests.get(conf_url, timeout=10)
-                            if conf_response.status_code == 200:
-                                conf_soup = BeautifulSoup(conf_response.text, 'html.parser')
-
-                                # 找到 h1 標籤，格式: "46th EMBC 2024: Orlando, FL, USA"
-                                h1 = conf_soup.find('h1')
-                                if h1:
-                                    h1_text = h1.get_text(strip=True)
-                                    # 解析格式: "完整會議名稱: 地點"
-                                    h1_match = re.match(r'(.+?):\s*(.+)', h1_text)
-                                    if h1_match:
-                                        full_venue = h1_match.group(1).strip()
-                                        location = h1_match.group(2).strip()
-
-                                        # 從完整會議名稱中提取日期資訊（如果有的話）
-                                        # 例如: "46th EMBC 2024" -> venue = "46th Annual International Conference of the IEEE Engineering in Medicine and Biology Society (EMBC 2024)"
-                                        # 我們需要從頁面中找到完整的會議名稱
-
-                                        # 找到完整的會議名稱（通常在 cite 標籤中）
-                                        cite = conf_soup.find('cite', class_='data')
-                                        if cite:
-                                            # 找到 itemprop="name" 的標籤
-                                            full_name_tag = cite.find('span', itemprop='name')
-                                            if full_name_tag:
-                                                # 這是完整的會議名稱，例如 "46th Annual International Conference of the IEEE Engineering in Medicine and Biology Society, EMBC 2024, Orlando, FL, USA, July 15-19, 2024"
-                                                full_name = full_name_tag.get_text(strip=True)
-
-                                                # 解析日期（通常在最後）
-                                                # 格式: "Month Day-Day, Year" 或 "Month Day, Year"
-                                                date_match = re.search(r'([A-Z][a-z]+\s+\d+(?:-\d+)?,\s+\d{4})', full_name)
-                                                if date_match:
-                                                    date = date_match.group(1)
-
-                                                # 更新 venue 為完整名稱（移除地點和日期部分）
-                                                # 例如: "46th Annual International Conference of the IEEE Engineering in Medicine and Biology Society, EMBC 2024"
-                                                venue_parts = full_name.split(',')
-                                                if len(venue_parts) >= 2:
-                                                    # 取前兩部分作為 venue
-                                                    venue = ', '.join(venue_parts[:2]).strip()
-
-                                        # 如果還沒找到日期，嘗試在整個頁面中搜尋
-                                        if not date:
-                                            page_text = conf_soup.get_text()
-                                            date_match = re.search(r'((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d+(?:-\d+)?,\s+\d{4})', page_text)
-                                            if date_match:
-                                                date = date_match.group(1)
-                    except Exception as e:
-                        print(f"Warning: Failed to fetch conference details for {pub_id}: {e}")
-
-            # 建立出版物物件
-            pub = {
-                'id': pub_id,
-                'type': pub_type,
-                'authors': authors,
-                'title': title,
-                'venue': venue,
-                'year': year,
-                'highlight_author': 'Hsing-Kuo Pao'
-            }
-
-            # 根據類型添加額外欄位
-            if pub_type == 'journal':
-                pub['volume'] = volume
-                pub['pages'] = pages
-            elif pub_type == 'conference':
-                pub['location'] = location
-                pub['date'] = date
-
-            publications.append(pub)
-
-        return publications
-
-    except Exception as e:
-        print(f"Error crawling DBLP: {e}")
-        raise
-
-@app.route('/api/publications/crawl', methods=['POST'])
-def crawl_publications():
-    """爬取 DBLP 出版物"""
-    try:
-        # 載入現有資料
-        data = load_json('publications.json')
-        if not data:
-            data = {'publications': []}
-
-        # 爬取資料（傳入現有資料以避免重複抓取）
-        crawled_pubs = crawl_dblp(existing_pubs=data['publications'])
-
-        # 建立 ID 到索引的映射
-        existing_map = {pub['id']: i for i, pub in enumerate(data['publications'])}
+    return jsonify({'success': True, 'added': len(pubs), 'ids': [pub['id'] for pub in pubs],
+                    'duplicates': describe(duplicates, model.items)})
+
+@bp.route('/api/publications/export', methods=['GET'])
+def export_publications_file():
+    """以 BibTeX / CSV / NDJSON 匯出全部出版物（?format=，預設 ndjson），邊產生邊傳送"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': f"Unknown format, use one of: {', '.join(FORMATS)}"}), 400
+    data = view_json('publications.json')
+    if data is None:
+        return jsonify({'success': False, 'error': 'No data found'}), 500
+    # 唯讀的文件不會被之後的儲存修改（copy-on-write），傳送期間不需要持有鎖
+    mimetype, extension = FORMATS[fmt]
+    response = current_app.response_class(export_publications(fmt, data.get('publications', [])),
+                                          mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=publications.{extension}'
+    return response
+
+def run_crawl(job, full=False):
+    """背景執行 DBLP 爬蟲並合併到 publications.json，回傳統計結果
+
+    只處理上次爬取後新增或有變更的記錄（watermark 存在 DBLP_STATE_FILE）；
+    full=True 時檢查所有記錄。
+    """
+    # 爬取資料（傳入現有資料以避免重複抓取）；爬取期間不鎖定檔案
+    snapshot = view_json('publications.json')
+    state = CrawlState.load(current_app.config['DBLP_STATE_FILE'])
+    import crawler  # requests / BeautifulSoup 只在爬取時載入
+    crawled_pubs = crawler.crawl_dblp(dblp_cache(), existing_pubs=snapshot['publications'] if snapshot else [],
+                                      job=job, parser=current_app.config['DBLP_PARSER'], state=state, full=full,
+                                      max_workers=current_app.config['DBLP_FETCH_WORKERS'],
+                                      delay=current_app.config['DBLP_HOST_DELAY'])
+    job.check_cancelled()
+
+    with store.mutation('publications.json'):
+        # 重新載入現有資料，合併期間其他寫入不會被覆蓋
+        model = load_model('publications.json')
+        if model is None:
+            raise RuntimeError('No data found')
 
         # 統計
         added = 0
         updated = 0
         skipped = 0
+        duplicates = []
+
+        # 合併過的記錄以 aliases 記錄原本的爬蟲 ID；新資料與現有資料比對是否重複
+        aliases = alias_map(model.items)
+        duplicate_index = DuplicateIndex(model.items)
 
         # 處理爬取的資料
         for pub in crawled_pubs:
-            if pub['id'] in existing_map:
+            if pub['id'] in aliases:
+                # 已合併到其他記錄（通常是手動新增的），不再新增或覆蓋
+                skipped += 1
+                continue
+            existing_pub = model.get(pub['id'])
+            if existing_pub is not None:
                 # 已存在的資料
-                idx = existing_map[pub['id']]
-                existing_pub = data['publications'][idx]
 
                 # 檢查是否需要更新（針對 conference 沒有 location 的情況）
                 if pub['type'] == 'conference':
@@ -481,33 +1012,62 @@ def crawl_publications():
 
                     if needs_update:
                         # 更新資料
-                        data['publications'][idx] = pub
+                        model.replace(pub['id'], pub)
                         updated += 1
                     else:
                         skipped += 1
                 else:
                     skipped += 1
             else:
-                # 新資料，插入到最前面
-                data['publications'].insert(0, pub)
+                # 新資料，插入到最前面；與現有記錄相似時只回報，由使用者決定是否合併
+                duplicates.extend(duplicate_index.match(pub))
+                model.insert(0, pub)
                 added += 1
 
-        # 儲存
-        if save_json('publications.json', data):
-            return jsonify({
-                'success': True,
-                'added': added,
-                'updated': updated,
-                'skipped': skipped,
-                'total': len(crawled_pubs)
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Failed to save data'}), 500
+        job.update(added=added, updated=updated, skipped=skipped, duplicates=len(duplicates))
 
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        # 儲存
+        if not save_json('publications.json', model):
+            raise RuntimeError('Failed to save data')
+
+    # 合併成功後才更新 watermark，失敗時下次仍會重新處理
+    state.save()
+
+    return {
+        'added': added,
+        'updated': updated,
+        'skipped': skipped,
+        'unchanged': state.unchanged,
+        'changed': state.changed,
+        'duplicates': describe(duplicates, model.items),
+        'total': len(crawled_pubs)
+    }
 
-@app.route('/api/publications/sort', methods=['POST'])
+@bp.route('/api/publications/crawl', methods=['POST'])
+def crawl_publications():
+    """在背景爬取 DBLP 出版物，立即回傳 job ID"""
+    options = request.get_json(silent=True) or {}
+    job = jobs.submit('crawl', run_crawl, full=bool(options.get('full')))
+    return jsonify({'success': True, **job.to_dict()}), 202
+
+@bp.route('/api/publications/crawl/<job_id>', methods=['GET'])
+def crawl_status(job_id):
+    """查詢爬蟲 job 的進度"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@bp.route('/api/publications/crawl/<job_id>', methods=['DELETE'])
+def cancel_crawl(job_id):
+    """取消爬蟲 job"""
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@bp.route('/api/publications/sort', methods=['POST'])
+@locked('publications.json')
 def sort_publications():
     """重新排序出版物
     排序規則：
@@ -516,11 +1076,11 @@ def sort_publications():
     """
     try:
         # 載入現有資料
-        data = load_json('publications.json')
-        if not data or 'publications' not in data:
+        model = load_model('publications.json')
+        if model is None:
             return jsonify({'success': False, 'error': 'No data found'}), 404
 
-        publications = data['publications']
+        publications = model.items
 
         # 分類出版物
         manual_pubs = []  # 手動新增的 (jz, cz, bz)
@@ -553,10 +1113,10 @@ def sort_publications():
         sorted_pubs = manual_pubs + auto_pubs
 
         # 更新資料
-        data['publications'] = sorted_pubs
+        model.reorder(sorted_pubs)
 
         # 儲存
-        if save_json('publications.json', data):
+        if save_json('publications.json', model):
             return jsonify({'success': True, 'total': len(sorted_pubs)})
         else:
             return jsonify({'success': False, 'error': 'Failed to save data'}), 500
@@ -566,164 +1126,232 @@ def sort_publications():
 
 # ==================== Members ====================
 
-@app.route('/members')
+@bp.route('/members')
 def members():
     """成員管理頁面"""
-    data = load_json('members.json')
+    data = view_json('members.json')
     return render_template('members.html',
                          members=data.get('members', []) if data else [],
                          contact_person=data.get('contact_person', {}) if data else {},
                          lab_info=data.get('lab_info', {}) if data else {})
 
-@app.route('/api/members', methods=['GET'])
+@bp.route('/api/members', methods=['GET'])
 def get_members():
-    """獲取所有成員"""
-    data = load_json('members.json')
-    return jsonify(data)
+    """獲取成員（可篩選、排序、分頁，見 list_query.py）"""
+    return list_response('members.json')
 
-@app.route('/api/members', methods=['POST'])
+@bp.route('/api/members', methods=['POST'])
+@locked('members.json')
 def add_member():
     """新增成員"""
-    data = load_json('members.json')
-    new_member = request.json
+    model = load_model('members.json')
+    new_member = attach_photo_variants(request.json)
 
-    # 生成新 ID
-    existing_ids = [m['id'] for m in data['members']]
-    max_num = max([int(id[1:]) for id in existing_ids], default=0)
-    new_member['id'] = f"m{max_num + 1:03d}"
+    # 生成新 ID（由索引維護最大編號）
+    new_member['id'] = model.next_id('m', 3)
 
     # 找到同年份的第一個成員的位置
     new_year = new_member['year']
     insert_index = None
 
-    for i, member in enumerate(data['members']):
+    for i, member in enumerate(model.items):
         if member['year'] == new_year:
             insert_index = i
             break
 
     # 如果找到同年份的成員，插入到該位置；否則加到最後
     if insert_index is not None:
-        data['members'].insert(insert_index, new_member)
+        model.insert(insert_index, new_member)
     else:
-        data['members'].append(new_member)
+        model.append(new_member)
 
-    if save_json('members.json', data):
+    if save_json('members.json', model):
         return jsonify({'success': True, 'member': new_member})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/members/<member_id>', methods=['PUT'])
+@bp.route('/api/members/<member_id>', methods=['PUT'])
+@locked('members.json')
 def update_member(member_id):
     """更新成員"""
-    data = load_json('members.json')
-    updated_member = request.json
-
-    for i, member in enumerate(data['members']):
-        if member['id'] == member_id:
-            data['members'][i] = updated_member
-            if save_json('members.json', data):
-                return jsonify({'success': True, 'member': updated_member})
-            return jsonify({'success': False, 'error': 'Failed to save'}), 500
+    model = load_model('members.json')
+    updated_member = attach_photo_variants(request.json)
 
-    return jsonify({'success': False, 'error': 'Member not found'}), 404
+    existing = model.get(member_id)
+    if existing is None:
+        return jsonify({'success': False, 'error': 'Member not found'}), 404
+    conflict = version_conflict(existing)
+    if conflict:
+        return conflict
+    model.replace(member_id, updated_member)
 
-@app.route('/api/members/<member_id>', methods=['DELETE'])
+    if save_json('members.json', model):
+        return record_json('member', updated_member)
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
+
+@bp.route('/api/members/<member_id>', methods=['GET'])
+def get_member(member_id):
+    """獲取單筆成員（ETag 為記錄的版本）"""
+    member = find_record('members.json', member_id)
+    if member is None:
+        return jsonify({'success': False, 'error': 'Member not found'}), 404
+    return record_json('member', member)
+
+@bp.route('/api/members/<member_id>', methods=['PATCH'])
+@locked('members.json')
+def patch_member(member_id):
+    """部分更新成員（JSON Patch / Merge Patch）"""
+    return patch_record('members.json', 'member', member_id, prepare=attach_photo_variants)
+
+@bp.route('/api/members/move', methods=['POST'])
+@locked('members.json')
+def move_members():
+    """移動成員到另一筆之前 / 之後"""
+    return move_records('members.json')
+
+@bp.route('/api/members/<member_id>', methods=['DELETE'])
+@locked('members.json')
 def delete_member(member_id):
     """刪除成員"""
-    data = load_json('members.json')
+    model = load_model('members.json')
 
-    data['members'] = [m for m in data['members'] if m['id'] != member_id]
+    model.remove(member_id)
 
-    if save_json('members.json', data):
+    if save_json('members.json', model):
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/contact-person', methods=['PUT'])
+@bp.route('/api/contact-person', methods=['PUT'])
+@locked('members.json')
 def update_contact_person():
     """更新 Contact Person"""
-    data = load_json('members.json')
+    model = load_model('members.json')
     member_id = request.json.get('member_id')
 
     # 找到選中的成員
-    selected_member = None
-    for member in data['members']:
-        if member['id'] == member_id:
-            selected_member = member
-            break
+    selected_member = model.get(member_id)
 
     if not selected_member:
         return jsonify({'success': False, 'error': 'Member not found'}), 404
 
     # 更新 contact_person
-    data['contact_person'] = {
+    model.doc['contact_person'] = {
         'name': selected_member['name'],
         'email': selected_member.get('email', ''),
         'photo': selected_member['photo']
     }
+    if selected_member.get('photo_variants'):
+        model.doc['contact_person']['photo_variants'] = selected_member['photo_variants']
 
-    if save_json('members.json', data):
-        return jsonify({'success': True, 'contact_person': data['contact_person']})
+    if save_json('members.json', model):
+        return jsonify({'success': True, 'contact_person': model.doc['contact_person']})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
 # ==================== Events ====================
 
-@app.route('/events')
+@bp.route('/events')
 def events():
     """活動管理頁面"""
-    data = load_json('events.json')
+    data = view_json('events.json')
     return render_template('events.html', events=data.get('events', []) if data else [])
 
-@app.route('/api/events', methods=['GET'])
+@bp.route('/api/events', methods=['GET'])
 def get_events():
-    """獲取所有活動"""
-    data = load_json('events.json')
-    return jsonify(data)
+    """獲取活動（可篩選、排序、分頁，見 list_query.py）"""
+    return list_response('events.json')
 
-@app.route('/api/events', methods=['POST'])
+@bp.route('/api/events', methods=['POST'])
+@locked('events.json')
 def add_event():
     """新增活動"""
-    data = load_json('events.json')
-    new_event = request.json
+    model = load_model('events.json')
+    new_event = attach_photo_variants(request.json)
 
-    # 生成新 ID
-    existing_ids = [e['id'] for e in data['events']]
-    max_num = max([int(id[1:]) for id in existing_ids], default=0)
-    new_event['id'] = f"e{max_num + 1:03d}"
+    # 生成新 ID（由索引維護最大編號）
+    new_event['id'] = model.next_id('e', 3)
 
-    data['events'].append(new_event)
+    model.append(new_event)
 
-    if save_json('events.json', data):
+    if save_json('events.json', model):
         return jsonify({'success': True, 'event': new_event})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/events/<event_id>', methods=['PUT'])
+@bp.route('/api/events/<event_id>', methods=['PUT'])
+@locked('events.json')
 def update_event(event_id):
     """更新活動"""
-    data = load_json('events.json')
-    updated_event = request.json
-
-    for i, event in enumerate(data['events']):
-        if event['id'] == event_id:
-            data['events'][i] = updated_event
-            if save_json('events.json', data):
-                return jsonify({'success': True, 'event': updated_event})
-            return jsonify({'success': False, 'error': 'Failed to save'}), 500
-
-    return jsonify({'success': False, 'error': 'Event not found'}), 404
+    model = load_model('events.json')
+    updated_event = attach_photo_variants(request.json)
+
+    existing = model.get(event_id)
+    if existing is None:
+        return jsonify({'success': False, 'error': 'Event not found'}), 404
+    conflict = version_conflict(existing)
+    if conflict:
+        return conflict
+    model.replace(event_id, updated_event)
+
+    if save_json('events.json', model):
+        return record_json('event', updated_event)
+    return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
-@app.route('/api/events/<event_id>', methods=['DELETE'])
+@bp.route('/api/events/<event_id>', methods=['GET'])
+def get_event(event_id):
+    """獲取單筆活動（ETag 為記錄的版本）"""
+    event = find_record('events.json', event_id)
+    if event is None:
+        return jsonify({'success': False, 'error': 'Event not found'}), 404
+    return record_json('event', event)
+
+@bp.route('/api/events/<event_id>', methods=['PATCH'])
+@locked('events.json')
+def patch_event(event_id):
+    """部分更新活動（JSON Patch / Merge Patch）"""
+    return patch_record('events.json', 'event', event_id, prepare=attach_photo_variants)
+
+@bp.route('/api/events/move', methods=['POST'])
+@locked('events.json')
+def move_events():
+    """移動活動到另一筆之前 / 之後"""
+    return move_records('events.json')
+
+@bp.route('/api/events/<event_id>', methods=['DELETE'])
+@locked('events.json')
 def delete_event(event_id):
     """刪除活動"""
-    data = load_json('events.json')
+    model = load_model('events.json')
 
-    data['events'] = [e for e in data['events'] if e['id'] != event_id]
+    model.remove(event_id)
 
-    if save_json('events.json', data):
+    if save_json('events.json', model):
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Failed to save'}), 500
 
 # ==================== File Upload ====================
 
-@app.route('/upload', methods=['POST'])
+def record_asset(stored, original_name):
+    """在 assets.json 記錄上傳檔案的原始檔名（相同內容合併為一筆）"""
+    with store.mutation('assets.json'):
+        model = load_model('assets.json')
+        if model is None:
+            return False
+        record = model.get(stored.path)
+        if record is None:
+            model.append(asset_record(stored, original_name, datetime.now().isoformat(timespec='seconds')))
+        elif original_name in record['original_names']:
+            return True
+        else:
+            model.replace(stored.path, dict(record, original_names=record['original_names'] + [original_name]))
+        return save_json('assets.json', model)
+
+def process_image(job, relative_path):
+    """背景產生照片的縮圖，並更新引用此照片的成員 / 活動"""
+    asset_dir = current_app.config['UPLOAD_FOLDER']
+    variants = image_variants.generate_variants(asset_dir, relative_path)
+    job.update(variants=sum(len(paths) for paths in variants.values()))
+    job.update(records_updated=image_variants.record_variants(store, asset_dir, save_json, photos={relative_path}))
+    return variants
+
+@bp.route('/upload', methods=['POST'])
 def upload_file():
     """上傳文件"""
     if 'file' not in request.files:
@@ -736,24 +1364,74 @@ def upload_file():
         return jsonify({'success': False, 'error': 'No selected file'}), 400
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-
         # 根據類型決定儲存路徑
-        if upload_type == 'member':
-            save_path = os.path.join(app.config['UPLOAD_FOLDER'], 'member', filename)
-        elif upload_type == 'event':
-            save_path = os.path.join(app.config['UPLOAD_FOLDER'], 'event', filename)
-        else:
-            save_path = os.path.join(app.config['UPLOAD_FOLDER'], 'general', filename)
+        folder = upload_type if upload_type in ('member', 'event') else 'general'
 
-        file.save(save_path)
+        # 以內容雜湊為檔名，相同內容只存一份
+        stored = store_stream(file.stream, current_app.config['UPLOAD_FOLDER'], folder, file.filename)
+        record_asset(stored, os.path.basename(file.filename.replace('\\', '/')))
 
-        # 返回相對路徑
-        relative_path = f"asset/{upload_type}/{filename}"
-        return jsonify({'success': True, 'path': relative_path})
+        # 返回相對路徑；縮圖在背景產生，完成後寫入引用此照片的記錄
+        result = {'success': True, 'path': stored.path, 'deduplicated': not stored.created}
+        if current_app.config['IMAGE_VARIANTS'] and image_variants.available():
+            job = image_jobs.submit(f'images:{stored.path}', process_image, stored.path)
+            result['variants_job'] = job.id
+        return jsonify(result)
 
     return jsonify({'success': False, 'error': 'Invalid file type'}), 400
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5000, host='0.0.0.0')
+# 啟動時預先載入的 dataset
+WARMUP_DATASETS = ('publications.json', 'members.json', 'events.json', 'assets.json')
+
+def warmup():
+    """預先解析 dataset 並建立 API 回應、列表索引與搜尋索引，回傳 {dataset: 秒數}"""
+    timings = {}
+    for filename in WARMUP_DATASETS:
+        start = time.perf_counter()
+        data = view_json(filename)
+        if data is None:
+            continue
+        json_payload(filename)
+        key = os.path.splitext(filename)[0]
+        queries.index(filename, data.get(key, []))
+        sync_search(filename)
+        timings[filename] = round(time.perf_counter() - start, 4)
+    return timings
+
+def create_app(config=None, preload=False):
+    """建立設定好的 admin app（供 WSGI server 與測試使用）
+
+    設定依序為 DefaultConfig、環境變數與 config；資料存取後端、快取、背景工作與變更推送
+    依設定為每個 app 各建立一份。preload=True 時先載入 dataset（見 warmup()）。例如：
+
+        gunicorn 'app:create_app(preload=True)'
+    """
+    app = Flask(__name__, static_url_path='/static')
+    app.config.from_object(DefaultConfig)
+    # 以環境變數覆寫設定：ADMIN_<設定名稱>，值以 JSON 解析（例如 ADMIN_STORAGE_BACKEND=sqlite、ADMIN_DBLP_OFFLINE=true）
+    app.config.from_prefixed_env('ADMIN')
+    if config:
+        app.config.update(config)
+    # 靜態文件路徑指向網站根目錄
+    app.static_folder = app.config['SITE_DIR']
+    if not app.config['UPLOAD_FOLDER']:
+        app.config['UPLOAD_FOLDER'] = os.path.join(app.config['SITE_DIR'], 'asset')
+
+    app.extensions['admin'] = Services(app)
+    app.register_blueprint(bp)
+    before_render_template.connect(start_template_timer, app)
+    template_rendered.connect(record_template_time, app)
+
+    with app.app_context():
+        if app.config['JOURNAL']:
+            recover_datasets()
+        if preload:
+            warmup()
+    return app
 
+if __name__ == '__main__':
+    app = create_app()
+    if app.config['WARMUP']:
+        with app.app_context():
+            warmup()
+    app.run(debug=app.config['SERVER_DEBUG'], port=app.config['SERVER_PORT'], host=app.config['SERVER_HOST'])
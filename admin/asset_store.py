@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset Store - 以內容雜湊儲存上傳的檔案
+
+上傳的檔案在寫入磁碟時同時計算 SHA-256，以雜湊作為檔名：
+
+    asset/member/3f2a9c1b7d4e5f60.jpg
+
+內容相同的檔案只存一份，重新上傳不會覆蓋其他記錄引用的照片；
+內容不會改變，因此可以使用永久快取。原始檔名記錄在 dataset/assets.json。
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+# 檔名使用的雜湊長度（hex 字元數）
+HASH_LENGTH = 16
+CHUNK_SIZE = 64 * 1024
+
+# 以內容雜湊命名的檔案（含 image_variants 產生的縮圖，例如 3f2a9c1b7d4e5f60.320w.webp）
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{%d}(?:\.\d+w)?\.[a-z0-9]+$' % HASH_LENGTH)
+
+# 儲存結果：相對於網站根目錄的路徑、完整雜湊、大小、是否為新檔案
+StoredAsset = namedtuple('StoredAsset', ['path', 'sha256', 'size', 'created'])
+
+
+def is_content_addressed(filename):
+    """檔名是否為內容雜湊（內容永遠不會改變）"""
+    return bool(CONTENT_NAME_RE.match(os.path.basename(filename)))
+
+
+def extension_of(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def store_stream(stream, asset_dir, folder, original_name):
+    """將上傳的內容寫入 asset_dir/folder，回傳 StoredAsset
+
+    邊讀取邊計算雜湊，寫完後 rename 為雜湊檔名；已有相同內容時捨棄暫存檔。
+    """
+    target_dir = os.path.join(asset_dir, folder)
+    os.makedirs(target_dir, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix='.upload.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        digest = hasher.hexdigest()
+        filename = digest[:HASH_LENGTH]
+        ext = extension_of(original_name)
+        if ext:
+            filename += '.' + ext
+        final_path = os.path.join(target_dir, filename)
+
+        created = not os.path.exists(final_path)
+        if created:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, final_path)
+        else:
+            os.unlink(tmp_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return StoredAsset(f"asset/{folder}/{filename}", digest, size, created)
+
+
+def asset_record(stored, original_name, uploaded_at):
+    """dataset/assets.json 中的記錄"""
+    return {
+        'id': stored.path,
+        'sha256': stored.sha256,
+        'size': stored.size,
+        'original_names': [original_name],
+        'uploaded_at': uploaded_at,
+    }
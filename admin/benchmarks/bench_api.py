@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Admin API 的負載測試：以放大 1x / 10x / 100x / 1000x 的合成 dataset 測量各 route 的吞吐量與延遲
+
+    python3 admin/benchmarks/bench_api.py [--scales 1,10,100,1000] [--requests 200] [--seconds 5]
+    python3 admin/benchmarks/bench_api.py --server --clients 8
+    python3 admin/benchmarks/bench_api.py --save-baseline
+    python3 admin/benchmarks/bench_api.py --check [--tolerance 0.3]
+
+每個 scale 在暫存目錄中的網站複本上、以獨立的 process 執行，不會修改 dataset/。
+預設使用 Flask test client；--server 改為啟動真正的 WSGI server（threaded），由 --clients 個 thread 同時送出請求。
+每個 route 執行 --requests 次或 --seconds 秒（先到者為準），回報 req/s 與 p50 / p99 延遲。
+
+結果存到 admin/benchmarks/results/<時間>-<commit>.json，可以用 --compare 比較兩次結果；
+--check 與 api_baseline.json 比較，任一 route 的 p50 增加超過 tolerance 時回傳非 0。
+results 與 baseline 與機器有關，因此不納入版本控制。
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_DIR = os.path.dirname(BENCH_DIR)
+BASE_DIR = os.path.dirname(ADMIN_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'api_baseline.json')
+
+DATASETS = ('publications', 'members', 'events')
+PAGES = ('professor/index.html', 'laboratory/index.html', 'events/index.html')
+ID_PATTERN = re.compile(r'^(\D+)(\d+)$')
+
+
+# ==================== 合成資料 ====================
+
+def scale_dataset(doc, key, scale):
+    """把 doc[key] 放大 scale 倍：複本的 id 依前綴接續編號，標題加上編號以免被視為重複"""
+    records = doc.get(key, [])
+    max_num = {}
+    for record in records:
+        match = ID_PATTERN.match(record.get('id', ''))
+        if match:
+            max_num[match.group(1)] = max(max_num.get(match.group(1), 0), int(match.group(2)))
+
+    scaled = list(records)
+    for copy in range(1, scale):
+        for record in records:
+            record = dict(record)
+            match = ID_PATTERN.match(record.get('id', ''))
+            if match:
+                prefix, num = match.group(1), int(match.group(2))
+                width = len(match.group(2))
+                record['id'] = f'{prefix}{num + copy * max_num[prefix]:0{width}d}'
+            for field in ('title', 'name'):
+                if record.get(field):
+                    record[field] = f'{record[field]} #{copy}'
+            scaled.append(record)
+    return dict(doc, **{key: scaled})
+
+
+def build_site(root, scale):
+    """在 root 建立網站複本（admin、頁面與放大後的 dataset）"""
+    shutil.copytree(ADMIN_DIR, os.path.join(root, 'admin'),
+                    ignore=shutil.ignore_patterns('__pycache__', 'benchmarks', 'fixtures'))
+    for page in PAGES:
+        os.makedirs(os.path.dirname(os.path.join(root, page)), exist_ok=True)
+        shutil.copy(os.path.join(BASE_DIR, page), os.path.join(root, page))
+    # 照片只讀取，不需要複製
+    os.symlink(os.path.join(BASE_DIR, 'asset'), os.path.join(root, 'asset'))
+
+    os.makedirs(os.path.join(root, 'dataset'))
+    sizes = {}
+    for name in DATASETS:
+        with open(os.path.join(BASE_DIR, 'dataset', f'{name}.json'), 'r', encoding='utf-8') as f:
+            doc = scale_dataset(json.load(f), name, scale)
+        with open(os.path.join(root, 'dataset', f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        sizes[name] = len(doc[name])
+    return sizes
+
+
+# ==================== Workloads ====================
+
+class Workload:
+    """一組 route 的請求；state 在 route 之間共用（例如新增後再刪除的 id）"""
+
+    def __init__(self, ids, rng):
+        self.ids = ids
+        self.rng = rng
+        self.added = []
+        self.lock = threading.Lock()
+
+    def pick(self, name):
+        return self.rng.choice(self.ids[name])
+
+    def routes(self):
+        """[(名稱, 是否寫入, request 產生函式)]；request 產生函式回傳 (method, path, json)"""
+        def add():
+            return 'POST', '/api/publications', {
+                'type': 'journal', 'authors': 'Bench Author and H.-K. Pao', 'highlight_author': 'H.-K. Pao',
+                'title': f'Benchmark publication {self.rng.random()}', 'venue': 'Bench', 'year': 2025}
+
+        def delete():
+            with self.lock:
+                pub_id = self.added.pop() if self.added else None
+            return 'DELETE', f'/api/publications/{pub_id or self.pick("publications")}', None
+
+        def update():
+            pub_id = self.pick('publications')
+            return 'PATCH', f'/api/publications/{pub_id}', {'note': f'bench {self.rng.random():.6f}'}
+
+        def move():
+            pub_id, anchor = self.rng.sample(self.ids['publications'], 2)
+            return 'POST', '/api/publications/move', {'id': pub_id, 'before': anchor}
+
+        def reorder():
+            order = list(self.ids['publications'])
+            self.rng.shuffle(order)
+            return 'POST', '/api/publications/reorder', {'order': order}
+
+        return [
+            ('GET /api/publications', False, lambda: ('GET', '/api/publications', None)),
+            ('GET /api/publications?query', False,
+             lambda: ('GET', '/api/publications?type=conference&sort=-year&limit=20', None)),
+            ('GET /api/publications/<id>', False, lambda: ('GET', f'/api/publications/{self.pick("publications")}', None)),
+            ('GET /api/members', False, lambda: ('GET', '/api/members', None)),
+            ('GET /api/events', False, lambda: ('GET', '/api/events', None)),
+            ('GET /api/search', False, lambda: ('GET', '/api/search?q=learning&limit=20', None)),
+            ('GET /publications', False, lambda: ('GET', '/publications', None)),
+            ('POST /api/publications', True, add),
+            ('PATCH /api/publications/<id>', True, update),
+            ('POST /api/publications/move', True, move),
+            ('POST /api/publications/reorder', True, reorder),
+            ('POST /api/publications/sort', True, lambda: ('POST', '/api/publications/sort', None)),
+            ('DELETE /api/publications/<id>', True, delete),
+        ]
+
+
+def percentile(sorted_values, fraction):
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_route(send, make_request, workload, requests, seconds, clients):
+    """以 clients 個 thread 送出請求，直到 requests 次或 seconds 秒"""
+    latencies = []
+    errors = [0]
+    remaining = [requests]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] <= 0 or time.perf_counter() > deadline:
+                    return
+                remaining[0] -= 1
+            method, path, body = make_request()
+            start = time.perf_counter()
+            status, payload = send(method, path, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors[0] += 1
+            if method == 'POST' and path == '/api/publications' and payload:
+                with workload.lock:
+                    workload.added.append(payload['publication']['id'])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'count': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+    }
+
+
+def test_client_sender(app):
+    client = app.test_client()
+
+    def send(method, path, body):
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True) if method == 'POST' else None
+    return send, lambda: None
+
+
+def server_sender(app):
+    """在背景 thread 啟動 werkzeug server，以 requests 送出請求（每個 thread 一個 Session）"""
+    import logging
+    import requests
+    from werkzeug.serving import make_server
+
+    # 不印出每個請求的 access log
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    local = threading.local()
+
+    def send(method, path, body):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        response = session.request(method, base_url + path, json=body)
+        payload = response.json() if method == 'POST' and response.ok else None
+        return response.status_code, payload
+    return send, server.shutdown
+
+
+def worker(args):
+    """在網站複本中執行（由主程式以 subprocess 呼叫）"""
+    sys.path.insert(0, os.path.join(args.root, 'admin'))
+    import app as admin_app  # noqa: E402
+
+    app = admin_app.create_app({'STATIC_EXPORT': not args.no_export, 'DBLP_OFFLINE': True})
+
+    with app.app_context():
+        ids = {name: [record['id'] for record in admin_app.view_json(f'{name}.json')[name]] for name in DATASETS}
+    workload = Workload(ids, random.Random(args.seed))
+    send, shutdown = server_sender(app) if args.server else test_client_sender(app)
+
+    routes = {}
+    try:
+        for name, _, make_request in workload.routes():
+            # 暖身：第一次請求包含解析與建立索引
+            send(*make_request())
+            routes[name] = run_route(send, make_request, workload, args.requests, args.seconds,
+                                     args.clients if args.server else 1)
+    finally:
+        shutdown()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(routes, f)
+    return 0
+
+
+# ==================== 結果 ====================
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_scale(scale, sizes, routes):
+    print(f"\n{scale}x  ({', '.join(f'{name} {count:,}' for name, count in sizes.items())})")
+    print(f"{'route':<34} {'requests':>8} {'errors':>6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, result in routes.items():
+        p50 = f"{result['p50_ms']:.2f}" if result['p50_ms'] is not None else '-'
+        p99 = f"{result['p99_ms']:.2f}" if result['p99_ms'] is not None else '-'
+        print(f"{name:<34} {result['count']:>8} {result['errors']:>6} {result['rps']:>10,.1f} {p50:>10} {p99:>10}")
+
+
+def compare(results, baseline, tolerance):
+    """回傳 p50 比 baseline 慢超過 tolerance 的 route"""
+    regressions = []
+    for scale, current in results['scales'].items():
+        base = baseline.get('scales', {}).get(scale)
+        if not base:
+            continue
+        for name, result in current['routes'].items():
+            base_result = base['routes'].get(name)
+            if not base_result or result['p50_ms'] is None or not base_result.get('p50_ms'):
+                continue
+            if result['p50_ms'] > base_result['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{scale}x {name}: p50 {result['p50_ms']:.2f} ms "
+                                   f"(baseline {base_result['p50_ms']:.2f} ms)")
+    return regressions
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1,10,100,1000', help='dataset 放大倍數（逗號分隔）')
+    parser.add_argument('--requests', type=int, default=200, help='每個 route 的請求數上限')
+    parser.add_argument('--seconds', type=float, default=5.0, help='每個 route 的時間上限（秒）')
+    parser.add_argument('--server', action='store_true', help='啟動 WSGI server，以並行的 client 測試')
+    parser.add_argument('--clients', type=int, default=8, help='--server 時同時送出請求的 thread 數')
+    parser.add_argument('--no-export', action='store_true', help='儲存後不產生靜態 bundle 與頁面')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save-baseline', action='store_true', help='把結果存為 baseline')
+    parser.add_argument('--check', action='store_true', help='與 baseline 比較，退步時回傳非 0')
+    parser.add_argument('--compare', metavar='RESULTS', help='與先前存下的結果檔比較')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='允許的 p50 增加比例')
+    # 內部使用：在網站複本中執行單一 scale
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    results = {
+        'commit': git_commit(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'mode': f'server ({args.clients} clients)' if args.server else 'test client',
+        'export': not args.no_export,
+        'scales': {},
+    }
+    for scale in [int(value) for value in args.scales.split(',') if value]:
+        with tempfile.TemporaryDirectory(prefix=f'bench-{scale}x-') as root:
+            sizes = build_site(root, scale)
+            output = os.path.join(root, 'result.json')
+            command = [sys.executable, os.path.abspath(__file__), '--worker', '--root', root, '--output', output,
+                       '--requests', str(args.requests), '--seconds', str(args.seconds),
+                       '--clients', str(args.clients), '--seed', str(args.seed)]
+            command += ['--server'] if args.server else []
+            command += ['--no-export'] if args.no_export else []
+            # admin 印出的訊息不影響結果
+            completed = subprocess.run(command, stdout=subprocess.DEVNULL)
+            if completed.returncode != 0:
+                print(f"{scale}x failed (exit {completed.returncode})")
+                return 1
+            routes = load_results(output)
+        results['scales'][str(scale)] = {'sizes': sizes, 'routes': routes}
+        print_scale(scale, sizes, routes)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{results['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults saved to {path}")
+
+    if args.save_baseline:
+        shutil.copy(path, BASELINE_PATH)
+        print(f"baseline saved to {BASELINE_PATH}")
+
+    targets = []
+    if args.compare:
+        targets.append((args.compare, load_results(args.compare)))
+    if args.check:
+        try:
+            targets.append((BASELINE_PATH, load_results(BASELINE_PATH)))
+        except FileNotFoundError:
+            print("no baseline, run with --save-baseline first")
+            return 1
+
+    status = 0
+    for name, baseline in targets:
+        print(f"\ncompared with {os.path.basename(name)} (commit {baseline.get('commit', '?')})")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            status = 1
+        else:
+            print("no regressions")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Admin 啟動時間：import app、create_app()、warmup() 與第一個請求各花多少時間
+
+    python3 admin/benchmarks/bench_startup.py [--runs 5]
+    python3 admin/benchmarks/bench_startup.py --save-baseline
+    python3 admin/benchmarks/bench_startup.py --check [--tolerance 0.3]
+
+每次都在新的 process 中執行（模組沒有被快取），取中位數。
+爬蟲與縮圖才需要的套件（requests、BeautifulSoup、Pillow）在 import app 之後不應該被載入，
+有載入時 --check 失敗；--check 也會與 startup_baseline.json 比較，任一階段增加超過 tolerance 時回傳非 0。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, 'startup_baseline.json')
+
+# 只有爬蟲 / 縮圖 / SQLite 後端使用的套件
+LAZY_MODULES = ('requests', 'bs4', 'lxml', 'PIL', 'sqlite3')
+
+# 差距小於此值（ms）時不視為退步，避免量測誤差
+MIN_DELTA_MS = 5
+
+STAGES = ('process_ms', 'import_ms', 'create_app_ms', 'warmup_ms', 'first_request_ms')
+
+
+def worker():
+    """在新的 process 中量測（由主程式以 subprocess 呼叫），結果以 JSON 印到 stdout"""
+    started = time.perf_counter()
+    sys.path.insert(0, ADMIN_DIR)
+    import app as admin_app  # noqa: E402
+    imported = time.perf_counter()
+    loaded = sorted(name for name in LAZY_MODULES if name in sys.modules)
+
+    app = admin_app.create_app()
+    created = time.perf_counter()
+    with app.app_context():
+        admin_app.warmup()
+    warmed = time.perf_counter()
+    status = app.test_client().get('/api/publications').status_code
+    finished = time.perf_counter()
+
+    return {
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'warmup_ms': (warmed - created) * 1000,
+        'first_request_ms': (finished - warmed) * 1000,
+        'first_request_status': status,
+        'lazy_modules_loaded': loaded,
+    }
+
+
+def run_once():
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker'],
+                               capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'worker failed')
+    # admin 啟動時印出的訊息在前面，結果在最後一行
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = elapsed
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='執行次數（取中位數）')
+    parser.add_argument('--save-baseline', action='store_true', help='把結果存為 baseline')
+    parser.add_argument('--check', action='store_true', help='與 baseline 比較，退步時回傳非 0')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='允許的增加比例')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker()))
+        return 0
+
+    runs = [run_once() for _ in range(args.runs)]
+    results = {stage: round(statistics.median(run[stage] for run in runs), 2) for stage in STAGES}
+    loaded = sorted(set(name for run in runs for name in run['lazy_modules_loaded']))
+
+    print(f"{'stage':<18} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for stage in STAGES:
+        values = [run[stage] for run in runs]
+        print(f"{stage:<18} {results[stage]:>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+    print(f"first request status: {runs[-1]['first_request_status']}")
+    print(f"lazy modules loaded by import app: {', '.join(loaded) or 'none'}")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {BASELINE_PATH}")
+
+    if not args.check:
+        return 0
+
+    status = 0
+    if loaded:
+        print(f"FAIL import app loads {', '.join(loaded)}")
+        status = 1
+    try:
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("no baseline, run with --save-baseline first")
+        return 1
+    for stage in STAGES:
+        base = baseline.get(stage)
+        if base and results[stage] > base * (1 + args.tolerance) and results[stage] - base > MIN_DELTA_MS:
+            print(f"REGRESSION {stage}: {results[stage]:.1f} ms (baseline {base:.1f} ms)")
+            status = 1
+    if status == 0:
+        print("no regressions")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
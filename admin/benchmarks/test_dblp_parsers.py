@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+DBLP 各解析器的速度（pytest-benchmark）
+
+使用 admin/fixtures/dblp 中的個人頁面，每個解析器一個 benchmark，
+並確認結果與 expected.json 相同（變快但解析錯誤也算退步）。
+
+    python -m pytest admin/benchmarks --benchmark-autosave
+    python -m pytest admin/benchmarks --benchmark-compare --benchmark-compare-fail=median:30%
+
+第二行與上次存下的結果（.benchmarks/，與機器有關，不納入版本控制）比較，
+任一解析器的 median 變慢超過 30% 時失敗。entries/s 記錄在每個 benchmark 的 extra_info。
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADMIN_DIR not in sys.path:
+    sys.path.insert(0, ADMIN_DIR)
+
+import dblp_parser  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ADMIN_DIR, 'fixtures', 'dblp')
+PERSON_PATH = os.path.join(FIXTURE_DIR, 'dblp.org', 'pid', 'p', 'HsingKuoKennethPao')
+
+
+@pytest.fixture(scope='module')
+def fixture():
+    with open(PERSON_PATH + '.html', 'r', encoding='utf-8') as f:
+        html_text = f.read()
+    with open(PERSON_PATH + '.xml', 'rb') as f:
+        xml_content = f.read()
+    with open(os.path.join(FIXTURE_DIR, 'expected.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    return html_text, xml_content, expected
+
+
+def accuracy(entries, expected):
+    """與 expected.json 相同的欄位比例"""
+    parsed = {entry.pub['id']: dict(entry.pub, conf_url=entry.conf_url) for entry in entries}
+    correct = total = 0
+    for item in expected:
+        got = parsed.get(item['id'], {})
+        for field, value in item.items():
+            total += 1
+            correct += got.get(field) == value
+    return correct / total
+
+
+@pytest.mark.parametrize('name', dblp_parser.available_parsers())
+def test_parser_throughput(benchmark, fixture, name):
+    html_text, xml_content, expected = fixture
+    _, parse, wants_text = dblp_parser.PARSERS[name]
+    content = html_text if wants_text else xml_content
+
+    benchmark.group = 'dblp person page'
+    entries = benchmark(parse, content)
+
+    benchmark.extra_info['entries'] = len(entries)
+    benchmark.extra_info['entries_per_sec'] = round(len(entries) / benchmark.stats.stats.median)
+    assert accuracy(entries, expected) == 1.0
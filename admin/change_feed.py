@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Change Feed - 把每次儲存的記錄變更推送給瀏覽器（Server-Sent Events，GET /api/changes）
+
+每次儲存後比較前後內容，每筆有變更的記錄產生一個事件：
+
+    id: 3f9c2a1b-42
+    event: change
+    data: {"dataset": "publications", "type": "update", "id": "jz4", "position": 3,
+           "version": "<record_version>", "record": {...}}
+
+type 為 add / update（帶 record 與 version）、delete、reorder（帶完整的 order），
+以及列表以外的欄位有變更時的 fields（例如 members.json 的 contact_person）。
+套用順序：delete → update → add（依 position 由小到大插入）→ reorder。
+
+最近的事件保留在記憶體中，斷線重連時瀏覽器會帶 Last-Event-ID，補送之後的事件；
+已經不在記憶體中（或 admin 重新啟動過）時送出 reset，用戶端應重新載入整個列表。
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+
+from dataset_store import thaw
+from record_patch import record_version
+
+# 保留的事件數（斷線重連時可以補送的範圍）
+HISTORY = 1000
+
+# 沒有事件時送出註解的間隔（秒），避免連線被 proxy 關閉
+HEARTBEAT = 15.0
+
+# 斷線後瀏覽器重新連線的間隔（毫秒）
+RETRY_MS = 3000
+
+
+def record_events(key, old, new):
+    """比較儲存前後的文件，回傳事件（不含 dataset 與序號）
+
+    copy-on-write 下沒有修改的記錄是同一個物件，不需要逐筆比較內容。
+    """
+    old = old or {}
+    old_items, new_items = old.get(key, []), new.get(key, [])
+    old_by_id = {record.get('id'): record for record in old_items}
+    new_ids = set(record.get('id') for record in new_items)
+
+    events = [{'type': 'delete', 'id': record_id} for record_id in old_by_id if record_id not in new_ids]
+    for pos, record in enumerate(new_items):
+        previous = old_by_id.get(record.get('id'), None)
+        if previous is not None and (previous is record or previous == record):
+            continue
+        events.append({'type': 'add' if previous is None else 'update', 'id': record.get('id'), 'position': pos,
+                       'version': record_version(record), 'record': thaw(record)})
+    events.sort(key=lambda event: ('delete', 'update', 'add').index(event['type']))
+
+    # 刪除與新增以外，留下的記錄之間的順序有變更（排序、移動）
+    kept_old = [record.get('id') for record in old_items if record.get('id') in new_ids]
+    kept_new = [record.get('id') for record in new_items if record.get('id') in old_by_id]
+    if kept_old != kept_new:
+        events.append({'type': 'reorder', 'order': [record.get('id') for record in new_items]})
+
+    fields = {field: thaw(value) for field, value in new.items()
+              if field != key and old.get(field) != value}
+    fields.update({field: None for field in old if field != key and field not in new})
+    if fields:
+        events.append({'type': 'fields', 'fields': fields})
+    return events
+
+
+def format_event(event_id, name, data):
+    """一則 SSE 訊息"""
+    lines = [f'id: {event_id}'] if event_id else []
+    lines.append(f'event: {name}')
+    lines += [f'data: {line}' for line in json.dumps(data, ensure_ascii=False).split('\n')]
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChangeFeed:
+    """記憶體中的事件序列，供多個 SSE 連線讀取
+
+    事件 id 為 <epoch>-<序號>；epoch 每次啟動不同，重新啟動前的 Last-Event-ID 會收到 reset。
+    """
+
+    def __init__(self, history=HISTORY):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=history)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.clients = 0
+
+    def publish(self, dataset, events):
+        """加入事件並喚醒等待中的連線，回傳最後一個事件的序號"""
+        with self._cond:
+            for event in events:
+                self._seq += 1
+                self._events.append((self._seq, dict(event, dataset=dataset)))
+            if events:
+                self._cond.notify_all()
+            return self._seq
+
+    def _parse(self, last_event_id):
+        """Last-Event-ID -> 序號；無法補送時回傳 None"""
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def wait(self, after, timeout):
+        """回傳 (序號 > after 的事件, 是否有事件已經不在記憶體中)；沒有新事件時最多等待 timeout 秒"""
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            missed = bool(self._events) and self._events[0][0] > after + 1 and self._seq > after
+            return [(seq, event) for seq, event in self._events if seq > after], missed
+
+    def stream(self, last_event_id=None, datasets=None, heartbeat=HEARTBEAT):
+        """SSE 回應內容的 generator（連線關閉時由 WSGI server 結束）
+
+        沒有 Last-Event-ID 時只送出之後的事件；datasets 指定時只送出這些 dataset 的事件。
+        """
+        with self._cond:
+            current = self._seq
+            self.clients += 1
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            after = self._parse(last_event_id) if last_event_id else current
+            if after is None or after > current:
+                after = current
+                yield format_event(f'{self.epoch}-{after}', 'reset', {})
+            else:
+                yield format_event(f'{self.epoch}-{after}', 'ready', {})
+
+            while True:
+                events, missed = self.wait(after, heartbeat)
+                if missed:
+                    after = events[-1][0]
+                    yield format_event(f'{self.epoch}-{after}', 'reset', {})
+                    continue
+                if not events:
+                    yield ': keepalive\n\n'
+                    continue
+                for seq, event in events:
+                    after = seq
+                    if datasets and event['dataset'] not in datasets:
+                        continue
+                    yield format_event(f'{self.epoch}-{seq}', 'change', event)
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def stats(self):
+        with self._cond:
+            return {'seq': self._seq, 'buffered': len(self._events), 'clients': self.clients}
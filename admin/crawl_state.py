@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawl State - DBLP 爬蟲的 watermark
+
+記錄上次爬取時每筆 DBLP 記錄（以 DBLP key 識別）的 ID 與內容雜湊。
+DBLP 的記錄由新到舊排列，因此遇到第一筆已知且未變更的記錄時就可以停止，
+例行爬取的工作量只和新論文的數量有關。
+"""
+
+import json
+import os
+import time
+
+from dataset_store import write_json_atomic
+
+
+class CrawlState:
+    """上次爬取的 watermark"""
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.parser = data.get('parser')
+        self.entries = data.get('entries', {})   # DBLP key -> {'id', 'hash'}
+        self.crawled_at = data.get('crawled_at')
+        self.changed = []                        # 本次爬取發現上游有變更的 ID
+        self.unchanged = 0
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(path, json.load(f))
+        except FileNotFoundError:
+            return cls(path)
+        except ValueError as e:
+            print(f"Warning: Ignoring invalid crawl state {path}: {e}")
+            return cls(path)
+
+    def visitor(self, parser, existing_pubs=(), full=False):
+        """建立給 dblp_parser 的解析器使用的 visit 函式
+
+        Args:
+            parser: 本次使用的解析器；與上次不同時雜湊無法比較，視為第一次爬取
+            existing_pubs: 現有的出版物；上次爬取過、缺少 location 的 conference 一定會重新解析
+                （手動新增的記錄不在 DBLP 頁面上，不影響提前停止）
+            full: True 時不提前停止，檢查所有記錄是否有變更
+        """
+        known = self.entries if parser == self.parser else {}
+        known_ids = {entry['id'] for entry in known.values()}
+        needs_location = {pub['id'] for pub in existing_pubs
+                          if pub.get('type') == 'conference' and not pub.get('location') and pub['id'] in known_ids}
+        self.parser = parser
+        self.changed = []
+        self.unchanged = 0
+
+        def visit(key, digest):
+            previous = known.get(key)
+            if previous is None:
+                return 'parse'
+            if previous['hash'] != digest:
+                self.changed.append(previous['id'])
+                return 'parse'
+            if previous['id'] in needs_location:
+                needs_location.discard(previous['id'])
+                return 'parse'
+            self.unchanged += 1
+            # 還有缺少 location 的 conference 尚未處理時不能停止
+            return 'skip' if full or needs_location else 'stop'
+
+        return visit
+
+    def record(self, entries):
+        """記錄本次解析的記錄"""
+        for entry in entries:
+            self.entries[entry.key] = {'id': entry.pub['id'], 'hash': entry.digest}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.crawled_at = time.time()
+        write_json_atomic(self.path, {
+            'parser': self.parser,
+            'crawled_at': self.crawled_at,
+            'entries': self.entries,
+        })
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crawler - 從 DBLP 爬取出版物
+
+requests、BeautifulSoup（以及 lxml）只有爬蟲需要，app.py 在第一次爬取時才 import 此模組，
+啟動 admin 與其他 route 不需要載入這些套件。合併到 publications.json 的邏輯在 app.run_crawl()。
+"""
+
+from dblp_parser import PARSERS, parse_conference_html, resolve_parser
+from fetcher import fetch_many
+from jobs import JobCancelled
+
+# DBLP 個人頁面（加上 .html 或 .xml）
+DBLP_PERSON_URL = "https://dblp.org/pid/p/HsingKuoKennethPao"
+
+
+def fetch_conference_details(conf_url, http):
+    """抓取 conference 頁面，回傳 {'location', 'date', 'venue'}；無法解析時回傳 None"""
+    conf_response = http.get(conf_url, timeout=10)
+    if conf_response.status_code != 200:
+        return None
+    return parse_conference_html(conf_response.text)
+
+
+def crawl_dblp(http, existing_pubs=None, job=None, parser='auto', state=None, full=False,
+               max_workers=4, delay=0.0):
+    """從 DBLP 爬取出版物資料
+
+    Args:
+        http: HttpCache（經過磁碟快取的 GET）
+        existing_pubs: 現有的出版物列表，用於檢查是否需要進入 conference 連結
+        job: 背景執行時的 Job，用於回報進度與檢查是否已取消
+        parser: 'auto' / 'html' / 'lxml' / 'xml'
+        state: CrawlState；提供時只處理新增或有變更的記錄，並記錄本次結果
+        full: 搭配 state 使用，檢查所有記錄而不提前停止
+        max_workers: 同時抓取 conference 頁面的數量
+        delay: 同一主機的請求間隔（秒）
+    """
+    parser = resolve_parser(parser)
+    visit = state.visitor(parser, existing_pubs or [], full=full) if state else None
+
+    # 建立現有資料的映射（ID -> publication）
+    existing_map = {}
+    if existing_pubs:
+        existing_map = {pub['id']: pub for pub in existing_pubs}
+
+    try:
+        # 發送請求（經過磁碟快取）並解析
+        suffix, parse, wants_text = PARSERS[parser]
+        response = http.get(DBLP_PERSON_URL + suffix, timeout=30)
+        response.raise_for_status()
+        entries = parse(response.text if wants_text else response.content, visit)
+
+        if job:
+            job.update(entries_parsed=len(entries),
+                       entries_unchanged=state.unchanged if state else 0,
+                       changed_upstream=len(state.changed) if state else 0)
+            job.check_cancelled()
+
+        publications = []
+        pending_details = []  # (publication, conference URL)
+
+        for pub, conf_url, _, _ in entries:
+            if pub['type'] == 'conference':
+                # 只有在現有資料沒有 location 時才進入 conference 連結
+                existing_pub = existing_map.get(pub['id'])
+                if existing_pub and existing_pub.get('location'):
+                    # 使用現有的 location 和 date
+                    pub['location'] = existing_pub.get('location', '')
+                    pub['date'] = existing_pub.get('date', '')
+                elif conf_url:
+                    pending_details.append((pub, conf_url))
+
+            publications.append(pub)
+
+        # 並行抓取 conference 頁面（相同 URL 只抓一次）
+        def fetch_details(conf_url):
+            if job and job.cancelled:
+                return None
+            detail = fetch_conference_details(conf_url, http)
+            if job:
+                job.increment('detail_pages_fetched')
+            return detail
+
+        if job:
+            job.update(detail_pages_total=len(set(url for _, url in pending_details)), detail_pages_fetched=0)
+        details = fetch_many([url for _, url in pending_details], fetch_details,
+                             max_workers=max_workers, delay=delay)
+        if job:
+            job.check_cancelled()
+        for pub, conf_url in pending_details:
+            detail = details.get(conf_url)
+            if not detail:
+                continue
+            pub['location'] = detail['location']
+            pub['date'] = detail['date']
+            if detail['venue']:
+                pub['venue'] = detail['venue']
+
+        if state:
+            state.record(entries)
+        return publications
+
+    except JobCancelled:
+        raise
+    except Exception as e:
+        print(f"Error crawling DBLP: {e}")
+        raise
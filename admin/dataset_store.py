@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dataset Store - 以記憶體快取 dataset/*.json
+
+解析後的文件常駐在記憶體中，依檔案的 mtime/size 判斷是否失效，
+因此手動編輯或 git pull 之後的變更仍會被讀到。
+
+寫入時以 process 內的鎖加上 OS 檔案鎖（flock）序列化同一檔案的
+read-modify-write，先寫入暫存檔再 rename；鎖會持有到資料寫入磁碟為止，
+因此持有 mutation() 的呼叫者看到的儲存順序就是磁碟上的順序。
+每次儲存都會改寫整份檔案並 fsync 一次，store 不會合併不同請求的寫入；管理頁面的連續拖曳排序
+由瀏覽器累積後以一個 {"moves": [...]} 請求送出（見 templates/publications.html 與 DatasetModel.move），只寫入一次。
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows：只使用 process 內的鎖
+    fcntl = None
+
+
+# ==================== Read-only Views ====================
+
+def _readonly(*args, **kwargs):
+    raise TypeError('Dataset view is read-only, use load_json() for a mutable copy')
+
+
+class ReadOnlyDict(dict):
+    """不可修改的 dict（仍可被 json / jsonify / Jinja 直接使用）"""
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class ReadOnlyList(list):
+    """不可修改的 list"""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(obj):
+    """將 JSON 物件轉為唯讀版本；已凍結的子物件直接沿用"""
+    if isinstance(obj, (ReadOnlyDict, ReadOnlyList)):
+        return obj
+    if isinstance(obj, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return ReadOnlyList(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    """將唯讀物件完整複製為一般的 dict / list"""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def shallow_thaw(doc):
+    """複製最上層的 dict 與其中的 list，記錄本身仍為唯讀（copy-on-write）
+
+    Routes 只會替換、插入或刪除整筆記錄，不會就地修改記錄，
+    因此不需要完整複製整份文件。
+    """
+    if not isinstance(doc, dict):
+        return thaw(doc)
+    return {k: list(v) if isinstance(v, list) else v for k, v in doc.items()}
+
+
+# ==================== Writer ====================
+
+def write_bytes_atomic(filepath, content):
+    """寫入暫存檔、fsync 後 rename 取代原檔，中途當機也不會留下截斷的檔案"""
+    dirname = os.path.dirname(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # 確保 rename 本身也寫入磁碟
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(dirname, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_json_atomic(filepath, data):
+    """以原子寫入儲存 JSON（縮排 2，保留中文）"""
+    write_bytes_atomic(filepath, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+class _DatasetFile:
+    """單一 dataset 檔案的寫入狀態"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lock = threading.Lock()      # 序列化 read-modify-write（持有到寫入磁碟為止）
+        self.owner = None                 # 持有 lock 的 thread
+        self.os_lock_fd = None            # 跨 process 的 flock
+
+    def acquire_os_lock(self):
+        if fcntl is None or self.os_lock_fd is not None:
+            return
+        dirname, basename = os.path.split(self.filepath)
+        fd = os.open(os.path.join(dirname, '.' + basename + '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self.os_lock_fd = fd
+
+    def release_os_lock(self):
+        if self.os_lock_fd is None:
+            return
+        fd, self.os_lock_fd = self.os_lock_fd, None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+# ==================== Indexed Model ====================
+
+ID_PATTERN = re.compile(r'^(\D+)(\d+)$')
+
+
+class IdIndex:
+    """id → 位置索引，以及各 ID 前綴（jz/cz/bz/m/e ...）目前的最大編號
+
+    位置以 key - base 表示：在最前面插入或刪除只需要調整 base（O(1)）；
+    在中間插入或刪除時只移動較短的一側，成本為 O(min(pos, n - pos))。
+    查詢位置是 O(1)；下一個編號也是 O(1)，只有刪除目前最大的編號後第一次查詢會重新掃描該前綴。
+    """
+
+    def __init__(self, items):
+        self.base = 0
+        self.keys = {}
+        self.max_num = {}
+        self.stale = set()
+        self.rebuild(items)
+
+    def rebuild(self, items):
+        self.base = 0
+        self.keys = {}
+        for i, record in enumerate(items):
+            self.keys.setdefault(record.get('id'), i)
+        self.max_num = {}
+        self.stale = set()
+        for record_id in self.keys:
+            self._note(record_id)
+
+    def _note(self, record_id):
+        match = ID_PATTERN.match(record_id or '')
+        if match:
+            prefix, num = match.group(1), int(match.group(2))
+            if num > self.max_num.get(prefix, 0):
+                self.max_num[prefix] = num
+
+    def _forget(self, record_id):
+        match = ID_PATTERN.match(record_id or '')
+        if match and int(match.group(2)) >= self.max_num.get(match.group(1), 0):
+            self.stale.add(match.group(1))
+
+    def position(self, record_id):
+        key = self.keys.get(record_id)
+        return None if key is None else key - self.base
+
+    def next_num(self, prefix):
+        if prefix in self.stale:
+            self.stale.discard(prefix)
+            self.max_num.pop(prefix, None)
+            for record_id in self.keys:
+                if record_id and record_id.startswith(prefix):
+                    self._note(record_id)
+        return self.max_num.get(prefix, 0) + 1
+
+    def _shift(self, items, start, stop, delta):
+        """移動 items[start:stop] 的位置（以索引走訪，不複製 list）"""
+        for i in range(start, stop):
+            record_id = items[i].get('id')
+            if self.keys.get(record_id) == self.base + i:
+                self.keys[record_id] += delta
+
+    def insert(self, items, pos, record):
+        """在 items 插入 record 之前呼叫"""
+        n = len(items)
+        if pos < n - pos:
+            self._shift(items, 0, pos, -1)
+            self.base -= 1
+        else:
+            self._shift(items, pos, n, 1)
+        record_id = record.get('id')
+        if record_id not in self.keys:
+            self.keys[record_id] = self.base + pos
+        self._note(record_id)
+
+    def remove(self, items, pos):
+        """在 items 刪除位置 pos 之前呼叫"""
+        n = len(items)
+        record_id = items[pos].get('id')
+        if self.keys.get(record_id) == self.base + pos:
+            del self.keys[record_id]
+        self._forget(record_id)
+        if pos < n - pos:
+            self._shift(items, 0, pos, 1)
+            self.base += 1
+        else:
+            self._shift(items, pos + 1, n, -1)
+
+    def replace(self, pos, old_id, new_id):
+        if old_id == new_id:
+            return
+        if self.keys.get(old_id) == self.base + pos:
+            del self.keys[old_id]
+        self._forget(old_id)
+        self.keys.setdefault(new_id, self.base + pos)
+        self._note(new_id)
+
+
+class DatasetModel:
+    """可修改的 dataset 文件，所有修改都會同步更新 IdIndex"""
+
+    def __init__(self, doc, key, index):
+        self.doc = doc
+        self.key = key
+        self.index = index
+
+    @property
+    def items(self):
+        return self.doc[self.key]
+
+    def __len__(self):
+        return len(self.items)
+
+    def position(self, record_id):
+        return self.index.position(record_id)
+
+    def get(self, record_id):
+        pos = self.index.position(record_id)
+        return None if pos is None else self.items[pos]
+
+    def next_id(self, prefix, width=0):
+        return f"{prefix}{self.index.next_num(prefix):0{width}d}"
+
+    def insert(self, pos, record):
+        self.index.insert(self.items, pos, record)
+        self.items.insert(pos, record)
+
+    def append(self, record):
+        self.insert(len(self.items), record)
+
+    def replace(self, record_id, record):
+        pos = self.index.position(record_id)
+        if pos is None:
+            return False
+        self.index.replace(pos, record_id, record.get('id'))
+        self.items[pos] = record
+        return True
+
+    def remove(self, record_id):
+        pos = self.index.position(record_id)
+        if pos is None:
+            return False
+        self.index.remove(self.items, pos)
+        del self.items[pos]
+        return True
+
+    def move(self, record_id, before=None, after=None):
+        """把記錄移到 before 之前或 after 之後（都沒有指定時移到最後）；找不到 id 時回傳 False"""
+        pos = self.index.position(record_id)
+        anchor = before if before is not None else after
+        if pos is None or (anchor is not None and self.index.position(anchor) is None):
+            return False
+        if anchor == record_id:
+            return True
+        record = self.items[pos]
+        self.remove(record_id)
+        if before is not None:
+            target = self.index.position(before)
+        elif after is not None:
+            target = self.index.position(after) + 1
+        else:
+            target = len(self.items)
+        self.insert(target, record)
+        return True
+
+    def reorder(self, records):
+        self.doc[self.key] = list(records)
+        self.index.rebuild(self.items)
+
+
+# ==================== Store ====================
+
+class Repository:
+    """資料存取介面，routes 只透過這些方法讀寫 dataset
+
+    後端需實作：
+        get(filename)            唯讀文件（ReadOnlyDict），不存在時 FileNotFoundError
+        mutation(filename)       read-modify-write 期間的鎖（context manager，同一 thread 可重入）
+        save(filename, data)     儲存 dict 或 DatasetModel，回傳時已持久化
+        last_modified(filename)  最後修改時間（epoch 秒），未知時為 None
+        invalidate(filename)     捨棄快取
+        stats()                  快取 / 寫入統計
+
+    後端需設定 self._lock 與 self._indexes（filename -> (doc, IdIndex)），
+    讓 model() 可以沿用同一份文件的 IdIndex。
+    快取失效、重新解析文件後，後端會呼叫 on_parse(filename, 秒數)（監控用）。
+    """
+
+    on_parse = None
+
+    def load(self, filename):
+        """取得可修改的複本"""
+        return shallow_thaw(self.get(filename))
+
+    def model(self, filename, key=None):
+        """取得可修改的 DatasetModel，沿用快取文件的 IdIndex
+
+        必須在 mutation() 內使用：IdIndex 會被就地更新，
+        儲存時交給新版本的文件，沒有儲存則捨棄。
+        """
+        key = key or os.path.splitext(filename)[0]
+        doc = self.get(filename)
+        with self._lock:
+            cached = self._indexes.pop(filename, None)
+        if cached and cached[0] is doc:
+            index = cached[1]
+        else:
+            index = IdIndex(doc.get(key, []))
+        data = shallow_thaw(doc)
+        data.setdefault(key, [])
+        return DatasetModel(data, key, index)
+
+
+class DatasetStore(Repository):
+    """dataset/*.json 的記憶體快取與寫入引擎"""
+
+    def __init__(self, dataset_dir):
+        self.dataset_dir = dataset_dir
+        self._entries = {}  # filename -> (stamp, doc)
+        self._files = {}    # filename -> _DatasetFile
+        self._indexes = {}  # filename -> (doc, IdIndex)，只對應到同一份快取文件
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def path(self, filename):
+        return os.path.join(self.dataset_dir, filename)
+
+    def _stamp(self, filepath):
+        st = os.stat(filepath)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _file(self, filename):
+        with self._lock:
+            state = self._files.get(filename)
+            if state is None:
+                state = self._files[filename] = _DatasetFile(self.path(filename))
+            return state
+
+    def get(self, filename):
+        """取得唯讀文件；檔案有變更時重新解析"""
+        filepath = self.path(filename)
+        stamp = self._stamp(filepath)
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        start = time.perf_counter()
+        with open(filepath, 'r', encoding='utf-8') as f:
+            doc = freeze(json.load(f))
+        if self.on_parse is not None:
+            self.on_parse(filename, time.perf_counter() - start)
+
+        with self._lock:
+            self._entries[filename] = (stamp, doc)
+        return doc
+
+    @contextmanager
+    def mutation(self, filename):
+        """鎖定檔案以進行 read-modify-write（同一 thread 可重入）"""
+        state = self._file(filename)
+        if state.owner == threading.get_ident():
+            yield
+            return
+
+        state.lock.acquire()
+        state.owner = threading.get_ident()
+        try:
+            state.acquire_os_lock()
+            yield
+        finally:
+            state.release_os_lock()
+            state.owner = None
+            state.lock.release()
+
+    def save(self, filename, data):
+        """儲存文件，回傳時資料已寫入磁碟
+
+        整個寫入期間都持有 mutation 鎖：其他寫入者要等這次儲存完成（或失敗）後
+        才會讀到文件，不會以尚未寫入、之後可能失敗的版本為基礎修改。
+        寫入失敗時快取維持原本的內容並拋出例外。
+        """
+        state = self._file(filename)
+        if state.owner != threading.get_ident():
+            with self.mutation(filename):
+                return self.save(filename, data)
+
+        index = None
+        if isinstance(data, DatasetModel):
+            data, index = data.doc, data.index
+
+        doc = freeze(data)
+        write_json_atomic(state.filepath, doc)
+        stamp = self._stamp(state.filepath)
+        with self._lock:
+            self._entries[filename] = (stamp, doc)
+            if index is not None:
+                self._indexes[filename] = (doc, index)
+            self.writes += 1
+        return doc
+
+    def last_modified(self, filename):
+        try:
+            return os.path.getmtime(self.path(filename))
+        except OSError:
+            return None
+
+    def invalidate(self, filename=None):
+        with self._lock:
+            for name in ([filename] if filename else list(self._entries)):
+                self._entries.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'writes': self.writes,
+                'cached': sorted(self._entries),
+            }
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DBLP Parser - 將 DBLP 頁面解析為出版物
+
+只做解析、不發送網路請求：輸入頁面內容，輸出 [DblpEntry]。
+所有正規表示式都在載入模組時編譯一次。
+
+解析器：
+    html  以 BeautifulSoup 解析網頁
+    lxml  以 lxml 解析網頁（快速路徑，需要另外安裝 lxml）
+    xml   以串流方式解析 DBLP 的 XML 匯出
+"""
+
+import hashlib
+import io
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+HIGHLIGHT_AUTHOR = 'Hsing-Kuo Pao'
+
+# 解析結果：出版物、conference 頁面 URL、DBLP key、內容雜湊
+DblpEntry = namedtuple('DblpEntry', ['pub', 'conf_url', 'key', 'digest'])
+
+# 編號，例如 [j14]、[c41]
+ID_RE = re.compile(r'\[(j\d+|c\d+)\]')
+# 年份（通常在括號中）
+YEAR_RE = re.compile(r'\((\d{4})\)')
+# Journal: Venue Volume ( Issue ) : Pages ( Year )
+JOURNAL_ISSUE_RE = re.compile(r'([^0-9]+?)\s+(\d+)\s*\(\s*\d+\s*\)\s*:\s*([0-9\-]+)\s*\(\s*(\d{4})\s*\)')
+# Journal: Venue Volume : Pages ( Year )
+JOURNAL_RE = re.compile(r'([^0-9]+?)\s+(\d+)\s*:\s*([0-9\-]+)\s*\(\s*(\d{4})\s*\)')
+# Journal: Venue ( Year )，Venue 中可能還有 Volume: Pages
+JOURNAL_VENUE_YEAR_RE = re.compile(r'([^(]+?)\s*\(\s*(\d{4})\s*\)')
+JOURNAL_PARTS_RE = re.compile(r'([^0-9]+?)\s+(\d+)\s*:\s*([0-9\-]+)')
+# Conference: Venue Year : Pages
+CONFERENCE_RE = re.compile(r'(.+?)\s+(\d{4})\s*:\s*([0-9\-]+)')
+CONFERENCE_VENUE_YEAR_RE = re.compile(r'(.+?)\s+(\d{4})')
+# conference proceedings 頁面的連結
+CONF_HREF_RE = re.compile(r'/db/conf/')
+# 同名作者的編號（例如 "Wei Wang 0001"）
+HOMONYM_RE = re.compile(r'\s+\d{4}$')
+# conference 頁面的 h1，例如 "46th EMBC 2024: Orlando, FL, USA"
+CONF_H1_RE = re.compile(r'(.+?):\s*(.+)')
+# 日期，例如 "July 15-19, 2024"
+CONF_DATE_RE = re.compile(r'([A-Z][a-z]+\s+\d+(?:-\d+)?,\s+\d{4})')
+MONTH_DATE_RE = re.compile(r'((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d+(?:-\d+)?,\s+\d{4})')
+
+
+def content_digest(text):
+    """DBLP 記錄內容的雜湊，用於判斷上游是否有變更"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def parse_citation(pub_type, entry_text, title):
+    """從記錄的文字中取出 venue / year / volume / pages
+
+    DBLP 的格式：
+        Journal:    Title. Venue Volume: Pages (Year)
+        Conference: Title. Venue Year: Pages
+    """
+    fields = {'venue': '', 'year': 0, 'volume': '', 'pages': ''}
+
+    year_match = YEAR_RE.search(entry_text)
+    if year_match:
+        fields['year'] = int(year_match.group(1))
+
+    # 標題後面的文字（移除開頭的句點）
+    _, found, remaining_text = entry_text.partition(title)
+    if not found:
+        return fields
+    remaining_text = remaining_text.strip()
+    if remaining_text.startswith('.'):
+        remaining_text = remaining_text[1:].strip()
+
+    if pub_type == 'journal':
+        # 例如: Neurocomputing 647 : 130485 ( 2025 )
+        # 或: IEEE Trans. ... 2 ( 3 ) : 162-175 ( 2010 )
+        match = JOURNAL_ISSUE_RE.match(remaining_text) or JOURNAL_RE.match(remaining_text)
+        if match:
+            fields['venue'] = match.group(1).strip()
+            fields['volume'] = match.group(2).strip()
+            fields['pages'] = match.group(3).strip()
+            fields['year'] = int(match.group(4))
+        else:
+            # 只有 venue 和 year
+            match = JOURNAL_VENUE_YEAR_RE.match(remaining_text)
+            if match:
+                venue_text = match.group(1).strip()
+                fields['year'] = int(match.group(2))
+                parts = JOURNAL_PARTS_RE.match(venue_text)
+                if parts:
+                    fields['venue'] = parts.group(1).strip()
+                    fields['volume'] = parts.group(2).strip()
+                    fields['pages'] = parts.group(3).strip()
+                else:
+                    fields['venue'] = venue_text
+    else:
+        # 例如: IEEE Big Data 2024 : 1558-1565
+        match = CONFERENCE_RE.match(remaining_text)
+        if match:
+            fields['venue'] = match.group(1).strip()
+            fields['year'] = int(match.group(2))
+            fields['pages'] = match.group(3).strip()
+        else:
+            # 只有 venue 和 year（沒有 pages）
+            match = CONFERENCE_VENUE_YEAR_RE.match(remaining_text)
+            if match:
+                fields['venue'] = match.group(1).strip()
+                fields['year'] = int(match.group(2))
+
+    return fields
+
+
+def conference_url(href):
+    """conference 連結 → 完整 URL（移除錨點，同一本 proceedings 只抓一次）"""
+    if not href.startswith('http'):
+        href = 'https://dblp.org' + href
+    return href.split('#')[0]
+
+
+def build_publication(pub_id, title, authors, fields):
+    """建立出版物物件，欄位順序與 publications.json 一致"""
+    pub_type = 'journal' if pub_id.startswith('j') else 'conference'
+    pub = {
+        'id': pub_id,
+        'type': pub_type,
+        'authors': ', '.join(authors),
+        'title': title,
+        'venue': fields['venue'],
+        'year': fields['year'],
+        'highlight_author': HIGHLIGHT_AUTHOR
+    }
+    if pub_type == 'journal':
+        pub['volume'] = fields['volume']
+        pub['pages'] = fields['pages']
+    else:
+        pub['location'] = ''
+        pub['date'] = ''
+    return pub
+
+
+def parse_person_html(text, visit=None):
+    """以 BeautifulSoup 解析 DBLP 個人頁面的 HTML，回傳 [DblpEntry]
+
+    Args:
+        visit: visit(key, digest) -> 'parse' / 'skip' / 'stop'，
+               在解析每筆記錄之前呼叫，用於略過或停止處理已知且未變更的記錄
+    """
+    soup = BeautifulSoup(text, 'html.parser')
+    results = []
+
+    for entry in soup.find_all('li', class_='entry'):
+        nr_div = entry.find('div', class_='nr')
+        if not nr_div:
+            continue
+        # 只處理 journal (j) 和 conference (c)
+        id_match = ID_RE.search(nr_div.get_text())
+        if not id_match:
+            continue
+        pub_id = id_match.group(1)
+
+        entry_text = entry.get_text(separator=' ', strip=True)
+        key = entry.get('id') or pub_id
+        digest = content_digest(entry_text)
+        action = visit(key, digest) if visit else 'parse'
+        if action == 'stop':
+            break
+        if action == 'skip':
+            continue
+
+        title_tag = entry.find('span', class_='title')
+        if not title_tag:
+            continue
+        title = title_tag.get_text().strip()
+
+        authors = []
+        for author in entry.find_all('span', itemprop='author'):
+            name = author.find('span', itemprop='name')
+            if name:
+                authors.append(name.get_text().strip())
+
+        pub = build_publication(pub_id, title, authors, parse_citation(
+            'journal' if pub_id.startswith('j') else 'conference', entry_text, title))
+
+        conf_url = None
+        if pub['type'] == 'conference':
+            conf_link = entry.find('a', href=CONF_HREF_RE)
+            if conf_link and conf_link.get('href'):
+                conf_url = conference_url(conf_link['href'])
+
+        results.append(DblpEntry(pub, conf_url, key, digest))
+
+    return results
+
+
+def _has_class(element, name):
+    return name in element.get('class', '').split()
+
+
+def parse_person_lxml(text, visit=None):
+    """以 lxml 解析 DBLP 個人頁面的 HTML，結果與 parse_person_html 相同"""
+    if lxml_html is None:
+        raise RuntimeError('lxml is not installed')
+    root = lxml_html.fromstring(text)
+    results = []
+
+    for entry in root.iter('li'):
+        if not _has_class(entry, 'entry'):
+            continue
+        nr_div = next((div for div in entry.iter('div') if _has_class(div, 'nr')), None)
+        if nr_div is None:
+            continue
+        id_match = ID_RE.search(nr_div.text_content())
+        if not id_match:
+            continue
+        pub_id = id_match.group(1)
+
+        # 與 BeautifulSoup 的 get_text(separator=' ', strip=True) 相同
+        entry_text = ' '.join(s for s in (s.strip() for s in entry.itertext()) if s)
+        key = entry.get('id') or pub_id
+        digest = content_digest(entry_text)
+        action = visit(key, digest) if visit else 'parse'
+        if action == 'stop':
+            break
+        if action == 'skip':
+            continue
+
+        spans = list(entry.iter('span'))
+        title_tag = next((span for span in spans if _has_class(span, 'title')), None)
+        if title_tag is None:
+            continue
+        title = title_tag.text_content().strip()
+
+        authors = []
+        for author in spans:
+            if author.get('itemprop') != 'author':
+                continue
+            name = next((s for s in author.iter('span') if s is not author and s.get('itemprop') == 'name'), None)
+            if name is not None:
+                authors.append(name.text_content().strip())
+
+        pub = build_publication(pub_id, title, authors, parse_citation(
+            'journal' if pub_id.startswith('j') else 'conference', entry_text, title))
+
+        conf_url = None
+        if pub['type'] == 'conference':
+            href = next((a.get('href') for a in entry.iter('a') if CONF_HREF_RE.search(a.get('href', ''))), None)
+            if href:
+                conf_url = conference_url(href)
+
+        results.append(DblpEntry(pub, conf_url, key, digest))
+
+    return results
+
+
+def parse_person_xml(content, visit=None):
+    """以串流方式解析 DBLP 個人頁面的 XML 匯出，回傳 [DblpEntry]
+
+    XML 中沒有 [j14]/[c41] 這類編號；DBLP 依類型由舊到新編號，
+    而匯出的記錄由新到舊排列，因此以各類型的總數倒數。
+    visit 的用法與 parse_person_html 相同；停止後其餘記錄只計數、不解析。
+    """
+    records = []   # (type, DblpEntry 或 None)
+    stopped = False
+    for _, elem in ET.iterparse(io.BytesIO(content), events=('end',)):
+        if elem.tag not in ('article', 'inproceedings'):
+            continue
+        # publtype="informal"（CoRR 等）在 DBLP 上編號為 [i]，不處理
+        if elem.get('publtype'):
+            elem.clear()
+            continue
+
+        pub_type = 'journal' if elem.tag == 'article' else 'conference'
+        if stopped:
+            records.append((pub_type, None))
+            elem.clear()
+            continue
+
+        # 已知且未變更的記錄不需要再解析
+        key = elem.get('key', '')
+        digest = content_digest(elem.get('mdate', '') + ' ' + ' '.join(elem.itertext()))
+        action = visit(key, digest) if visit else 'parse'
+        if action != 'parse':
+            stopped = action == 'stop'
+            records.append((pub_type, None))
+            elem.clear()
+            continue
+
+        def text_of(tag):
+            child = elem.find(tag)
+            return ''.join(child.itertext()).strip() if child is not None else ''
+
+        authors = [HOMONYM_RE.sub('', ''.join(a.itertext()).strip()) for a in elem.findall('author')]
+        year = text_of('year')
+
+        pub = {
+            'type': pub_type,
+            'authors': ', '.join(authors),
+            'title': text_of('title'),
+            'venue': text_of('journal') if pub_type == 'journal' else text_of('booktitle'),
+            'year': int(year) if year.isdigit() else 0,
+            'highlight_author': HIGHLIGHT_AUTHOR
+        }
+
+        conf_url = None
+        if pub_type == 'journal':
+            pub['volume'] = text_of('volume')
+            pub['pages'] = text_of('pages')
+        else:
+            pub['location'] = ''
+            pub['date'] = ''
+            url = text_of('url')
+            if url.startswith('db/conf/'):
+                conf_url = 'https://dblp.org/' + url.split('#')[0]
+
+        records.append((pub_type, DblpEntry(pub, conf_url, key, digest)))
+        elem.clear()
+
+    # 依類型編號（略過的記錄也佔用編號）
+    remaining = {'journal': 0, 'conference': 0}
+    for pub_type, _ in records:
+        remaining[pub_type] += 1
+    results = []
+    for pub_type, entry in records:
+        number = remaining[pub_type]
+        remaining[pub_type] -= 1
+        if entry is None:
+            continue
+        prefix = 'j' if pub_type == 'journal' else 'c'
+        # 欄位順序與 HTML 版本一致
+        results.append(entry._replace(pub={'id': f"{prefix}{number}", **entry.pub}))
+    return results
+
+
+def parse_conference_html(text):
+    """解析 conference 頁面，回傳 {'location', 'date', 'venue'}；無法解析時回傳 None"""
+    soup = BeautifulSoup(text, 'html.parser')
+
+    # h1 格式: "完整會議名稱: 地點"
+    h1 = soup.find('h1')
+    if not h1:
+        return None
+    h1_match = CONF_H1_RE.match(h1.get_text(strip=True))
+    if not h1_match:
+        return None
+
+    location = h1_match.group(2).strip()
+    date = ''
+    venue = ''
+
+    # 完整的會議名稱在 cite 的 itemprop="name" 中，例如
+    # "46th Annual International Conference of the IEEE Engineering in Medicine and Biology Society, EMBC 2024, Orlando, FL, USA, July 15-19, 2024"
+    cite = soup.find('cite', class_='data')
+    full_name_tag = cite.find('span', itemprop='name') if cite else None
+    if full_name_tag:
+        full_name = full_name_tag.get_text(strip=True)
+        date_match = CONF_DATE_RE.search(full_name)
+        if date_match:
+            date = date_match.group(1)
+        # 取前兩部分作為 venue（移除地點和日期）
+        venue_parts = full_name.split(',')
+        if len(venue_parts) >= 2:
+            venue = ', '.join(venue_parts[:2]).strip()
+
+    # 如果還沒找到日期，嘗試在整個頁面中搜尋
+    if not date:
+        date_match = MONTH_DATE_RE.search(soup.get_text())
+        if date_match:
+            date = date_match.group(1)
+
+    return {'location': location, 'date': date, 'venue': venue}
+
+
+# 個人頁面的解析器：名稱 -> (頁面副檔名, 解析函式, 是否需要文字內容)
+PARSERS = {
+    'html': ('.html', parse_person_html, True),
+    'lxml': ('.html', parse_person_lxml, True),
+    'xml': ('.xml', parse_person_xml, False),
+}
+
+
+def available_parsers():
+    """目前環境可以使用的解析器"""
+    return [name for name in PARSERS if name != 'lxml' or lxml_html is not None]
+
+
+def resolve_parser(name):
+    """解析器名稱 → 實際使用的解析器；'auto' 在有 lxml 時使用 lxml，否則使用 html"""
+    if name == 'auto':
+        return 'lxml' if lxml_html is not None else 'html'
+    if name == 'lxml' and lxml_html is None:
+        print("Warning: lxml is not installed, falling back to the html parser")
+        return 'html'
+    if name not in PARSERS:
+        raise ValueError(f"Unknown DBLP parser: {name}")
+    return name
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Duplicates - 找出描述同一篇論文的出版物（例如手動新增的 jz/cz 與爬蟲的 j/c 記錄）
+
+標題正規化後切成字元 shingle，以 MinHash + LSH（分成數個 band）建立分塊索引：
+只有同一年份（±1）、同類型且至少一個 band 相同的記錄才會實際比較，
+比較次數不會隨列表長度平方成長。候選再以標題 shingle 的 Jaccard 相似度
+與作者姓氏的重疊程度確認。
+
+合併時保留其中一筆，補上另一筆才有的欄位，並把被合併的 ID 記在 aliases，
+之後爬蟲抓到同一筆 DBLP 記錄時不會再新增一次。
+"""
+
+import hashlib
+import random
+import re
+import unicodedata
+from collections import namedtuple
+
+# MinHash 的雜湊函式數 = BANDS * ROWS
+BANDS = 16
+ROWS = 4
+
+SHINGLE_SIZE = 4
+
+# 判定為重複的門檻
+TITLE_THRESHOLD = 0.7
+SCORE_THRESHOLD = 0.75
+
+# 分數中標題與作者的比重
+TITLE_WEIGHT = 0.8
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(BANDS * ROWS)]
+
+WORD_RE = re.compile(r'[a-z0-9]+|[^\W\d_a-z]', re.UNICODE)
+AUTHOR_SPLIT_RE = re.compile(r',\s*|\s+and\s+')
+
+# 候選的重複記錄：兩筆的 id、綜合分數、標題與作者的相似度
+DuplicatePair = namedtuple('DuplicatePair', ['id', 'duplicate_of', 'score', 'title_similarity', 'author_similarity'])
+
+
+def normalize_words(text):
+    """轉小寫、去除重音符號與標點，回傳單字列表"""
+    text = unicodedata.normalize('NFKD', str(text or '').casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return WORD_RE.findall(text)
+
+
+def title_shingles(title):
+    """標題（去除空白與標點後）的字元 shingle 集合"""
+    text = ''.join(normalize_words(title))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def author_keys(authors):
+    """作者的姓氏集合（DBLP 的同名編號如 0001 會被忽略）"""
+    keys = set()
+    for name in AUTHOR_SPLIT_RE.split(str(authors or '')):
+        words = [w for w in normalize_words(name) if not w.isdigit()]
+        if words:
+            keys.add(words[-1])
+    return keys
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingles):
+    """shingle 集合的 MinHash 簽章"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles]
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _year(record):
+    try:
+        return int(record.get('year'))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Entry:
+    __slots__ = ('record', 'type', 'shingles', 'authors', 'year', 'bands')
+
+    def __init__(self, record):
+        self.record = record
+        self.type = record.get('type')
+        self.shingles = title_shingles(record.get('title'))
+        self.authors = author_keys(record.get('authors'))
+        self.year = _year(record)
+        signature = minhash(self.shingles) if self.shingles else []
+        self.bands = [hash(tuple(signature[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS)] if signature else []
+
+
+class DuplicateIndex:
+    """以 (年份, band, band 雜湊) 分塊的 LSH 索引"""
+
+    def __init__(self, records=()):
+        self._entries = {}   # id -> _Entry
+        self._buckets = {}   # (年份, band 編號, band 雜湊) -> set(id)
+        self.comparisons = 0
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, record):
+        record_id = record.get('id')
+        if record_id is None:
+            return
+        if record_id in self._entries:
+            self.remove(record_id)
+        entry = _Entry(record)
+        self._entries[record_id] = entry
+        for band, value in enumerate(entry.bands):
+            self._buckets.setdefault((entry.year, band, value), set()).add(record_id)
+
+    def remove(self, record_id):
+        entry = self._entries.pop(record_id, None)
+        if entry is None:
+            return
+        for band, value in enumerate(entry.bands):
+            bucket = self._buckets.get((entry.year, band, value))
+            if bucket is not None:
+                bucket.discard(record_id)
+                if not bucket:
+                    del self._buckets[(entry.year, band, value)]
+
+    def _candidates(self, entry):
+        years = (entry.year - 1, entry.year, entry.year + 1) if entry.year is not None else (None,)
+        found = set()
+        for year in years:
+            for band, value in enumerate(entry.bands):
+                found |= self._buckets.get((year, band, value), set())
+        return found
+
+    def _compare(self, entry, other):
+        # 會議論文與同名的期刊延伸版本是不同的出版物
+        if entry.type != other.type:
+            return None
+        self.comparisons += 1
+        title = jaccard(entry.shingles, other.shingles)
+        if title < TITLE_THRESHOLD:
+            return None
+        # 沒有作者資料時只看標題
+        if entry.authors and other.authors:
+            authors = len(entry.authors & other.authors) / min(len(entry.authors), len(other.authors))
+        else:
+            authors = 1.0
+        score = TITLE_WEIGHT * title + (1 - TITLE_WEIGHT) * authors
+        if score < SCORE_THRESHOLD:
+            return None
+        return round(score, 4), round(title, 4), round(authors, 4)
+
+    def match(self, record):
+        """與 record 可能重複的記錄，回傳依分數排序的 DuplicatePair 列表（不含 record 本身）"""
+        entry = _Entry(record)
+        pairs = []
+        for other_id in self._candidates(entry):
+            if other_id == record.get('id'):
+                continue
+            result = self._compare(entry, self._entries[other_id])
+            if result:
+                pairs.append(DuplicatePair(record.get('id'), other_id, *result))
+        pairs.sort(key=lambda pair: -pair.score)
+        return pairs
+
+    def pairs(self):
+        """索引中所有可能重複的組合（每組只列一次）"""
+        found = []
+        for record_id, entry in self._entries.items():
+            for other_id in self._candidates(entry):
+                if other_id <= record_id:
+                    continue
+                result = self._compare(entry, self._entries[other_id])
+                if result:
+                    found.append(DuplicatePair(record_id, other_id, *result))
+        found.sort(key=lambda pair: (-pair.score, pair.id))
+        return found
+
+
+def find_duplicates(records):
+    """列表中所有可能重複的組合"""
+    return DuplicateIndex(records).pairs()
+
+
+def describe(pairs, records):
+    """DuplicatePair 轉為 API 回傳的 dict，加上兩筆記錄的標題"""
+    titles = {record.get('id'): record.get('title', '') for record in records}
+    return [dict(pair._asdict(), titles=[titles.get(pair.id, ''), titles.get(pair.duplicate_of, '')])
+            for pair in pairs]
+
+
+def merge_records(keep, remove):
+    """合併兩筆記錄：保留 keep 的欄位，補上 remove 才有（或 keep 為空）的欄位
+
+    remove 的 id（以及它原有的 aliases）加入 keep 的 aliases。
+    """
+    merged = dict(keep)
+    for field, value in remove.items():
+        if field in ('id', 'aliases'):
+            continue
+        if value not in (None, '') and merged.get(field) in (None, ''):
+            merged[field] = value
+    aliases = list(keep.get('aliases', []))
+    for alias in [remove['id'], *remove.get('aliases', [])]:
+        if alias not in aliases and alias != keep['id']:
+            aliases.append(alias)
+    merged['aliases'] = aliases
+    return merged
+
+
+def alias_map(records):
+    """{被合併的 id: 目前的 id}"""
+    return {alias: record['id'] for record in records for alias in record.get('aliases', [])}
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fetcher - 以有上限的 thread pool 並行抓取多個頁面
+
+重複的 URL 只會抓取一次，同一主機的請求之間保持固定間隔，避免對 DBLP 造成負擔。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+class HostThrottle:
+    """同一主機的請求開始時間至少間隔 delay 秒"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._next = {}  # host -> 下一個可發送請求的時間
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if self.delay <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+
+def fetch_many(urls, fetch, max_workers=4, delay=0.0):
+    """並行執行 fetch(url)，回傳 {url: result}
+
+    失敗的 URL 不會出現在結果中（只印出警告），與原本逐一抓取時的行為一致。
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+
+    throttle = HostThrottle(delay)
+
+    def run(url):
+        throttle.wait(url)
+        return fetch(url)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_urls)))) as pool:
+        futures = {url: pool.submit(run, url) for url in unique_urls}
+        for url, future in futures.items():
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                print(f"Warning: Failed to fetch {url}: {e}")
+    return results
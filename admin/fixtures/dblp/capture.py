@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+錄製 DBLP 個人頁面作為解析器的 fixture
+
+下載 https://dblp.org/pid/<pid>.html 與 .xml（原始 bytes，不做任何修改），
+並以 XML 匯出（DBLP 的結構化資料）產生 expected.json。
+HTML 解析器（html / lxml）的結果與 XML 不同時列出差異並回傳非 0，
+需要人工確認後再以 --force 寫入。
+
+    python3 admin/fixtures/dblp/capture.py [--pid p/HsingKuoKennethPao] [--force]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_DIR = os.path.dirname(os.path.dirname(FIXTURE_DIR))
+sys.path.insert(0, ADMIN_DIR)
+
+import dblp_parser  # noqa: E402
+
+DEFAULT_PID = 'p/HsingKuoKennethPao'
+USER_AGENT = 'paomllab-admin-fixture/1.0 (+https://paomllab-csie-ntust.github.io)'
+
+# expected.json 的欄位（爬蟲在抓取 conference 頁面之前的結果）
+EXPECTED_FIELDS = {
+    'journal': ('id', 'type', 'authors', 'title', 'venue', 'year', 'volume', 'pages'),
+    'conference': ('id', 'type', 'authors', 'title', 'venue', 'year'),
+}
+
+
+def fixture_path(pid, extension):
+    return os.path.join(FIXTURE_DIR, 'dblp.org', 'pid', *pid.split('/')) + extension
+
+
+def fetch(url):
+    response = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def expected_entries(entries):
+    expected = []
+    for entry in entries:
+        item = {field: entry.pub[field] for field in EXPECTED_FIELDS[entry.pub['type']]}
+        if entry.conf_url:
+            item['conf_url'] = entry.conf_url
+        expected.append(item)
+    return expected
+
+
+def compare(name, entries, reference):
+    """回傳 name 解析器與 XML 結果不同的記錄"""
+    got = {entry.pub['id']: (entry.pub, entry.conf_url) for entry in entries}
+    differences = []
+    for entry in reference:
+        pub_id = entry.pub['id']
+        if got.get(pub_id) != (entry.pub, entry.conf_url):
+            differences.append(f"{name} {pub_id}: {got.get(pub_id)} != {(entry.pub, entry.conf_url)}")
+    for pub_id in set(got) - {entry.pub['id'] for entry in reference}:
+        differences.append(f"{name} {pub_id}: not in the XML export")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description='錄製 DBLP 個人頁面作為解析器的 fixture')
+    parser.add_argument('--pid', default=DEFAULT_PID)
+    parser.add_argument('--force', action='store_true', help='HTML 與 XML 的結果不同時仍寫入')
+    args = parser.parse_args()
+
+    html_content = fetch(f'https://dblp.org/pid/{args.pid}.html')
+    xml_content = fetch(f'https://dblp.org/pid/{args.pid}.xml')
+
+    reference = dblp_parser.parse_person_xml(xml_content)
+    html_text = html_content.decode('utf-8')
+    differences = []
+    for name in dblp_parser.available_parsers():
+        _, parse, wants_text = dblp_parser.PARSERS[name]
+        if wants_text:
+            differences += compare(name, parse(html_text), reference)
+    for line in differences:
+        print(line)
+    if differences and not args.force:
+        print(f"{len(differences)} differences between the HTML and XML parsers, nothing written (use --force)")
+        return 1
+
+    os.makedirs(os.path.dirname(fixture_path(args.pid, '.html')), exist_ok=True)
+    with open(fixture_path(args.pid, '.html'), 'wb') as f:
+        f.write(html_content)
+    with open(fixture_path(args.pid, '.xml'), 'wb') as f:
+        f.write(xml_content)
+    with open(os.path.join(FIXTURE_DIR, 'expected.json'), 'w', encoding='utf-8') as f:
+        json.dump(expected_entries(reference), f, ensure_ascii=False, indent=2)
+    print(f"recorded {len(reference)} entries for {args.pid}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Cache - 將 DBLP 頁面快取在磁碟上
+
+快取以 URL 對應到檔案路徑（例如 dblp.org/db/conf/embc/embc2024.html），
+並在旁邊的 .meta.json 記錄 ETag / Last-Modified / 抓取時間。
+過期的項目以 conditional GET 重新驗證；offline 模式下只讀取快取，
+因此也可以直接把一個 fixture 目錄當成快取來測試爬蟲。
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from dataset_store import write_bytes_atomic
+
+
+class OfflineCacheMiss(Exception):
+    """offline 模式下快取中沒有此 URL"""
+
+
+class CachedResponse:
+    """與 requests.Response 相容的最小介面"""
+
+    def __init__(self, url, status_code, content, encoding='utf-8', from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HttpCache:
+    """以 URL 為 key 的磁碟快取，支援 per-URL TTL 與 conditional GET
+
+    Args:
+        cache_dir: 快取目錄
+        ttl_rules: [(regex, 秒數), ...]，依序比對 URL，第一個符合的規則生效
+        default_ttl: 沒有規則符合時的 TTL（秒）
+        offline: True 時不發送任何網路請求
+        observe: observe(url, seconds, status, result)，每次 get() 後呼叫（監控用）；
+                 result 為 'hit'（未發送請求）、'revalidated'（304）或 'miss'
+    """
+
+    def __init__(self, cache_dir, ttl_rules=(), default_ttl=86400, offline=False, observe=None):
+        self.cache_dir = cache_dir
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.observe = observe
+
+    def path_for(self, url):
+        """URL → 快取檔案路徑"""
+        parts = urlsplit(url)
+        path = parts.path.lstrip('/') or 'index.html'
+        if path.endswith('/'):
+            path += 'index.html'
+        if parts.query:
+            path += '.' + hashlib.sha1(parts.query.encode('utf-8')).hexdigest()[:12]
+        safe = [p for p in path.split('/') if p not in ('', '.', '..')]
+        return os.path.join(self.cache_dir, parts.netloc, *safe)
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _load(self, url):
+        body_path = self.path_for(url)
+        try:
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None, None
+        try:
+            with open(body_path + '.meta.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # 只有內容沒有 meta（例如手動放入的 fixture）
+            meta = {}
+        return content, meta
+
+    def _store(self, url, content, meta):
+        body_path = self.path_for(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        write_bytes_atomic(body_path, content)
+        write_bytes_atomic(body_path + '.meta.json', json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def get(self, url, timeout=30):
+        """取得 URL 內容；快取仍有效時不發送請求"""
+        start = time.perf_counter()
+        response, result = self._get(url, timeout)
+        if self.observe is not None:
+            self.observe(url, time.perf_counter() - start, response.status_code, result)
+        return response
+
+    def _get(self, url, timeout):
+        content, meta = self._load(url)
+
+        if self.offline:
+            if content is None:
+                raise OfflineCacheMiss(url)
+            return CachedResponse(url, meta.get('status', 200), content, meta.get('encoding'), from_cache=True), 'hit'
+
+        if content is not None and time.time() - meta.get('fetched_at', 0) < self.ttl_for(url):
+            return CachedResponse(url, meta.get('status', 200), content, meta.get('encoding'), from_cache=True), 'hit'
+
+        headers = {}
+        if content is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = requests.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and content is not None:
+            meta['fetched_at'] = time.time()
+            self._store(url, content, meta)
+            return CachedResponse(url, meta.get('status', 200), content, meta.get('encoding'), from_cache=True), 'revalidated'
+
+        if response.status_code == 200:
+            self._store(url, response.content, {
+                'url': url,
+                'status': 200,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'encoding': response.encoding,
+                'fetched_at': time.time(),
+            })
+
+        return CachedResponse(url, response.status_code, response.content, response.encoding), 'miss'
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Image Variants - 為上傳的照片產生縮圖與 WebP / AVIF 版本
+
+每張照片依固定寬度產生縮小版本，存放在原檔旁邊：
+
+    asset/member/Ting-Feng Ho.png
+    asset/member/Ting-Feng Ho.160w.avif
+    asset/member/Ting-Feng Ho.160w.webp
+    asset/member/Ting-Feng Ho.160w.png
+    ...
+
+並在引用該照片的 dataset 記錄中加入 photo_variants：
+
+    "photo_variants": {"webp": {"160": "asset/member/Ting-Feng Ho.160w.webp", ...}, ...}
+
+照片與縮圖的路徑是網站上的路徑（asset/...）；以下函式的 asset_dir 是 asset/ 在磁碟上的目錄
+（admin 的 UPLOAD_FOLDER），路徑以 asset_file() 轉換。
+
+需要 Pillow；沒有安裝時上傳仍可正常使用，只是不產生縮圖。
+也可以直接執行來為 asset/ 下所有現有的照片補產生縮圖：
+
+    python3 admin/image_variants.py [--force] [asset/member ...]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from dataset_store import DatasetStore
+from static_export import StaticExporter
+
+# Pillow 在第一次產生縮圖時才載入，啟動 admin 不需要
+Image = ImageOps = features = None
+_pillow_loaded = False
+
+# 產生的寬度（px），只縮小、不放大
+WIDTHS = (160, 320, 640)
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+# 格式 -> (副檔名, Pillow 的儲存參數)
+FORMATS = {
+    'avif': ('avif', {'quality': 50}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('png', {'optimize': True}),
+}
+
+# 縮圖的檔名：<原檔名>.<寬度>w.<副檔名>
+VARIANT_RE = re.compile(r'\.(\d+)w\.(avif|webp|jpg|png)$', re.IGNORECASE)
+EXTENSION_FORMATS = {ext: fmt for fmt, (ext, _) in FORMATS.items()}
+
+# 有照片欄位的 dataset 檔案
+PHOTO_DATASETS = ('members.json', 'events.json')
+
+# 照片在網站上的路徑前綴（對應 asset_dir）
+ASSET_PREFIX = 'asset/'
+
+
+def _load_pillow():
+    global Image, ImageOps, features, _pillow_loaded
+    if not _pillow_loaded:
+        try:
+            from PIL import Image, ImageOps, features
+        except ImportError:
+            pass
+        _pillow_loaded = True
+    return Image is not None
+
+
+def available():
+    """是否可以產生縮圖（已安裝 Pillow）"""
+    return _load_pillow()
+
+
+def is_image(path):
+    ext = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    return ext in IMAGE_EXTENSIONS and not VARIANT_RE.search(path)
+
+
+def output_formats(photo):
+    """此照片要產生的格式：AVIF / WebP（若 Pillow 支援），以及與原檔相同類型的備用格式"""
+    formats = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+    ext = photo.rsplit('.', 1)[-1].lower()
+    formats.append('jpeg' if ext in ('jpg', 'jpeg') else 'png')
+    return formats
+
+
+def asset_file(asset_dir, path):
+    """網站上的路徑（asset/...）→ asset_dir 中的檔案路徑"""
+    if path == ASSET_PREFIX.rstrip('/'):
+        return asset_dir
+    if path.startswith(ASSET_PREFIX):
+        return os.path.join(asset_dir, path[len(ASSET_PREFIX):])
+    return os.path.join(os.path.dirname(asset_dir), path)
+
+
+def variant_path(photo, width, fmt):
+    stem, _ = os.path.splitext(photo)
+    return f"{stem}.{width}w.{FORMATS[fmt][0]}"
+
+
+def find_variants(asset_dir, photo):
+    """從磁碟上已存在的檔案找出照片的縮圖，回傳 {格式: {寬度: 路徑}}"""
+    folder, name = os.path.split(photo)
+    stem, _ = os.path.splitext(name)
+    try:
+        filenames = os.listdir(asset_file(asset_dir, folder))
+    except FileNotFoundError:
+        return {}
+
+    variants = {}
+    prefix = stem + '.'
+    for filename in filenames:
+        if not filename.startswith(prefix):
+            continue
+        match = VARIANT_RE.search(filename)
+        if not match or filename[:match.start()] != stem:
+            continue
+        fmt = EXTENSION_FORMATS[match.group(2).lower()]
+        variants.setdefault(fmt, {})[match.group(1)] = f"{folder}/{filename}" if folder else filename
+
+    # 依格式優先順序、寬度由小到大排列
+    return {fmt: dict(sorted(variants[fmt].items(), key=lambda item: int(item[0])))
+            for fmt in FORMATS if fmt in variants}
+
+
+def _save_atomic(image, path, fmt):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, format=fmt.upper(), **FORMATS[fmt][1])
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def generate_variants(asset_dir, photo, widths=WIDTHS, force=False):
+    """產生照片的縮圖，回傳 {格式: {寬度: 路徑}}
+
+    已存在且比原檔新的縮圖不會重新產生（force=True 時全部重新產生）。
+    """
+    if not available():
+        raise RuntimeError('Pillow is not installed')
+
+    source = asset_file(asset_dir, photo)
+    source_mtime = os.stat(source).st_mtime
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    # 只縮小；原圖比最小的寬度還小時，以原寬度轉換格式
+    targets = [w for w in sorted(widths) if w < image.width] or [image.width]
+
+    for fmt in output_formats(photo):
+        for width in targets:
+            path = asset_file(asset_dir, variant_path(photo, width, fmt))
+            if not force and os.path.exists(path) and os.stat(path).st_mtime >= source_mtime:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image.copy()
+            if fmt == 'jpeg' and resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            elif resized.mode not in ('RGB', 'RGBA'):
+                resized = resized.convert('RGBA' if 'transparency' in resized.info or resized.mode in ('LA', 'PA') else 'RGB')
+            _save_atomic(resized, path, fmt)
+
+    return find_variants(asset_dir, photo)
+
+
+def with_variants(record, variants):
+    """回傳加上（或移除）photo_variants 的記錄複本"""
+    updated = dict(record)
+    if variants:
+        updated['photo_variants'] = variants
+    else:
+        updated.pop('photo_variants', None)
+    return updated
+
+
+def record_variants(store, asset_dir, save, photos=None):
+    """把 photo_variants 寫入引用照片的 dataset 記錄
+
+    Args:
+        store: DatasetStore
+        asset_dir: asset/ 在磁碟上的目錄
+        save: save(filename, model)，例如 app 的 save_json
+        photos: 只處理這些照片；None 時處理全部
+    Returns:
+        更新的記錄數
+    """
+    updated = 0
+    for filename in PHOTO_DATASETS:
+        with store.mutation(filename):
+            model = store.model(filename)
+            changed = 0
+            for record in list(model.items):
+                photo = record.get('photo')
+                if not photo or (photos is not None and photo not in photos):
+                    continue
+                variants = find_variants(asset_dir, photo)
+                if record.get('photo_variants', {}) != variants:
+                    model.replace(record['id'], with_variants(record, variants))
+                    changed += 1
+
+            contact = model.doc.get('contact_person')
+            if contact and contact.get('photo') and (photos is None or contact['photo'] in photos):
+                variants = find_variants(asset_dir, contact['photo'])
+                if contact.get('photo_variants', {}) != variants:
+                    model.doc['contact_person'] = with_variants(contact, variants)
+                    changed += 1
+
+            if changed:
+                save(filename, model)
+                updated += changed
+    return updated
+
+
+def iter_images(asset_dir, folders):
+    """列出資料夾（asset/...）中的原始照片（不含縮圖），回傳網站上的路徑"""
+    for folder in folders:
+        for root, dirs, files in os.walk(asset_file(asset_dir, folder)):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.startswith('.') and is_image(name):
+                    yield ASSET_PREFIX + os.path.relpath(os.path.join(root, name), asset_dir).replace(os.sep, '/')
+
+
+def main():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    asset_dir = os.path.join(base_dir, 'asset')
+    parser = argparse.ArgumentParser(description='為 asset/ 下現有的照片產生縮圖')
+    parser.add_argument('folders', nargs='*', default=['asset'], help='要處理的資料夾（相對於網站根目錄）')
+    parser.add_argument('--force', action='store_true', help='重新產生所有縮圖')
+    args = parser.parse_args()
+
+    if not available():
+        print("Pillow is not installed: pip install Pillow")
+        return 1
+
+    failed = 0
+    for photo in iter_images(asset_dir, args.folders):
+        try:
+            variants = generate_variants(asset_dir, photo, force=args.force)
+            print(f"{photo}: {sum(len(v) for v in variants.values())} variants")
+        except Exception as e:
+            failed += 1
+            print(f"Error processing {photo}: {e}")
+
+    dataset_dir = os.path.join(base_dir, 'dataset')
+    store = DatasetStore(dataset_dir)
+    updated = record_variants(store, asset_dir, store.save)
+    if updated:
+        StaticExporter(os.path.join(dataset_dir, 'dist'), store.get).export(*PHOTO_DATASETS)
+    print(f"updated {updated} dataset records, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background Jobs - 在背景 thread 執行耗時的工作（例如 DBLP 爬蟲）
+
+每個 job 有自己的進度計數器，可透過 API 查詢或取消。
+DebouncedTask 把短時間內的多次觸發合併成一次背景執行（例如儲存後的靜態匯出）。
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+
+class JobCancelled(Exception):
+    """job 已被取消"""
+
+
+class Job:
+    """單一背景工作的狀態"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = 'queued'   # queued / running / done / failed / cancelled
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        """在工作中的安全點呼叫，已取消時中止"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def update(self, **counters):
+        with self._lock:
+            self.progress.update(counters)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.progress[name] = self.progress.get(name, 0) + amount
+
+    def to_dict(self):
+        with self._lock:
+            progress = dict(self.progress)
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': progress,
+            'result': self.result,
+            'error': self.error,
+            'elapsed': round(elapsed, 2),
+        }
+
+
+class JobRunner:
+    """以固定數量的 worker thread 執行 job，並保留最近的 job 狀態
+
+    Args:
+        context: 回傳 context manager 的函式（例如 Flask 的 app.app_context），每個 job 在其中執行
+    """
+
+    def __init__(self, max_workers=1, keep=20, context=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._keep = keep
+        self._context = context or nullcontext
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """提交 job；fn 的第一個參數為 Job。同類型的 job 尚未結束時回傳既有的 job"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.kind == kind and not job.finished:
+                    return job
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.status = 'running'
+        try:
+            job.check_cancelled()
+            with self._context():
+                job.result = fn(job, *args, **kwargs)
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            print(f"Error in job {job.kind} {job.id}: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, len(self._jobs) - self._keep)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+
+
+class DebouncedTask:
+    """合併短時間內的多次觸發，在背景 thread 執行一次 fn(keys)
+
+    最後一次觸發後 delay 秒才執行（最多延後 max_delay 秒），期間觸發的 key 合併為一次；
+    執行中再觸發時，完成後會再執行一次。
+
+    Args:
+        fn: fn(keys)，keys 為排序後的 key 列表
+        delay: 等待後續觸發的秒數
+        max_delay: 第一次觸發後最多等待的秒數
+        context: 回傳 context manager 的函式（例如 Flask 的 app.app_context），每次執行都在其中
+    """
+
+    def __init__(self, fn, delay=1.0, max_delay=10.0, name='debounced', context=None):
+        self.fn = fn
+        self.delay = delay
+        self.max_delay = max_delay
+        self.name = name
+        self._context = context or nullcontext
+        self.runs = 0
+        self._pending = set()
+        self._first = None
+        self._deadline = 0.0
+        self._running = False
+        self._cond = threading.Condition()
+
+    def trigger(self, *keys):
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first = now
+            self._pending.update(keys)
+            self._deadline = min(now + self.delay, self._first + self.max_delay)
+            if self._running:
+                self._cond.notify_all()
+                return
+            self._running = True
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending and self._deadline > time.monotonic():
+                    self._cond.wait(self._deadline - time.monotonic())
+                keys, self._pending = sorted(self._pending), set()
+                if not keys:
+                    self._running = False
+                    self._cond.notify_all()
+                    return
+            try:
+                with self._context():
+                    self.fn(keys)
+            except Exception as e:
+                print(f"Error in {self.name}: {e}")
+            with self._cond:
+                self.runs += 1
+
+    def flush(self, timeout=None):
+        """立即執行等待中的觸發並等到完成；回傳是否已完成"""
+        with self._cond:
+            self._deadline = 0.0
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._running, timeout)
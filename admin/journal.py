@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journal - dataset 的變更紀錄（append-only），支援復原 / 重做與回到任一時間點
+
+每次儲存在 .journal/<dataset>/ 追加一行 JSON，只記錄有變更的記錄（前後內容與位置）：
+
+    {"seq": 12, "ts": 1735000000.0, "op": "sort_publications", "key": "publications",
+     "prev": "<儲存前的內容雜湊>", "version": "<儲存後的內容雜湊>",
+     "changes": [{"id": "jz4", "pos": 0, "old_pos": null, "before": null, "after": {...}}, ...],
+     "fields": {"contact_person": {"before": {...}, "after": {...}}},
+     "order": [...], "order_before": [...]}     # 只有順序無法由 changes 推得時才記錄
+
+每 SNAPSHOT_EVERY 筆寫入一份完整快照並開始新的 segment（<seq>.snapshot.json + <seq>.log），
+只保留最近 KEEP_SNAPSHOTS 份；任一時間點的內容 = 之前最近的快照 + 重播之後的紀錄。
+
+復原與重做本身也是一筆紀錄（帶 undoes / redoes），歷史不會被改寫。
+
+紀錄不是 write-ahead log，也沒有取代 dataset 檔案的寫入：dataset/*.json（或 SQLite）仍然是主要的資料，
+每次儲存照常改寫整份檔案並 fsync，成功後才追加紀錄，因此每次儲存的成本是完整改寫再加一次追加
+（紀錄只有變更的記錄，追加本身很小）。儲存失敗不會留下紀錄。檔案在 admin 之外被修改（手動編輯、git pull），
+或儲存後來不及寫入紀錄（當機）時，下一次記錄前會先補上一筆 external 紀錄。
+
+保留中的紀錄在第一次讀取後留在記憶體中，之後只追加，不會每次查詢都重新讀取 segment。
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dataset_store import thaw, write_json_atomic
+
+# 每幾筆紀錄寫一份快照
+SNAPSHOT_EVERY = 200
+
+# 保留的快照（segment）數
+KEEP_SNAPSHOTS = 5
+
+_ABSENT = object()
+
+
+class JournalError(Exception):
+    """找不到可以復原 / 重做 / 回溯的紀錄"""
+
+
+class JournalConflict(JournalError):
+    """目前的內容與紀錄不符（例如記錄已被其他變更修改），無法套用"""
+
+
+def doc_version(doc):
+    """文件內容的雜湊"""
+    content = json.dumps(doc, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def _ids(items):
+    return [record.get('id') for record in items]
+
+
+def _by_id(items):
+    found = {}
+    for pos, record in enumerate(items):
+        found.setdefault(record.get('id'), (pos, record))
+    return found
+
+
+def _apply(doc, entry, forward=True):
+    """套用紀錄（forward=False 時反向套用），回傳新的文件；不檢查目前內容是否相符"""
+    key = entry['key']
+    side, other = ('after', 'before') if forward else ('before', 'after')
+    pos_field = 'pos' if forward else 'old_pos'
+    changes = {change['id']: change for change in entry.get('changes', [])}
+
+    items = []
+    for record in doc.get(key, []):
+        change = changes.get(record.get('id'))
+        if change is None:
+            items.append(record)
+        elif change[side] is not None:
+            items.append(change[side])
+    added = sorted((change for change in changes.values() if change[other] is None and change[side] is not None),
+                   key=lambda change: change[pos_field])
+    for change in added:
+        items.insert(min(change[pos_field], len(items)), change[side])
+
+    order = entry.get('order' if forward else 'order_before')
+    if order is not None:
+        records = _by_id(items)
+        ordered = [records[record_id][1] for record_id in order if record_id in records]
+        listed = set(order)
+        items = ordered + [record for record in items if record.get('id') not in listed]
+
+    result = dict(doc)
+    result[key] = items
+    for field, values in entry.get('fields', {}).items():
+        value = values.get(side, _ABSENT)
+        if value is _ABSENT:
+            result.pop(field, None)
+        else:
+            result[field] = value
+    return result
+
+
+def diff(old, new, key):
+    """比較兩個版本，回傳紀錄的內容（不含 seq / ts / op）；沒有變更時回傳 None
+
+    copy-on-write 下沒有修改的記錄是同一個物件，不需要逐筆比較內容。
+    """
+    old = old or {}
+    old_items, new_items = old.get(key, []), new.get(key, [])
+    old_by_id, new_by_id = _by_id(old_items), _by_id(new_items)
+
+    changes = []
+    for pos, record in enumerate(new_items):
+        record_id = record.get('id')
+        previous = old_by_id.get(record_id)
+        if previous is None:
+            changes.append({'id': record_id, 'pos': pos, 'old_pos': None, 'before': None, 'after': thaw(record)})
+        elif previous[1] is not record and previous[1] != record:
+            changes.append({'id': record_id, 'pos': pos, 'old_pos': previous[0],
+                            'before': thaw(previous[1]), 'after': thaw(record)})
+    for record_id, (pos, record) in old_by_id.items():
+        if record_id not in new_by_id:
+            changes.append({'id': record_id, 'pos': None, 'old_pos': pos, 'before': thaw(record), 'after': None})
+
+    fields = {}
+    for field in list(old) + [field for field in new if field not in old]:
+        if field == key or old.get(field, _ABSENT) == new.get(field, _ABSENT):
+            continue
+        values = {}
+        if field in old:
+            values['before'] = thaw(old[field])
+        if field in new:
+            values['after'] = thaw(new[field])
+        fields[field] = values
+
+    entry = {'key': key, 'changes': changes}
+    if fields:
+        entry['fields'] = fields
+    # 只有在 changes 無法還原順序時（例如排序、移動）才記錄完整的 id 順序
+    if _ids(_apply(old, entry)[key]) != _ids(new_items):
+        entry['order'] = _ids(new_items)
+    if _ids(_apply(new, entry, forward=False)[key]) != _ids(old_items):
+        entry['order_before'] = _ids(old_items)
+    if not changes and not fields and 'order' not in entry:
+        return None
+    return entry
+
+
+def _check(doc, entry, forward):
+    """確認 doc 目前的內容與紀錄套用前的狀態相符"""
+    expected = 'before' if forward else 'after'
+    current = _by_id(doc.get(entry['key'], []))
+    for change in entry.get('changes', []):
+        record = current.get(change['id'])
+        if change[expected] is None:
+            if record is not None:
+                raise JournalConflict(f"{change['id']} already exists")
+        elif record is None or record[1] != change[expected]:
+            raise JournalConflict(f"{change['id']} was modified after seq {entry['seq']}")
+
+
+class _Log:
+    """單一 dataset 的紀錄狀態"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.seq = 0
+        self.version = None
+        self.segment = None          # 目前 segment 的起始 seq
+        self.since_snapshot = 0
+        self.doc = None              # 最近一次記錄的文件（物件相同時不需要重新計算 version）
+        self.entries = None          # 保留中的紀錄（第一次查詢時讀取）
+        self.snapshots = None        # 快照的 {seq: ts}（第一次查詢時讀取）
+
+
+class Journal:
+    """依 dataset 管理紀錄檔與快照
+
+    Args:
+        journal_dir: 紀錄存放的目錄（每個 dataset 一個子目錄）
+    """
+
+    def __init__(self, journal_dir, snapshot_every=SNAPSHOT_EVERY, keep_snapshots=KEEP_SNAPSHOTS):
+        self.journal_dir = journal_dir
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self._logs = {}
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    # ---------- 檔案 ----------
+
+    def _log(self, filename):
+        name = os.path.splitext(filename)[0]
+        with self._lock:
+            log = self._logs.get(name)
+            if log is None:
+                log = self._logs[name] = _Log(os.path.join(self.journal_dir, name))
+                self._open(log)
+            return log
+
+    def _segments(self, log):
+        """已存在的 segment 起始 seq（由舊到新）"""
+        paths = glob.glob(os.path.join(log.directory, '*.snapshot.json'))
+        return sorted(int(os.path.basename(path).split('.')[0]) for path in paths)
+
+    def _snapshot_path(self, log, seq):
+        return os.path.join(log.directory, f'{seq:08d}.snapshot.json')
+
+    def _log_path(self, log, seq):
+        return os.path.join(log.directory, f'{seq:08d}.log')
+
+    def _read_snapshot(self, log, seq):
+        with open(self._snapshot_path(log, seq), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _read_entries(self, log, seq):
+        """segment 中的紀錄；最後一行寫到一半（例如當機）時忽略"""
+        entries = []
+        try:
+            with open(self._log_path(log, seq), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _truncate_partial(self, log, seq):
+        """移除最後寫到一半的一行，之後追加的紀錄才不會接在它後面"""
+        try:
+            with open(self._log_path(log, seq), 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+        except FileNotFoundError:
+            pass
+
+    def _open(self, log):
+        segments = self._segments(log)
+        if not segments:
+            return
+        log.segment = segments[-1]
+        self._truncate_partial(log, log.segment)
+        snapshot = self._read_snapshot(log, log.segment)
+        entries = self._read_entries(log, log.segment)
+        log.seq = entries[-1]['seq'] if entries else snapshot['seq']
+        log.version = entries[-1]['version'] if entries else snapshot['version']
+        log.since_snapshot = len(entries)
+
+    def _write_snapshot(self, log, seq, doc, version):
+        os.makedirs(log.directory, exist_ok=True)
+        ts = time.time()
+        write_json_atomic(self._snapshot_path(log, seq), {'seq': seq, 'ts': ts, 'version': version, 'doc': thaw(doc)})
+        log.segment = seq
+        log.since_snapshot = 0
+        if log.snapshots is not None:
+            log.snapshots[seq] = ts
+        # 只保留最近的 segment
+        segments = self._segments(log)
+        for old in segments[:-self.keep_snapshots]:
+            for path in (self._snapshot_path(log, old), self._log_path(log, old)):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            if log.snapshots is not None:
+                log.snapshots.pop(old, None)
+        # 最舊的 segment 中的紀錄 seq 都大於它的快照
+        oldest = segments[-self.keep_snapshots:][0]
+        if log.entries is not None:
+            log.entries = [entry for entry in log.entries if entry['seq'] > oldest]
+
+    def _append(self, log, entry):
+        with open(self._log_path(log, log.segment), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        log.seq = entry['seq']
+        log.version = entry['version']
+        log.since_snapshot += 1
+        if log.entries is not None:
+            log.entries.append(entry)
+        self.appended += 1
+
+    # ---------- 記錄 ----------
+
+    def record(self, filename, old, new, op, **meta):
+        """記錄一次已完成的儲存（old → new），回傳紀錄；沒有變更時回傳 None
+
+        new 應為儲存後的文件物件：下一次記錄時 old 是同一個物件，不需要重新計算內容雜湊。
+        """
+        log = self._log(filename)
+        key = os.path.splitext(filename)[0]
+        old = old or {}
+        with log.lock:
+            prev = log.version if old is log.doc else doc_version(old)
+            if log.segment is None:
+                # 第一次記錄：以儲存前的內容作為基準快照
+                self._write_snapshot(log, 0, old, prev)
+                log.version = prev
+
+            if prev != log.version:
+                # 檔案在 admin 之外被修改過（或上次儲存後沒有記錄到）：先補上一筆 external 紀錄
+                self._record(log, key, self.state_at(filename), old, 'external', {}, prev)
+            entry = self._record(log, key, old, new, op, meta, doc_version(new))
+            log.doc = new
+            return entry
+
+    def _record(self, log, key, old, new, op, meta, version):
+        entry = diff(old, new, key)
+        if entry is None:
+            return None
+        entry = dict(seq=log.seq + 1, ts=time.time(), op=op, prev=log.version, version=version, **meta, **entry)
+        self._append(log, entry)
+        if log.since_snapshot >= self.snapshot_every:
+            self._write_snapshot(log, log.seq, new, version)
+        return entry
+
+    # ---------- 查詢 ----------
+
+    def _entries(self, log):
+        if log.entries is None:
+            log.entries = [entry for seq in self._segments(log) for entry in self._read_entries(log, seq)]
+        return log.entries
+
+    def _snapshots(self, log):
+        if log.snapshots is None:
+            log.snapshots = {seq: self._read_snapshot(log, seq)['ts'] for seq in self._segments(log)}
+        return log.snapshots
+
+    def entries(self, filename):
+        """保留中的所有紀錄（由舊到新）"""
+        log = self._log(filename)
+        with log.lock:
+            return list(self._entries(log))
+
+    def state_at(self, filename, seq=None, ts=None):
+        """重建 seq（或時間 ts）時的文件內容；早於保留範圍時拋出 JournalError"""
+        log = self._log(filename)
+        with log.lock:
+            snapshots = self._snapshots(log)
+            if not snapshots:
+                raise JournalError(f'No journal for {filename}')
+
+            # 從目標之前最近的快照開始
+            start = None
+            for snapshot_seq, snapshot_ts in sorted(snapshots.items()):
+                if (seq is not None and snapshot_seq > seq) or (ts is not None and snapshot_ts > ts):
+                    break
+                start = snapshot_seq
+            if start is None:
+                raise JournalError('Requested point is older than the kept history')
+
+            doc = self._read_snapshot(log, start)['doc']
+            for entry in self._entries(log):
+                if entry['seq'] <= start:
+                    continue
+                if (seq is not None and entry['seq'] > seq) or (ts is not None and entry['ts'] > ts):
+                    break
+                doc = _apply(doc, entry)
+            return doc
+
+    def stacks(self, filename):
+        """(可復原的 seq 列表, 可重做的 seq 列表)，最後一個為下一次要處理的"""
+        done, undone = [], []
+        for entry in self.entries(filename):
+            if 'undoes' in entry:
+                if done and done[-1] == entry['undoes']:
+                    done.pop()
+                undone.append(entry['undoes'])
+            elif 'redoes' in entry:
+                if undone and undone[-1] == entry['redoes']:
+                    undone.pop()
+                done.append(entry['redoes'])
+            else:
+                done.append(entry['seq'])
+                undone.clear()
+        return done, undone
+
+    def _entry(self, filename, seq):
+        for entry in self.entries(filename):
+            if entry['seq'] == seq:
+                return entry
+        raise JournalError(f'seq {seq} is no longer in the journal')
+
+    def undo(self, filename, doc):
+        """反向套用最近一筆紀錄，回傳 (新的文件, {'undoes': seq})"""
+        done, _ = self.stacks(filename)
+        if not done:
+            raise JournalError('Nothing to undo')
+        entry = self._entry(filename, done[-1])
+        _check(doc, entry, forward=False)
+        return _apply(doc, entry, forward=False), {'undoes': entry['seq']}
+
+    def redo(self, filename, doc):
+        """重新套用最近一次復原的紀錄，回傳 (新的文件, {'redoes': seq})"""
+        _, undone = self.stacks(filename)
+        if not undone:
+            raise JournalError('Nothing to redo')
+        entry = self._entry(filename, undone[-1])
+        _check(doc, entry, forward=True)
+        return _apply(doc, entry), {'redoes': entry['seq']}
+
+    def recover(self, filename):
+        """從快照與紀錄重建文件（例如 dataset 檔案遺失或損毀時）"""
+        return self.state_at(filename)
+
+    def stats(self):
+        with self._lock:
+            logs = dict(self._logs)
+        return {
+            'appended': self.appended,
+            'datasets': {name: {'seq': log.seq, 'segment': log.segment, 'since_snapshot': log.since_snapshot}
+                         for name, log in sorted(logs.items())},
+        }
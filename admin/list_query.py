@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+List Query - 列表 API 的篩選、排序、分頁與欄位選擇
+
+GET /api/publications、/api/members、/api/events 支援以下參數：
+
+    type=journal,conference       # 等值篩選（逗號分隔表示「或」），另有 status / degree / category / id
+    year=2024 / year_min=2020&year_max=2024
+    sort=-year,title              # 依欄位排序，「-」為降序；未指定時保持文件中的順序
+    limit=20&cursor=...           # 分頁：回應的 next_cursor 傳回來取得下一頁
+    fields=id,title,year          # 只回傳指定的欄位（一定包含 id）
+
+篩選使用依文件版本建立的索引（等值對照表、排序過的年份、排序結果），
+文件沒有變更時不需要重新掃描整個列表。
+"""
+
+import base64
+import binascii
+import functools
+import json
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+# 等值篩選的欄位
+FILTER_FIELDS = ('id', 'type', 'status', 'degree', 'category')
+
+# 會觸發查詢（而不是回傳整份文件）的參數
+QUERY_PARAMS = FILTER_FIELDS + ('year', 'year_min', 'year_max', 'sort', 'limit', 'cursor', 'fields')
+
+MAX_LIMIT = 500
+
+# 每份文件最多快取的排序結果數
+MAX_SORTS = 16
+
+FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# 解析後的查詢
+Query = namedtuple('Query', ['filters', 'year_min', 'year_max', 'sort', 'limit', 'cursor', 'fields'])
+
+# 查詢結果：該頁的記錄、符合條件的總數、下一頁的 cursor（沒有下一頁時為 None）
+Page = namedtuple('Page', ['items', 'total', 'next_cursor'])
+
+
+class QueryError(ValueError):
+    """查詢參數不正確"""
+
+
+def year_of(record):
+    """記錄的年份：year 欄位，沒有時取 date 的前四碼（例如 events 的 2025-01-17）"""
+    year = record.get('year')
+    if year is None:
+        date = record.get('date')
+        year = date[:4] if isinstance(date, str) else None
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+@functools.total_ordering
+class _Desc:
+    """降序排序用：反轉比較結果"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _normalize(value):
+    """讓不同型別的值可以互相比較：數字 < 字串"""
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value).casefold())
+
+
+def sort_key(values, sort, position):
+    """依排序欄位產生比較用的 key；沒有該欄位的記錄不論升降序都排在最後，同值時依文件順序"""
+    key = []
+    for value, (_, descending) in zip(values, sort):
+        if value is None:
+            key.append((1, 0))
+        else:
+            value = _normalize(value)
+            key.append((0, _Desc(value) if descending else value))
+    key.append(position)
+    return tuple(key)
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _int_param(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f'{name} must be an integer')
+
+
+def _field_names(value, name):
+    fields = _split(value)
+    for field in fields:
+        if not FIELD_RE.match(field.lstrip('-') if name == 'sort' else field):
+            raise QueryError(f'Invalid field in {name}: {field}')
+    return fields
+
+
+def is_query(args):
+    """request.args 中是否有查詢參數"""
+    return any(name in args for name in QUERY_PARAMS)
+
+
+def parse_query(args):
+    """將 request.args 解析為 Query；參數不正確時拋出 QueryError"""
+    filters = {}
+    for field in FILTER_FIELDS:
+        values = [value for raw in args.getlist(field) for value in _split(raw)]
+        if values:
+            filters[field] = frozenset(values)
+
+    year = _int_param(args, 'year')
+    year_min = _int_param(args, 'year_min')
+    year_max = _int_param(args, 'year_max')
+    if year is not None:
+        year_min = year if year_min is None else max(year, year_min)
+        year_max = year if year_max is None else min(year, year_max)
+
+    sort = tuple((field.lstrip('-'), field.startswith('-'))
+                 for field in _field_names(args.get('sort', ''), 'sort'))
+
+    limit = _int_param(args, 'limit')
+    if limit is not None and not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f'limit must be between 1 and {MAX_LIMIT}')
+
+    fields = _field_names(args.get('fields', ''), 'fields')
+    if fields and 'id' not in fields:
+        fields.insert(0, 'id')
+
+    cursor = decode_cursor(args['cursor'], sort) if args.get('cursor') else None
+    return Query(filters, year_min, year_max, sort, limit, cursor, tuple(fields) or None)
+
+
+def encode_cursor(record, position, sort):
+    """下一頁從 record 之後開始：記錄排序欄位的值、位置與 id（不依賴目前的文件版本）"""
+    state = {'p': position, 'id': record.get('id')}
+    if sort:
+        state['s'] = [('-' if descending else '') + field for field, descending in sort]
+        state['k'] = [record.get(field) for field, _ in sort]
+    raw = json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+        position = int(state['p'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise QueryError('Invalid cursor')
+    expected = [('-' if descending else '') + field for field, descending in sort]
+    if state.get('s', []) != expected or len(state.get('k', [])) != len(sort):
+        raise QueryError('cursor does not match sort')
+    return state
+
+
+class ListIndex:
+    """一份文件（同一個物件）的索引；欄位的對照表與排序結果在第一次使用時建立"""
+
+    def __init__(self, items):
+        self.items = items
+        self._equals = {}
+        self._years = None
+        self._sorts = {}
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def equals(self, field):
+        """{str(值): 位置集合}"""
+        table = self._equals.get(field)
+        if table is None:
+            table = {}
+            for pos, record in enumerate(self.items):
+                value = record.get(field)
+                if value is not None:
+                    table.setdefault(str(value), set()).add(pos)
+            with self._lock:
+                self._equals[field] = table
+        return table
+
+    def years(self):
+        """(依年份排序的年份, 對應的位置)"""
+        if self._years is None:
+            pairs = sorted((year, pos) for pos, year in enumerate(map(year_of, self.items)) if year is not None)
+            self._years = ([year for year, _ in pairs], [pos for _, pos in pairs])
+        return self._years
+
+    def position(self, record_id):
+        if self._ids is None:
+            ids = {}
+            for pos, record in enumerate(self.items):
+                ids.setdefault(record.get('id'), pos)
+            self._ids = ids
+        return self._ids.get(record_id)
+
+    def sorted(self, sort):
+        """(排序後的位置, 對應的 key)"""
+        entry = self._sorts.get(sort)
+        if entry is None:
+            fields = [field for field, _ in sort]
+            keys = sorted(sort_key([record.get(field) for field in fields], sort, pos)
+                          for pos, record in enumerate(self.items))
+            entry = ([key[-1] for key in keys], keys)
+            with self._lock:
+                if len(self._sorts) >= MAX_SORTS:
+                    self._sorts.clear()
+                self._sorts[sort] = entry
+        return entry
+
+    def matching(self, query):
+        """符合篩選條件的位置集合；沒有篩選時回傳 None（全部）"""
+        matched = None
+        for field, values in query.filters.items():
+            table = self.equals(field)
+            positions = set().union(*(table.get(value, ()) for value in values))
+            matched = positions if matched is None else matched & positions
+        if query.year_min is not None or query.year_max is not None:
+            years, positions = self.years()
+            start = bisect_left(years, query.year_min) if query.year_min is not None else 0
+            end = bisect_right(years, query.year_max) if query.year_max is not None else len(years)
+            in_range = set(positions[start:end])
+            matched = in_range if matched is None else matched & in_range
+        return matched
+
+    def _start(self, query, order_keys):
+        """cursor 之後的第一個索引"""
+        cursor = query.cursor
+        if cursor is None:
+            return 0
+        if query.sort:
+            # cursor 記錄的記錄若已移動，依 id 找到目前的位置作為同值時的排序依據
+            position = self.position(cursor.get('id'))
+            key = sort_key(cursor['k'], query.sort, cursor['p'] if position is None else position)
+            return bisect_right(order_keys, key)
+        position = self.position(cursor.get('id'))
+        return (cursor['p'] if position is None else position) + 1
+
+    def run(self, query):
+        """執行查詢，回傳 Page"""
+        matched = self.matching(query)
+        total = len(self.items) if matched is None else len(matched)
+
+        if query.sort:
+            order, keys = self.sorted(query.sort)
+        else:
+            order, keys = range(len(self.items)), None
+
+        page = []
+        last = None
+        limit = query.limit
+        next_cursor = None
+        for i in range(self._start(query, keys), len(order)):
+            pos = order[i]
+            if matched is not None and pos not in matched:
+                continue
+            if limit is not None and len(page) == limit:
+                next_cursor = encode_cursor(self.items[last], last, query.sort)
+                break
+            page.append(self.items[pos])
+            last = pos
+
+        if query.fields:
+            page = [{field: record[field] for field in query.fields if field in record} for record in page]
+        return Page(page, total, next_cursor)
+
+
+class ListQuery:
+    """依 (dataset, 文件物件) 快取 ListIndex；文件有變更時重新建立"""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, name, items):
+        with self._lock:
+            cached = self._indexes.get(name)
+            if cached is None or cached.items is not items:
+                cached = self._indexes[name] = ListIndex(items)
+        return cached
+
+    def run(self, name, items, query):
+        return self.index(name, items).run(query)
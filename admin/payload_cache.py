@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Payload Cache - 預先序列化並壓縮 API 回傳的 JSON
+
+每個 dataset 文件版本只序列化一次，同時產生 gzip / brotli 版本與
+由內容雜湊而來的 ETag；文件有變更（DatasetStore 回傳新的物件）時才重新產生。
+brotli 為選用套件，沒有安裝時只提供 gzip。
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小於此大小的回應不壓縮
+MIN_COMPRESS_SIZE = 1024
+
+# 伺服器偏好的壓縮格式（依序）
+ENCODINGS = ('br', 'gzip')
+
+# 每次儲存後都要重新壓縮：quality 11 比 5 慢上百倍，大小只差一成左右
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+# 序列化結果：來源文件、{編碼: 內容}、ETag（不含編碼後綴）、最後修改時間
+Payload = namedtuple('Payload', ['doc', 'bodies', 'etag', 'last_modified'])
+
+
+def compress(body):
+    """回傳 {編碼: 內容}，包含未壓縮的 'identity'"""
+    bodies = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        if brotli is not None:
+            bodies['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+        bodies['gzip'] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return bodies
+
+
+class PayloadCache:
+    """依文件物件快取序列化與壓縮後的內容
+
+    Args:
+        serialize: serialize(doc) -> bytes
+        observe: observe(key, 秒數)，重新序列化與壓縮後呼叫（監控用）
+    """
+
+    def __init__(self, serialize, observe=None):
+        self.serialize = serialize
+        self.observe = observe
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, doc, last_modified=None):
+        """取得 doc 的 Payload；doc 與上次相同時直接使用快取"""
+        with self._lock:
+            cached = self._payloads.get(key)
+        if cached is not None and cached.doc is doc:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        start = time.perf_counter()
+        body = self.serialize(doc)
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        if cached is not None and cached.etag == etag:
+            # 內容相同（例如檔案被 touch），沿用壓縮結果與修改時間
+            payload = cached._replace(doc=doc)
+        else:
+            payload = Payload(doc, compress(body), etag, last_modified)
+        if self.observe is not None:
+            self.observe(key, time.perf_counter() - start)
+
+        with self._lock:
+            self._payloads[key] = payload
+        return payload
+
+    @staticmethod
+    def choose_encoding(payload, accept_encodings):
+        """依 Accept-Encoding 挑選編碼；accept_encodings 為 werkzeug 的 MIMEAccept / Accept"""
+        for encoding in ENCODINGS:
+            if encoding in payload.bodies and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prerender - 把 dataset 預先渲染進公開網站的頁面（professor / laboratory / events）
+
+頁面中以註解標記要替換的區塊，內容與 data-loader.js 的 renderPublication /
+renderMemberYear / renderEvent 產生的 HTML 相同：
+
+    <div id="members-container">
+      <!-- prerender:members -->...<!-- /prerender:members -->
+    </div>
+
+<head> 中的 prerendered-bundles 記錄渲染時使用的 bundle 檔名；
+data-loader.js 發現與 manifest 相同時不再下載與渲染，內容不需要等 JavaScript 就會顯示。
+
+每次儲存後只重新產生使用該 dataset 的頁面，內容沒有變更時不寫入。
+也可以直接執行來重新產生全部頁面：
+
+    python3 admin/prerender.py
+"""
+
+import os
+import re
+import threading
+from urllib.parse import quote
+
+from dataset_store import DatasetStore, write_bytes_atomic
+from static_export import PUBLICATION_TYPES, StaticExporter, build_events, build_members, build_publications
+
+# 與 data-loader.js 相同的 sizes（依 Bootstrap 欄寬）
+MEMBER_PHOTO_SIZES = '(min-width: 1200px) 16vw, (min-width: 992px) 25vw, (min-width: 768px) 33vw, 50vw'
+EVENT_PHOTO_SIZES = '(min-width: 1200px) 25vw, (min-width: 992px) 33vw, (min-width: 576px) 50vw, 100vw'
+CONTACT_PHOTO_SIZES = '(min-width: 992px) 33vw, (min-width: 768px) 42vw, 50vw'
+
+# encodeURI() 不編碼的字元
+_URI_SAFE = ";,/?:@&=+$-_.!~*'()#"
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def _encode_uri(path):
+    return quote(path, safe=_URI_SAFE)
+
+
+def variant_srcset(paths):
+    """同 data-loader.js 的 variantSrcset()"""
+    return ', '.join(f'{_encode_uri(f"../{path}")} {width}w' for width, path in paths.items())
+
+
+def render_photo(photo, variants, attrs, sizes):
+    """同 data-loader.js 的 renderPhoto()"""
+    def img(srcset):
+        srcset_attr = f' srcset="{srcset}" sizes="{sizes}"' if srcset else ''
+        return f'<img {attrs} src="../{_text(photo)}"{srcset_attr} loading="lazy">'
+
+    if not variants:
+        return img('')
+    sources = [f'<source type="image/{fmt}" srcset="{variant_srcset(variants[fmt])}" sizes="{sizes}">'
+               for fmt in ('avif', 'webp') if variants.get(fmt)]
+    fallback = variants.get('jpeg') or variants.get('png')
+    return f"<picture>{''.join(sources)}{img(variant_srcset(fallback) if fallback else '')}</picture>"
+
+
+def render_publication(pub):
+    """同 data-loader.js 的 renderPublication()"""
+    html = '<div class="bookmark mb-1"></div><p class="mb-4 mb-md-5"><font face="Times New Roman">'
+
+    highlight = pub.get('highlight_author')
+    authors = _text(pub.get('authors'))
+    if highlight is not None:
+        authors = authors.replace(highlight, f'<b class="text-primary">{highlight}</b>', 1)
+
+    html += f'{authors}.<br>'
+    html += f'<span class="fw-bolder m-0">{_text(pub.get("title"))}</span>,<br>'
+    html += f'<i>{_text(pub.get("venue"))}</i>,'
+
+    if pub.get('type') == 'journal':
+        if pub.get('volume'):
+            html += f' Vol. {pub["volume"]}:'
+        if pub.get('pages'):
+            html += f' pp. {pub["pages"]},'
+        html += f' {_text(pub.get("year"))}'
+    elif pub.get('type') == 'conference':
+        html += '<br>'
+        if pub.get('location'):
+            html += f'{pub["location"]}, '
+        html += f'{pub["date"]}.' if pub.get('date') else f'{_text(pub.get("year"))}.'
+    elif pub.get('type') == 'book':
+        html += '<br>'
+        if pub.get('editors'):
+            html += f'{pub["editors"]}, '
+        if pub.get('publisher'):
+            html += f'{pub["publisher"]}, '
+        html += f'{_text(pub.get("year"))}.'
+
+    if pub.get('note'):
+        html += f' ({pub["note"]})'
+
+    html += '</font></p>'
+    return html
+
+
+def render_member(member):
+    """同 data-loader.js 的 renderMember()"""
+    graduated_icon = '<i class="fa-solid fa-graduation-cap"></i>' if member.get('status') == 'graduated' else ''
+    linkedin_icon = (f' <a href="{member["linkedin"]}" target="_blank" rel="noopener noreferrer" '
+                     f'style="color: #0077B5; text-decoration: none;"><i class="fa-brands fa-linkedin"></i></a>'
+                     if member.get('linkedin') else '')
+    website_icon = (f'<a href="{member["website"]}" target="_blank" rel="noopener noreferrer" class="text-primary" '
+                    f'style="text-decoration: none;"><i class="fa-solid fa-globe"></i></a> '
+                    if member.get('website') else '')
+    display_name = member.get('name_zh') or _text(member.get('name'))
+    photo = render_photo(member.get('photo'), member.get('photo_variants'),
+                         'class="div-square-content img-fluid hwAuto rounded-circle my-border"', MEMBER_PHOTO_SIZES)
+
+    return f'''
+    <div class="col-6 col-md-4 col-lg-3 col-xl-2">
+      <div class="div-square mt-3">
+        {photo}
+      </div>
+      <h4 class="mt-1 mb-0 text-center">{display_name}</h4>
+      <h4 class="fw-bolder mt-0 mb-3 text-center text-primary">{website_icon}{_text(member.get('degree'))}{graduated_icon}{linkedin_icon}</h4>
+    </div>
+  '''
+
+
+def render_member_year(year, members):
+    """同 data-loader.js 的 renderMemberYear()"""
+    html = f'<h4 class="fw-bolder my-2">{_text(year)}</h4>'
+    html += '<div class="ps-2 ps-md-3"><div class="border-secondary border-start border-4 pb-2"><div class="row m-0">'
+    html += ''.join(render_member(member) for member in members)
+    html += '</div></div></div>'
+    return html
+
+
+def render_event(event):
+    """同 data-loader.js 的 renderEvent()"""
+    photo = render_photo(event.get('photo'), event.get('photo_variants'),
+                         'class="waterfall-img rounded-top-4"', EVENT_PHOTO_SIZES)
+    return f'''
+    <div class="waterfall-item mb-2">
+      {photo}
+      <div class="p-1 p-md-2 border border-2 border-top-0 rounded-bottom-4">
+        <h5 class="fw-bolder text-primary m-0">{_text(event.get('title'))}</h5>
+        <p class="fw-bolder m-0">{_text(event.get('date_display'))}</p>
+      </div>
+    </div>
+  '''
+
+
+def publication_regions(doc):
+    """professor/index.html 的各分頁；沒有動態的 Dissertation 時保留頁面上的靜態內容"""
+    groups = build_publications(doc)
+    regions = {}
+    for pub_type in PUBLICATION_TYPES:
+        pubs = groups[f'publications.{pub_type}']
+        if pub_type != 'dissertation' or pubs:
+            regions[f'publications.{pub_type}'] = ''.join(render_publication(pub) for pub in pubs)
+    return regions
+
+
+def member_regions(doc):
+    """laboratory/index.html 的聯絡人與成員列表"""
+    data = build_members(doc)['members']
+    contact = data.get('contact_person') or {}
+    regions = {'members': ''.join(render_member_year(group['year'], group['members']) for group in data['years'])}
+    if contact:
+        photo = _text(contact.get('photo'))
+        webp = (contact.get('photo_variants') or {}).get('webp')
+        srcset = f' srcset="{variant_srcset(webp)}" sizes="{CONTACT_PHOTO_SIZES}"' if webp else ''
+        regions['contact.photo'] = (f'<img id="contact-person-photo" class="div-square-content img-fluid hwAuto '
+                                    f'rounded-circle p-md-4 p-xl-5" src="../{photo}"{srcset}>')
+        regions['contact.name'] = _text(contact.get('name'))
+        email = _text(contact.get('email'))
+        regions['contact.email'] = f'<a class="a-primary m-0 contact-person-email" href="mailto:{email}">{email}</a>'
+    return regions
+
+
+def event_regions(doc):
+    """events/index.html 的活動列表（依日期降序）"""
+    return {'events': ''.join(render_event(event) for event in build_events(doc)['events'])}
+
+
+# dataset 檔案 -> [(頁面, 產生區塊的函式, 使用的 bundle)]
+PAGES = {
+    'publications.json': [('professor/index.html', publication_regions,
+                           [f'publications.{pub_type}' for pub_type in PUBLICATION_TYPES])],
+    'members.json': [('laboratory/index.html', member_regions, ['members'])],
+    'events.json': [('events/index.html', event_regions, ['events'])],
+}
+
+BUNDLES_REGION = 'bundles'
+
+
+def replace_regions(html, regions):
+    """替換 <!-- prerender:名稱 --> 與 <!-- /prerender:名稱 --> 之間的內容；頁面中沒有的區塊略過"""
+    for name, content in regions.items():
+        pattern = re.compile(rf'(<!-- prerender:{re.escape(name)} -->).*?(<!-- /prerender:{re.escape(name)} -->)', re.S)
+        html = pattern.sub(lambda match: match.group(1) + content + match.group(2), html)
+    return html
+
+
+class Prerenderer:
+    """把 dataset 渲染進頁面
+
+    Args:
+        site_dir: 網站根目錄（頁面路徑以此為基準）
+        load: load(filename) -> dataset 文件（例如 DatasetStore.get）
+    """
+
+    def __init__(self, site_dir, load):
+        self.site_dir = site_dir
+        self.load = load
+        self._lock = threading.Lock()
+
+    def render(self, *filenames, bundles=None):
+        """重新產生使用指定 dataset 的頁面（未指定時全部），回傳有變更的頁面
+
+        bundles 為 StaticExporter.export() 回傳的 manifest，記錄在頁面中讓前台判斷內容是否為最新。
+        """
+        filenames = filenames or tuple(PAGES)
+        changed = []
+        with self._lock:
+            for filename in filenames:
+                pages = PAGES.get(filename)
+                if pages is None:
+                    continue
+                doc = self.load(filename)
+                for page, build, names in pages:
+                    regions = build(doc)
+                    used = [bundles[name] for name in names if bundles and name in bundles]
+                    regions[BUNDLES_REGION] = (f'<meta name="prerendered-bundles" content="{" ".join(used)}">'
+                                               if len(used) == len(names) else '')
+                    if self._write(page, regions):
+                        changed.append(page)
+        return changed
+
+    def _write(self, page, regions):
+        path = os.path.join(self.site_dir, page)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            html = f.read()
+        rendered = replace_regions(html, regions)
+        if rendered == html:
+            return False
+        write_bytes_atomic(path, rendered.encode('utf-8'))
+        return True
+
+
+def main():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    dataset_dir = os.path.join(base_dir, 'dataset')
+    store = DatasetStore(dataset_dir)
+    bundles = StaticExporter(os.path.join(dataset_dir, 'dist'), store.get).export()
+    for page in Prerenderer(base_dir, store.get).render(bundles=bundles) or ['(no changes)']:
+        print(page)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling - 對單一請求進行 profiling，結果寫入檔案
+
+有安裝 pyinstrument 時輸出 HTML（呼叫樹），否則使用內建的 cProfile 輸出 .prof
+（以 `python3 -m pstats <檔案>` 或 snakeviz 檢視）。
+
+同一時間只 profile 一個請求：Python 3.12 起同一時間只能有一個 profiler 啟用。
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+except ImportError:
+    _Pyinstrument = None
+
+_busy = threading.Lock()
+
+
+class RequestProfiler:
+    """profile 一段程式碼；start() 回傳 False 表示已有其他請求在 profiling
+
+    Args:
+        output_dir: 結果存放的目錄
+        name: 檔名的一部分（例如 endpoint）
+    """
+
+    def __init__(self, output_dir, name):
+        self.output_dir = output_dir
+        self.name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name or 'request')
+        self._profiler = None
+
+    def start(self):
+        if not _busy.acquire(blocking=False):
+            return False
+        try:
+            if _Pyinstrument is not None:
+                self._profiler = _Pyinstrument()
+                self._profiler.start()
+            else:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+        except Exception:
+            self._profiler = None
+            _busy.release()
+            raise
+        return True
+
+    def stop(self):
+        """停止 profiling 並寫入檔案，回傳檔名"""
+        if self._profiler is None:
+            return None
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'.{int(now * 1000) % 1000:03d}'
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if _Pyinstrument is not None:
+                self._profiler.stop()
+                filename = f'{stamp}-{self.name}.html'
+                with open(os.path.join(self.output_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(self._profiler.output_html())
+            else:
+                self._profiler.disable()
+                filename = f'{stamp}-{self.name}.prof'
+                self._profiler.dump_stats(os.path.join(self.output_dir, filename))
+            return filename
+        finally:
+            self._profiler = None
+            _busy.release()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publication I/O - 出版物的批次匯入 / 匯出（BibTeX、CSV、NDJSON）
+
+匯入時逐行讀取上傳的內容（不需要整份讀進記憶體），每筆驗證並整理成 publications.json 的格式：
+
+    for line, pub in read_publications('csv', lines):
+        ...
+
+錯誤以 PublicationFormatError 回報（帶行號）。ID 由 app 在寫入時依類型指派（jz / cz / bz）。
+
+匯出為 generator，每次產生一批文字，可以直接作為 streaming response：
+
+    export_publications('bibtex', pubs)
+
+三種格式都只輸出 FIELDS 中的欄位（aliases 等由 admin 維護的欄位不輸出），匯出的檔案可以直接再匯入。
+
+BibTeX 的對應：journal ↔ @article、conference ↔ @inproceedings、book ↔ @incollection、
+dissertation ↔ @phdthesis；location ↔ address、editors ↔ editor，
+date 與 highlight_author 以同名欄位輸出（其他工具會忽略）。
+"""
+
+import csv
+import io
+import json
+import re
+import unicodedata
+
+from static_export import PUBLICATION_TYPES
+
+# 格式 -> (Content-Type, 副檔名)
+FORMATS = {
+    'bibtex': ('application/x-bibtex', 'bib'),
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# 手動新增的 ID 前綴（爬蟲使用 j / c / b）
+ID_PREFIXES = {'journal': 'jz', 'conference': 'cz', 'book': 'bz'}
+
+# 匯入時接受的欄位（CSV 的欄位順序）
+FIELDS = ('id', 'type', 'authors', 'title', 'venue', 'year', 'volume', 'pages', 'location', 'date',
+          'editors', 'publisher', 'note', 'highlight_author')
+
+REQUIRED_FIELDS = ('title', 'authors')
+
+# 每次輸出的大小（字元數），避免每筆記錄都寫一次 socket
+CHUNK_SIZE = 64 * 1024
+
+# BibTeX entry type
+ENTRY_TYPES = {'journal': 'article', 'conference': 'inproceedings', 'book': 'incollection',
+               'dissertation': 'phdthesis'}
+BIBTEX_TYPES = {
+    'article': 'journal',
+    'inproceedings': 'conference', 'conference': 'conference', 'proceedings': 'conference',
+    'incollection': 'book', 'inbook': 'book', 'book': 'book',
+    'phdthesis': 'dissertation', 'mastersthesis': 'dissertation', 'thesis': 'dissertation',
+}
+
+# venue 在各類型中對應的 BibTeX 欄位
+VENUE_FIELDS = {'journal': 'journal', 'conference': 'booktitle', 'book': 'booktitle', 'dissertation': 'school'}
+
+# publications.json 欄位 -> BibTeX 欄位（不含 authors / venue）
+BIBTEX_FIELDS = (('title', 'title'), ('volume', 'volume'), ('pages', 'pages'), ('location', 'address'),
+                 ('date', 'date'), ('editors', 'editor'), ('publisher', 'publisher'), ('year', 'year'),
+                 ('note', 'note'), ('highlight_author', 'highlight_author'))
+
+MONTHS = {name: name.capitalize() for name in
+          ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')}
+
+# LaTeX 重音 -> Unicode combining character
+_ACCENTS = {"'": '\u0301', '`': '\u0300', '^': '\u0302', '"': '\u0308', '~': '\u0303', '=': '\u0304',
+            '.': '\u0307', 'c': '\u0327', 'v': '\u030c', 'u': '\u0306', 'H': '\u030b'}
+_ACCENT_RE = re.compile(r'\\([\'`^"~=.])\s*\{?\s*(\\?[A-Za-z])\s*\}?|\\([cvuH])\s*\{\s*([A-Za-z])\s*\}')
+_ESCAPED_RE = re.compile(r'\\([&%$#_{}])')
+_SPECIAL_RE = re.compile(r'([&%$#_])')
+_WORD_RE = re.compile(r'[\w\-:.]+')
+_FIELD_RE = re.compile(r'\s*,?\s*([\w\-:.]+)\s*=')
+
+
+class PublicationFormatError(ValueError):
+    """無法解析或驗證失敗的記錄"""
+
+    def __init__(self, message, line=None):
+        super().__init__(message)
+        self.line = line
+
+
+# ==================== 驗證 ====================
+
+def validate_publication(record, highlights=()):
+    """整理並驗證一筆出版物，回傳新的 dict（不含 id）；不合法時 raise PublicationFormatError
+
+    沒有 highlight_author 時，使用 highlights 中出現在作者列表裡的第一個名字。
+    """
+    if not isinstance(record, dict):
+        raise PublicationFormatError('Record must be an object')
+    unknown = sorted(set(record) - set(FIELDS))
+    if unknown:
+        raise PublicationFormatError(f"Unknown fields: {', '.join(unknown)}")
+
+    pub = {}
+    for field in FIELDS:
+        value = record.get(field)
+        if field == 'id' or value is None:
+            continue
+        if field == 'year':
+            if isinstance(value, str) and value.strip().isdigit():
+                value = int(value)
+            if not isinstance(value, int) or isinstance(value, bool) or not 1900 <= value <= 2100:
+                raise PublicationFormatError(f'Invalid year: {record.get(field)!r}')
+        elif not isinstance(value, str):
+            raise PublicationFormatError(f'{field} must be a string')
+        else:
+            value = value.strip()
+            if not value:
+                continue
+        pub[field] = value
+
+    pub.setdefault('type', 'journal')
+    if pub['type'] not in PUBLICATION_TYPES:
+        raise PublicationFormatError(f"Invalid type: {pub['type']!r}")
+    missing = [field for field in REQUIRED_FIELDS + ('year',) if field not in pub]
+    if missing:
+        raise PublicationFormatError(f"Missing fields: {', '.join(missing)}")
+    pub.setdefault('venue', '')
+    if 'highlight_author' not in pub:
+        highlight = next((name for name in highlights if name and name in pub['authors']), None)
+        if highlight:
+            pub['highlight_author'] = highlight
+    return pub
+
+
+def read_publications(fmt, lines, highlights=()):
+    """逐筆讀取並驗證，產生 (行號, publication, 錯誤)；publication 與錯誤其中一個為 None
+
+    單筆記錄的錯誤不會中斷讀取；無法繼續解析時（例如 BibTeX 的括號沒有閉合）raise PublicationFormatError。
+    """
+    readers = {'bibtex': _read_bibtex, 'csv': _read_csv, 'ndjson': _read_ndjson}
+    for line, record in readers[fmt](lines):
+        try:
+            if isinstance(record, PublicationFormatError):
+                raise record
+            yield line, validate_publication(record, highlights), None
+        except PublicationFormatError as e:
+            e.line = line
+            yield line, None, e
+
+
+def detect_format(filename=None, content_type=None):
+    """依副檔名或 Content-Type 判斷格式；無法判斷時回傳 None"""
+    ext = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else None
+    for fmt, (mimetype, extension) in FORMATS.items():
+        if ext in (extension, fmt) or (ext == 'jsonl' and fmt == 'ndjson'):
+            return fmt
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    for fmt, (expected, _) in FORMATS.items():
+        if mimetype == expected:
+            return fmt
+    return {'text/x-bibtex': 'bibtex', 'application/jsonl': 'ndjson', 'application/json-seq': 'ndjson'}.get(mimetype)
+
+
+# ==================== NDJSON ====================
+
+def _read_ndjson(lines):
+    for number, text in enumerate(lines, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            record = PublicationFormatError(f'Invalid JSON: {e}', number)
+        yield number, record
+
+
+def _write_ndjson(pubs):
+    for pub in pubs:
+        yield json.dumps({field: pub[field] for field in FIELDS if field in pub}, ensure_ascii=False) + '\n'
+
+
+# ==================== CSV ====================
+
+def _read_csv(lines):
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames:
+        return
+    header = [name.strip() for name in reader.fieldnames]
+    reader.fieldnames = header
+    unknown = sorted(set(header) - set(FIELDS))
+    if unknown:
+        raise PublicationFormatError(f"Unknown columns: {', '.join(unknown)}", 1)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, PublicationFormatError('Too many columns', reader.line_num)
+            continue
+        record = {name: value for name, value in row.items() if value not in (None, '')}
+        if record:
+            yield reader.line_num, record
+
+
+def _write_csv(pubs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for pub in pubs:
+        writer.writerow(['' if pub.get(field) is None else pub.get(field) for field in FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# ==================== BibTeX ====================
+
+def latex_to_text(value):
+    """去掉 BibTeX 值中的 {} 與跳脫，轉換常見的 LaTeX 重音"""
+    def accent(match):
+        mark, letter = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        letter = {'\\i': 'i', '\\j': 'j'}.get(letter, letter.lstrip('\\'))
+        return unicodedata.normalize('NFC', letter + _ACCENTS[mark])
+
+    value = _ACCENT_RE.sub(accent, value)
+    # 跳脫的 \{ \} 先換成 \0 \1，去掉分組用的 {} 之後再換回來
+    value = _ESCAPED_RE.sub(lambda match: {'{': '\0', '}': '\1'}.get(match.group(1), match.group(1)), value)
+    value = value.replace('{', '').replace('}', '').replace('~', ' ').replace('\0', '{').replace('\1', '}')
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def text_to_latex(value):
+    return _SPECIAL_RE.sub(r'\\\1', str(value)).replace('{', r'\{').replace('}', r'\}')
+
+
+def bibtex_authors(authors):
+    """'A, B and C' -> 'A and B and C'"""
+    names = [name for name in re.split(r',\s*(?:and\s+)?|\s+and\s+', authors) if name.strip()]
+    return ' and '.join(name.strip() for name in names)
+
+
+def authors_from_bibtex(value):
+    """'Pao, Hsing-Kuo and Lee, Y.-J.' -> 'Hsing-Kuo Pao, Y.-J. Lee'"""
+    names = []
+    for name in re.split(r'\s+and\s+', value):
+        parts = [part.strip() for part in name.split(',')]
+        if len(parts) == 2:
+            name = f'{parts[1]} {parts[0]}'
+        elif len(parts) == 3:  # Last, Jr, First
+            name = f'{parts[2]} {parts[0]} {parts[1]}'
+        if name.strip():
+            names.append(name.strip())
+    return ', '.join(names)
+
+
+def _entries(lines):
+    """把內容切成一個個 @entry，產生 (起始行號, 文字)"""
+    buffer, depth, start, opener = [], 0, None, None
+    for number, text in enumerate(lines, 1):
+        pos = 0
+        while pos < len(text):
+            if start is None:
+                at = text.find('@', pos)
+                if at < 0:
+                    break
+                buffer, depth, start, opener, pos = [], 0, number, None, at
+            chunk_start = pos
+            while pos < len(text):
+                char = text[pos]
+                if char == '\\':
+                    pos += 2
+                    continue
+                if opener is None and char in '{(':
+                    opener = char
+                if opener is not None:
+                    # entry 以 ( 開頭時只看小括號，否則只看大括號
+                    if char == opener:
+                        depth += 1
+                    elif char == {'{': '}', '(': ')'}[opener]:
+                        depth -= 1
+                pos += 1
+                if opener is not None and depth == 0:
+                    break
+            buffer.append(text[chunk_start:pos])
+            if opener is not None and depth == 0:
+                yield start, ''.join(buffer)
+                start = None
+    if start is not None:
+        raise PublicationFormatError('Unterminated entry', start)
+
+
+def _parse_value(body, pos, macros, line):
+    """解析 {..} / ".." / 數字 / macro，以 # 串接；回傳 (值, 新位置)"""
+    parts = []
+    while True:
+        while pos < len(body) and body[pos].isspace():
+            pos += 1
+        if pos >= len(body):
+            raise PublicationFormatError('Missing value', line)
+        char = body[pos]
+        if char in '{"':
+            close = '}' if char == '{' else '"'
+            depth, end = 0, pos + 1
+            while end < len(body):
+                current = body[end]
+                if current == '\\':
+                    end += 2
+                    continue
+                if current == '{':
+                    depth += 1
+                elif current == '}' and depth > 0:
+                    depth -= 1
+                elif current == close and depth == 0:
+                    break
+                end += 1
+            if end >= len(body):
+                raise PublicationFormatError('Unbalanced braces', line)
+            parts.append(body[pos + 1:end])
+            pos = end + 1
+        else:
+            match = _WORD_RE.match(body, pos)
+            if not match:
+                raise PublicationFormatError(f'Unexpected {char!r}', line)
+            word = match.group(0)
+            parts.append(word if word.isdigit() else macros.get(word.lower(), MONTHS.get(word.lower(), word)))
+            pos = match.end()
+        while pos < len(body) and body[pos].isspace():
+            pos += 1
+        if pos < len(body) and body[pos] == '#':
+            pos += 1
+            continue
+        return ''.join(parts), pos
+
+
+def _parse_fields(body, macros, line):
+    fields, pos = {}, 0
+    while pos < len(body):
+        if not body[pos:].strip(' \t\r\n,'):
+            break
+        match = _FIELD_RE.match(body, pos)
+        if not match:
+            raise PublicationFormatError(f'Invalid field near {body[pos:pos + 20].strip()!r}', line)
+        value, pos = _parse_value(body, match.end(), macros, line)
+        fields[match.group(1).lower()] = value
+    return fields
+
+
+def _read_bibtex(lines):
+    macros = {}
+    for line, text in _entries(lines):
+        try:
+            record = _bibtex_record(text, macros, line)
+        except PublicationFormatError as e:
+            record = e
+        if record is not None:
+            yield line, record
+
+
+def _bibtex_record(text, macros, line):
+    """一個 @entry -> 記錄；@string 更新 macros，@comment / @preamble 回傳 None"""
+    match = re.match(r'@\s*(\w+)\s*[{(]', text)
+    if not match:
+        raise PublicationFormatError('Invalid entry', line)
+    entry_type = match.group(1).lower()
+    body = text[match.end():-1]
+    if entry_type in ('comment', 'preamble'):
+        return None
+    if entry_type == 'string':
+        macros.update(_parse_fields(body, macros, line))
+        return None
+    pub_type = BIBTEX_TYPES.get(entry_type)
+    if pub_type is None:
+        raise PublicationFormatError(f'Unsupported entry type: @{entry_type}', line)
+
+    key_match = re.match(r'\s*([^,\s]*)\s*,', body)
+    fields = _parse_fields(body[key_match.end():] if key_match else body, macros, line)
+    fields = {name: latex_to_text(value) for name, value in fields.items()}
+
+    record = {'type': pub_type}
+    if 'author' in fields:
+        record['authors'] = authors_from_bibtex(fields['author'])
+    venue = fields.get(VENUE_FIELDS[pub_type]) or fields.get('journal') or fields.get('booktitle')
+    if venue:
+        record['venue'] = venue
+    for field, bibtex_field in BIBTEX_FIELDS:
+        if fields.get(bibtex_field):
+            record[field] = fields[bibtex_field]
+    if 'editors' in record:
+        record['editors'] = authors_from_bibtex(record['editors'])
+    return record
+
+
+def _write_bibtex(pubs):
+    for pub in pubs:
+        pub_type = pub.get('type', 'journal')
+        fields = [('author', bibtex_authors(pub.get('authors') or ''))]
+        if pub.get('venue'):
+            fields.append((VENUE_FIELDS.get(pub_type, 'journal'), pub['venue']))
+        for field, bibtex_field in BIBTEX_FIELDS:
+            value = pub.get(field)
+            if value not in (None, ''):
+                fields.append((bibtex_field, bibtex_authors(value) if field == 'editors' else value))
+        body = ',\n'.join(f'  {name} = {{{text_to_latex(value)}}}' for name, value in fields if value != '')
+        yield f"@{ENTRY_TYPES.get(pub_type, 'misc')}{{{pub.get('id', '')},\n{body}\n}}\n\n"
+
+
+# ==================== 匯出 ====================
+
+def export_publications(fmt, pubs, chunk_size=CHUNK_SIZE):
+    """依格式輸出出版物，每次產生約 chunk_size 的文字"""
+    writers = {'bibtex': _write_bibtex, 'csv': _write_csv, 'ndjson': _write_ndjson}
+    pending, size = [], 0
+    for text in writers[fmt](pubs):
+        pending.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield ''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield ''.join(pending)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Record Patch - 對單筆記錄套用部分更新
+
+- JSON Patch（RFC 6902，Content-Type: application/json-patch+json）：
+  [{"op": "replace", "path": "/title", "value": "..."}, {"op": "remove", "path": "/note"}]
+- JSON Merge Patch（RFC 7396，Content-Type: application/merge-patch+json）：
+  {"title": "...", "note": null}
+
+樂觀並行控制：每筆記錄的版本為其內容的雜湊（GET 回應的 ETag），
+更新時以 If-Match 帶入讀取時的版本；記錄已被其他人修改時拒絕更新，而不是覆蓋。
+"""
+
+import copy
+import hashlib
+import json
+
+PATCH_OPS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class PatchError(ValueError):
+    """patch 格式不正確或路徑不存在"""
+
+
+class PatchTestFailed(PatchError):
+    """test 操作的值不符合"""
+
+
+def record_version(record):
+    """記錄內容的雜湊，內容相同時版本相同"""
+    content = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def _parse_pointer(pointer):
+    """JSON Pointer（RFC 6901）→ 路徑片段"""
+    if pointer == '':
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise PatchError(f'Invalid path: {pointer!r}')
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _index(container, part, insert=False):
+    if part == '-' and insert:
+        return len(container)
+    if not part.isdigit() or (part != '0' and part.startswith('0')):
+        raise PatchError(f'Invalid array index: {part}')
+    index = int(part)
+    if index > len(container) or (index == len(container) and not insert):
+        raise PatchError(f'Array index out of range: {part}')
+    return index
+
+
+def _resolve(doc, parts):
+    """回傳 parts[:-1] 所指的容器"""
+    node = doc
+    for part in parts[:-1]:
+        if isinstance(node, dict):
+            if part not in node:
+                raise PatchError(f'Path not found: /{"/".join(parts)}')
+            node = node[part]
+        elif isinstance(node, list):
+            node = node[_index(node, part)]
+        else:
+            raise PatchError(f'Path not found: /{"/".join(parts)}')
+    return node
+
+
+def _get(doc, parts):
+    if not parts:
+        return doc
+    container = _resolve(doc, parts)
+    last = parts[-1]
+    if isinstance(container, dict):
+        if last not in container:
+            raise PatchError(f'Path not found: /{"/".join(parts)}')
+        return container[last]
+    if isinstance(container, list):
+        return container[_index(container, last)]
+    raise PatchError(f'Path not found: /{"/".join(parts)}')
+
+
+def _add(doc, parts, value):
+    if not parts:
+        return value
+    container = _resolve(doc, parts)
+    last = parts[-1]
+    if isinstance(container, dict):
+        container[last] = value
+    elif isinstance(container, list):
+        container.insert(_index(container, last, insert=True), value)
+    else:
+        raise PatchError(f'Path not found: /{"/".join(parts)}')
+    return doc
+
+
+def _remove(doc, parts):
+    if not parts:
+        raise PatchError('Cannot remove the whole record')
+    container = _resolve(doc, parts)
+    last = parts[-1]
+    if isinstance(container, dict):
+        if last not in container:
+            raise PatchError(f'Path not found: /{"/".join(parts)}')
+        return container.pop(last)
+    if isinstance(container, list):
+        return container.pop(_index(container, last))
+    raise PatchError(f'Path not found: /{"/".join(parts)}')
+
+
+def _json_equal(a, b):
+    """test 操作的比較（RFC 6902 4.6）：數字依數值比較，但 true / false 不等於 1 / 0"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def apply_json_patch(record, operations):
+    """套用 JSON Patch，回傳新的記錄（不修改傳入的 record）；任一操作失敗時整個 patch 都不套用"""
+    if not isinstance(operations, list):
+        raise PatchError('JSON Patch must be an array of operations')
+
+    doc = copy.deepcopy(record)
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in PATCH_OPS:
+            raise PatchError(f'Invalid operation: {operation!r}')
+        op = operation['op']
+        parts = _parse_pointer(operation.get('path'))
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f'{op} requires a value')
+
+        if op == 'add':
+            doc = _add(doc, parts, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(doc, parts)
+        elif op == 'replace':
+            _get(doc, parts)
+            if parts:
+                _remove(doc, parts)
+            doc = _add(doc, parts, copy.deepcopy(operation['value']))
+        elif op in ('move', 'copy'):
+            source = _parse_pointer(operation.get('from'))
+            if op == 'move' and parts[:len(source)] == source and parts != source:
+                raise PatchError('Cannot move a value into itself')
+            value = _remove(doc, source) if op == 'move' else copy.deepcopy(_get(doc, source))
+            doc = _add(doc, parts, value)
+        elif op == 'test':
+            if not _json_equal(_get(doc, parts), operation['value']):
+                raise PatchTestFailed(f'Test failed at {operation.get("path")}')
+    return doc
+
+
+def apply_merge_patch(record, patch):
+    """套用 JSON Merge Patch：null 表示刪除欄位，物件遞迴合併，其他值直接取代"""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(record) if isinstance(record, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Search Index - publications / members / events 的全文檢索
+
+在記憶體中維護倒排索引（詞 -> {記錄: 權重}）。每次儲存後只重新分詞新增、
+修改或刪除的記錄：文件採 copy-on-write，沒有變更的記錄仍是同一個物件。
+
+分詞：英文與數字依單字切分（轉小寫、去除重音符號），中文等 CJK 文字
+同時建立單字與相鄰兩字（bigram），查詢「何廷」「峰」都可以找到「何廷峰」。
+查詢的每個詞都以前綴比對，所有詞都要符合；分數依欄位權重與詞的稀有程度（IDF）計算。
+
+同一套分詞規則也用來產生公開網站的靜態索引（search.<dataset> bundle），
+data-loader.js 的 searchSite() 以相同規則在瀏覽器端查詢。
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+# dataset -> [(欄位, 權重), ...]
+SEARCH_FIELDS = {
+    'publications': [('title', 3), ('authors', 2), ('venue', 1), ('note', 1)],
+    'members': [('name', 3), ('degree', 1)],
+    'events': [('title', 3), ('description', 1), ('category', 1)],
+}
+
+# 查詢時忽略的常見英文字
+STOP_WORDS = frozenset(['a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'of', 'on', 'or', 'the', 'to', 'with'])
+
+# 英文 / 數字單字，或連續的 CJK 文字
+TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+
+# 拉丁字母的重音符號（NFKD 分解後）
+COMBINING_RE = re.compile(r'[\u0300-\u036f]')
+
+# 前綴比對（而非完全相同）時分數的折扣
+PREFIX_FACTOR = 0.7
+
+MAX_RESULTS = 100
+
+# 搜尋結果：dataset、記錄、分數
+Hit = namedtuple('Hit', ['dataset', 'record', 'score'])
+
+
+def normalize(text):
+    """全形轉半形、轉小寫、去除拉丁字母的重音符號（Lê → le）"""
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    return unicodedata.normalize('NFC', COMBINING_RE.sub('', text))
+
+
+def tokenize(text):
+    """切分為索引用的詞；CJK 文字產生單字與 bigram"""
+    tokens = []
+    for run in TOKEN_RE.findall(normalize(text)):
+        if run[0].isascii():
+            if run not in STOP_WORDS:
+                tokens.append(run)
+        else:
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_terms(text):
+    """切分查詢字串；CJK 文字以 bigram 查詢（單一字時以該字查詢）"""
+    terms = []
+    for run in TOKEN_RE.findall(normalize(text)):
+        if run[0].isascii():
+            if run not in STOP_WORDS:
+                terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    # 去除重複並保持順序
+    return list(dict.fromkeys(terms))
+
+
+def record_terms(dataset, record):
+    """記錄的 {詞: 權重}：同一個詞在多個欄位出現時權重相加"""
+    weights = {}
+    for field, weight in SEARCH_FIELDS[dataset]:
+        value = record.get(field)
+        if not value:
+            continue
+        for term in set(tokenize(value)):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+class SearchIndex:
+    """倒排索引，依 dataset 的文件增量更新"""
+
+    def __init__(self):
+        self._postings = {}  # 詞 -> {(dataset, id): 權重}
+        self._terms = []     # 排序過的詞，用於前綴比對
+        self._records = {}   # (dataset, id) -> (記錄, {詞: 權重})
+        self._sources = {}   # dataset -> 上次同步的記錄列表
+        self._lock = threading.Lock()
+        self.indexed = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def _add(self, key, record, terms):
+        self._records[key] = (record, terms)
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[key] = weight
+        self.indexed += 1
+
+    def _remove(self, key):
+        _, terms = self._records.pop(key)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def sync(self, dataset, items):
+        """以 dataset 目前的記錄列表更新索引，回傳重新分詞的記錄數
+
+        items 與上次相同時不做任何事；否則只處理不是同一個物件的記錄。
+        """
+        with self._lock:
+            if self._sources.get(dataset) is items:
+                return 0
+
+            current = {}
+            for record in items:
+                if record.get('id') is not None:
+                    current.setdefault((dataset, str(record['id'])), record)
+
+            changed = 0
+            for key in [key for key in self._records if key[0] == dataset and key not in current]:
+                self._remove(key)
+                changed += 1
+            for key, record in current.items():
+                entry = self._records.get(key)
+                if entry is not None and entry[0] is record:
+                    continue
+                if entry is not None:
+                    self._remove(key)
+                self._add(key, record, record_terms(dataset, record))
+                changed += 1
+
+            self._sources[dataset] = items
+            return changed
+
+    def _expand(self, term):
+        """以 term 為前綴的所有詞"""
+        start = bisect_left(self._terms, term)
+        end = start
+        while end < len(self._terms) and self._terms[end].startswith(term):
+            end += 1
+        return self._terms[start:end]
+
+    def search(self, text, datasets=None, limit=20):
+        """查詢，回傳依分數排序的 (Hit 列表, 符合的總數)"""
+        terms = query_terms(text)
+        if not terms:
+            return [], 0
+
+        with self._lock:
+            total_docs = len(self._records) or 1
+            scores = None
+            for term in terms:
+                # 每個查詢詞取各記錄符合的詞中分數最高者
+                best = {}
+                for matched in self._expand(term):
+                    postings = self._postings[matched]
+                    idf = math.log(1 + total_docs / len(postings))
+                    factor = 1.0 if matched == term else PREFIX_FACTOR
+                    for key, weight in postings.items():
+                        if datasets and key[0] not in datasets:
+                            continue
+                        score = weight * idf * factor
+                        if score > best.get(key, 0):
+                            best[key] = score
+                if scores is None:
+                    scores = best
+                else:
+                    scores = {key: scores[key] + score for key, score in best.items() if key in scores}
+                if not scores:
+                    return [], 0
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -_year(self._records[item[0]][0]), item[0]))
+            hits = [Hit(key[0], self._records[key][0], round(score, 4)) for key, score in ranked[:limit]]
+        return hits, len(scores)
+
+    def stats(self):
+        with self._lock:
+            return {'records': len(self._records), 'terms': len(self._terms), 'indexed': self.indexed}
+
+
+def _year(record):
+    try:
+        return int(record.get('year') or str(record.get('date', ''))[:4])
+    except ValueError:
+        return 0
+
+
+def _summary(dataset, record):
+    """靜態索引中每筆記錄的顯示內容：[id, 標題, 說明, 年份]"""
+    if dataset == 'publications':
+        return [record.get('id'), record.get('title', ''), record.get('venue', ''), record.get('year')]
+    if dataset == 'members':
+        return [record.get('id'), record.get('name', ''), record.get('degree', ''), record.get('year')]
+    return [record.get('id'), record.get('title', ''), record.get('date_display', ''), _year(record) or None]
+
+
+def build_static(dataset, data):
+    """公開網站使用的精簡索引
+
+        {"docs": [[id, 標題, 說明, 年份], ...],
+         "terms": {"詞": [doc 編號, 權重, doc 編號, 權重, ...], ...}}
+    """
+    docs = []
+    terms = {}
+    for record in data.get(dataset, []):
+        if record.get('id') is None:
+            continue
+        doc = len(docs)
+        docs.append(_summary(dataset, record))
+        for term, weight in record_terms(dataset, record).items():
+            terms.setdefault(term, []).extend((doc, weight))
+    return {f'search.{dataset}': {'docs': docs, 'terms': dict(sorted(terms.items()))}}
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite Store - 以 SQLite 儲存 dataset 的 Repository 後端
+
+每筆記錄存成一列（WAL 模式，依 id / type / year / status 建立索引），
+儲存時只寫入新增、刪除、修改或移動過的記錄，不需要像 JSON 檔案一樣
+每次重寫整份文件。文件的其他欄位（例如 members.json 的 contact_person）
+存在 datasets 表中，讀出時依原本的欄位順序組回與 JSON 檔案相同的文件。
+
+寫入以 BEGIN IMMEDIATE 交易在 mutation() 期間鎖定資料庫，多個 process（例如多個 gunicorn worker）
+的 read-modify-write 會依序執行，不會互相覆蓋。
+
+dataset/*.json 在 SQLite 模式下是匯出的結果：admin 儲存後在背景以 write_json() 更新
+（靜態網站與 data-loader.js 讀取的仍是 JSON），請不要直接編輯；手動修改 JSON 後需重新 import。
+
+與 JSON 檔案互相轉換（匯出的格式就是靜態網站讀取的 dataset/*.json）：
+
+    python3 admin/sqlite_store.py import   # dataset/*.json → dataset/dataset.sqlite3
+    python3 admin/sqlite_store.py export   # dataset/dataset.sqlite3 → dataset/*.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from dataset_store import DatasetModel, DatasetStore, Repository, freeze, thaw, write_json_atomic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    name TEXT PRIMARY KEY,
+    list_key TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    row INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT,
+    type TEXT,
+    year INTEGER,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_position ON records (dataset, position);
+CREATE INDEX IF NOT EXISTS records_id ON records (dataset, id);
+CREATE INDEX IF NOT EXISTS records_type ON records (dataset, type, year);
+CREATE INDEX IF NOT EXISTS records_year ON records (dataset, year);
+CREATE INDEX IF NOT EXISTS records_status ON records (dataset, status);
+"""
+
+
+class ConflictError(IOError):
+    """文件在讀取後被其他 process 修改"""
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _columns(record):
+    """建立索引的欄位"""
+    return record.get('id'), record.get('type'), record.get('year'), record.get('status')
+
+
+class SqliteStore(Repository):
+    """以 SQLite 為後端的 Repository，介面與 DatasetStore 相同"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._entries = {}  # filename -> (version, doc, rows)；rows 為 doc 中各記錄的 row id
+        self._indexes = {}  # filename -> (doc, IdIndex)
+        self._mutations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.rows_written = 0
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode=''):
+        """交易；已在 mutation() 的交易中時直接沿用"""
+        conn = self._conn()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute(f'BEGIN {mode}')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def names(self):
+        """資料庫中所有的 dataset"""
+        return [row[0] for row in self._conn().execute('SELECT name FROM datasets ORDER BY name')]
+
+    def _version(self, conn, filename):
+        row = conn.execute('SELECT version FROM datasets WHERE name = ?', (filename,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, filename):
+        """取得唯讀文件；資料庫中的版本有變更時重新讀取"""
+        version = self._version(self._conn(), filename)
+        if version is None:
+            raise FileNotFoundError(f'{filename} is not in {self.db_path}')
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        start = time.perf_counter()
+        with self._transaction() as conn:
+            version, list_key, fields = conn.execute(
+                'SELECT version, list_key, fields FROM datasets WHERE name = ?', (filename,)).fetchone()
+            rows = conn.execute('SELECT row, data FROM records WHERE dataset = ? ORDER BY position',
+                                (filename,)).fetchall()
+
+        doc = json.loads(fields)
+        doc[list_key] = [json.loads(data) for _, data in rows]
+        doc = freeze(doc)
+        if self.on_parse is not None:
+            self.on_parse(filename, time.perf_counter() - start)
+        with self._lock:
+            self._entries[filename] = (version, doc, [row for row, _ in rows])
+        return doc
+
+    @contextmanager
+    def mutation(self, filename):
+        """鎖定 dataset 以進行 read-modify-write（同一 thread 可重入）
+
+        除了 process 內的鎖之外，期間持有 BEGIN IMMEDIATE 交易（資料庫的寫入鎖），
+        其他 process 的寫入會等待（最多 connect 的 timeout 秒）而不是互相覆蓋。
+        """
+        with self._lock:
+            lock = self._mutations.setdefault(filename, threading.RLock())
+        with lock:
+            conn = self._conn()
+            if conn.in_transaction:
+                yield
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            finally:
+                if conn.in_transaction:
+                    conn.execute('COMMIT')
+
+    def save(self, filename, data):
+        """儲存文件，只寫入有變更的記錄；回傳時已 commit"""
+        with self.mutation(filename):
+            index = None
+            if isinstance(data, DatasetModel):
+                list_key, index, data = data.key, data.index, data.doc
+            else:
+                list_key = os.path.splitext(filename)[0]
+            doc = freeze(data)
+            items = doc.get(list_key, [])
+            fields = _dumps({k: (None if k == list_key else v) for k, v in doc.items()}
+                            if list_key in doc else dict(doc, **{list_key: None}))
+
+            with self._lock:
+                entry = self._entries.get(filename)
+
+            conn = self._conn()
+            try:
+                version = self._version(conn, filename)
+                if entry is not None and version is not None and entry[0] != version:
+                    raise ConflictError(f'{filename} was modified by another process')
+                if entry is None or version is None:
+                    # 沒有可以比對的版本：重寫整份
+                    conn.execute('DELETE FROM records WHERE dataset = ?', (filename,))
+                    old_items, old_rows = [], []
+                else:
+                    old_items, old_rows = entry[1].get(list_key, []), entry[2]
+
+                rows, written = self._write_records(conn, filename, items, old_items, old_rows)
+                new_version = (version or 0) + 1
+                conn.execute(
+                    'INSERT INTO datasets (name, list_key, fields, version, updated_at) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(name) DO UPDATE SET list_key = excluded.list_key, fields = excluded.fields, '
+                    'version = excluded.version, updated_at = excluded.updated_at',
+                    (filename, list_key, fields, new_version, time.time()))
+            except BaseException:
+                conn.execute('ROLLBACK')
+                conn.execute('BEGIN IMMEDIATE')
+                raise
+            # commit 後立即重新取得寫入鎖，mutation() 結束前其他 process 仍無法寫入
+            conn.execute('COMMIT')
+            conn.execute('BEGIN IMMEDIATE')
+
+            with self._lock:
+                self._entries[filename] = (new_version, doc, rows)
+                if index is not None:
+                    self._indexes[filename] = (doc, index)
+                self.writes += 1
+                self.rows_written += written
+            return doc
+
+    def _write_records(self, conn, filename, items, old_items, old_rows):
+        """比對新舊記錄（未修改的記錄是同一個物件），回傳 (row ids, 寫入的列數)"""
+        available = {}
+        old_position = {}
+        for pos, (record, row) in enumerate(zip(old_items, old_rows)):
+            available.setdefault(id(record), row)
+            old_position[row] = pos
+
+        rows = []
+        written = 0
+        for pos, record in enumerate(items):
+            row = available.pop(id(record), None)
+            if row is None:
+                cursor = conn.execute(
+                    'INSERT INTO records (dataset, position, id, type, year, status, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (filename, pos, *_columns(record), _dumps(record)))
+                row = cursor.lastrowid
+                written += 1
+            elif old_position[row] != pos:
+                conn.execute('UPDATE records SET position = ? WHERE row = ?', (pos, row))
+                written += 1
+            rows.append(row)
+
+        # 沒有出現在新文件中的記錄
+        removed = list(available.values())
+        if removed:
+            conn.executemany('DELETE FROM records WHERE row = ?', [(row,) for row in removed])
+            written += len(removed)
+        return rows, written
+
+    def last_modified(self, filename):
+        row = self._conn().execute('SELECT updated_at FROM datasets WHERE name = ?', (filename,)).fetchone()
+        return row[0] if row else None
+
+    def invalidate(self, filename=None):
+        with self._lock:
+            for name in ([filename] if filename else list(self._entries)):
+                self._entries.pop(name, None)
+
+    def write_json(self, dataset_dir, *filenames):
+        """把 dataset 寫成 dataset_dir 下的 JSON 檔案（未指定時寫出全部），回傳寫出的檔名"""
+        filenames = filenames or self.names()
+        for filename in filenames:
+            write_json_atomic(os.path.join(dataset_dir, filename), thaw(self.get(filename)))
+        return list(filenames)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'writes': self.writes,
+                'rows_written': self.rows_written,
+                'cached': sorted(self._entries),
+            }
+
+
+def import_json(dataset_dir, db_path):
+    """dataset/*.json → SQLite"""
+    source = DatasetStore(dataset_dir)
+    target = SqliteStore(db_path)
+    for path in sorted(glob.glob(os.path.join(dataset_dir, '*.json'))):
+        filename = os.path.basename(path)
+        doc = source.get(filename)
+        target.save(filename, doc)
+        print(f"imported {filename}: {len(doc.get(os.path.splitext(filename)[0], []))} records")
+
+
+def export_json(db_path, dataset_dir):
+    """SQLite → dataset/*.json（與 admin 寫出的 JSON 格式相同）"""
+    source = SqliteStore(db_path)
+    for filename in source.write_json(dataset_dir):
+        doc = source.get(filename)
+        print(f"exported {filename}: {len(doc.get(os.path.splitext(filename)[0], []))} records")
+
+
+def main():
+    dataset_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dataset')
+    parser = argparse.ArgumentParser(description='在 dataset/*.json 與 SQLite 之間轉換')
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('--db', default=os.path.join(dataset_dir, 'dataset.sqlite3'))
+    parser.add_argument('--dataset-dir', default=dataset_dir)
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        import_json(args.dataset_dir, args.db)
+    else:
+        export_json(args.db, args.dataset_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Static Export - 將 dataset 匯出為公開網站使用的靜態 JSON
+
+儲存後（admin 在背景合併連續的儲存）依頁面需要預先分組、排序並壓縮成 bundle，檔名含內容雜湊，
+瀏覽器可以無限期快取；manifest.json 記錄目前每個 bundle 的檔名：
+
+    dataset/dist/manifest.json
+    dataset/dist/publications.journal.3f2a9c1b7d.json
+    dataset/dist/members.8c1e0a94b2.json
+    dataset/dist/search.publications.51d0c7e2aa.json
+    ...
+
+也可以直接執行來重新產生全部 bundle：
+
+    python3 admin/static_export.py
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+
+from dataset_store import DatasetStore, write_bytes_atomic, write_json_atomic
+from search_index import build_static as build_search
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# 出版物的類型（依頁面上的分頁順序）
+PUBLICATION_TYPES = ['journal', 'conference', 'book', 'dissertation']
+
+# bundle 檔名：<名稱>.<10 碼雜湊>.json
+BUNDLE_RE = re.compile(r'^(.+)\.([0-9a-f]{10})\.json$')
+
+
+def _year_key(year):
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_publications(data):
+    """依類型分開，保持原有順序（手動新增的在最前面）"""
+    groups = {pub_type: [] for pub_type in PUBLICATION_TYPES}
+    for pub in data.get('publications', []):
+        if pub.get('type') in groups:
+            groups[pub['type']].append(pub)
+    return {f'publications.{pub_type}': pubs for pub_type, pubs in groups.items()}
+
+
+def build_members(data):
+    """依年份分組（降序），每年之內保持原有順序"""
+    by_year = {}
+    for member in data.get('members', []):
+        by_year.setdefault(member.get('year'), []).append(member)
+    years = [{'year': year, 'members': members}
+             for year, members in sorted(by_year.items(), key=lambda item: _year_key(item[0]), reverse=True)]
+    return {'members': {
+        'contact_person': data.get('contact_person'),
+        'lab_info': data.get('lab_info'),
+        'years': years,
+    }}
+
+
+def build_events(data):
+    """依日期降序排列（同一天保持原有順序）"""
+    events = sorted(data.get('events', []), key=lambda e: e.get('date', ''), reverse=True)
+    return {'events': events}
+
+
+# dataset 檔案 -> 產生 bundle 的函式（頁面資料與搜尋索引）
+SECTIONS = {
+    'publications.json': (build_publications, functools.partial(build_search, 'publications')),
+    'members.json': (build_members, functools.partial(build_search, 'members')),
+    'events.json': (build_events, functools.partial(build_search, 'events')),
+}
+
+
+def minify(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class StaticExporter:
+    """產生 bundle 與 manifest
+
+    Args:
+        out_dir: 輸出目錄
+        load: load(filename) -> dataset 文件（例如 DatasetStore.get）
+    """
+
+    def __init__(self, out_dir, load):
+        self.out_dir = out_dir
+        self.load = load
+        self._lock = threading.Lock()
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.out_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return manifest.get('bundles', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def _write_bundle(self, name, data):
+        content = minify(data)
+        filename = f"{name}.{hashlib.sha256(content).hexdigest()[:10]}.json"
+        path = os.path.join(self.out_dir, filename)
+        # 檔名含雜湊，內容相同的 bundle 不需要重寫
+        if not (os.path.exists(path) and os.path.getsize(path) == len(content)):
+            write_bytes_atomic(path, content)
+        return filename
+
+    def _prune(self, keep):
+        """刪除不在 keep 中的舊 bundle"""
+        for filename in os.listdir(self.out_dir):
+            if BUNDLE_RE.match(filename) and filename not in keep:
+                os.unlink(os.path.join(self.out_dir, filename))
+
+    def export(self, *filenames):
+        """重新產生指定 dataset 檔案的 bundle（未指定時全部），回傳 manifest 的 bundles"""
+        filenames = filenames or tuple(SECTIONS)
+        with self._lock:
+            os.makedirs(self.out_dir, exist_ok=True)
+            previous = self._read_manifest()
+            bundles = dict(previous)
+            for filename in filenames:
+                builders = SECTIONS.get(filename)
+                if builders is None:
+                    continue
+                doc = self.load(filename)
+                for build in builders:
+                    for name, data in build(doc).items():
+                        bundles[name] = self._write_bundle(name, data)
+
+            if bundles != previous:
+                # 只由 bundle 檔名決定，內容相同時 manifest 也相同（不會在 git 中產生無意義的變更）
+                write_json_atomic(os.path.join(self.out_dir, MANIFEST_NAME), {
+                    'version': MANIFEST_VERSION,
+                    'bundles': dict(sorted(bundles.items())),
+                })
+                # 保留上一版的 bundle，已載入舊 manifest 的頁面仍可讀取
+                self._prune(set(bundles.values()) | set(previous.values()))
+            return bundles
+
+
+def main():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    dataset_dir = os.path.join(base_dir, 'dataset')
+    exporter = StaticExporter(os.path.join(dataset_dir, 'dist'), DatasetStore(dataset_dir).get)
+    for name, filename in sorted(exporter.export().items()):
+        print(f"{name:<28} {filename}")
+
+
+if __name__ == '__main__':
+    main()
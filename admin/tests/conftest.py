@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""admin 模組以扁平方式互相 import（與 python3 admin/app.py 相同），測試時把 admin/ 加入 sys.path"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADMIN_DIR not in sys.path:
+    sys.path.insert(0, ADMIN_DIR)
+
+DATA_LOADER = os.path.join(os.path.dirname(ADMIN_DIR), 'data-loader.js')
+
+# 以 vm 載入 data-loader.js（document / window 只提供初始化需要的部分），計算 argv[2] 的運算式
+NODE_RUNNER = """
+const vm = require('vm');
+const fs = require('fs');
+const context = vm.createContext({
+  console,
+  document: { addEventListener() {}, querySelector() { return null; } },
+  window: { location: { pathname: '/' } },
+});
+vm.runInContext(fs.readFileSync(process.argv[1], 'utf8'), context);
+context.input = JSON.parse(fs.readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(vm.runInContext(process.argv[2], context)));
+"""
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_data_loader(expression, data=None):
+    """在 node 中執行 data-loader.js 的函式：expression 可使用 input（data 的 JSON），回傳結果"""
+    if shutil.which('node') is None:
+        pytest.skip('node is not installed')
+    result = subprocess.run(['node', '-e', NODE_RUNNER, DATA_LOADER, expression],
+                            input=json.dumps(data, ensure_ascii=False), capture_output=True,
+                            text=True, encoding='utf-8', check=True)
+    return json.loads(result.stdout)
+
+
+@pytest.fixture
+def dataset_dir(tmp_path):
+    """只有少量記錄的 dataset 目錄"""
+    directory = tmp_path / 'dataset'
+    directory.mkdir()
+    write_json(directory / 'publications.json', {'publications': [
+        {'id': 'jz2', 'type': 'journal', 'title': 'Second', 'authors': 'A', 'venue': 'J', 'year': 2024},
+        {'id': 'c1', 'type': 'conference', 'title': 'First', 'authors': 'B', 'venue': 'C', 'year': 2023},
+    ]})
+    write_json(directory / 'members.json', {
+        'contact_person': {'name': 'M One', 'email': 'one@example.com', 'photo': 'asset/member/pp.png'},
+        'lab_info': {'room': 'RB-1', 'phone': '1234'},
+        'members': [
+            {'id': 'm001', 'name': 'M One', 'degree': 'PhD', 'year': 2024, 'status': 'active',
+             'photo': 'asset/member/pp.png'},
+        ],
+    })
+    write_json(directory / 'events.json', {'events': [
+        {'id': 'e001', 'title': 'Party', 'date': '2024-01-01', 'date_display': '2024/01/01',
+         'photo': 'asset/event/a.jpg'},
+    ]})
+    write_json(directory / 'assets.json', {'assets': []})
+    return directory
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import time
+
+import pytest
+
+from app import create_app
+from conftest import ADMIN_DIR, read_json, write_json
+from image_variants import available as image_variants_available
+from sqlite_store import import_json
+
+
+def make_app(tmp_path, dataset_dir, **config):
+    return create_app(dict({
+        'TESTING': True,
+        'SITE_DIR': str(tmp_path / 'site'),
+        'DATASET_DIR': str(dataset_dir),
+        'JOURNAL_DIR': str(tmp_path / 'journal'),
+        'STATIC_EXPORT': False,
+        'IMAGE_VARIANTS': False,
+    }, **config))
+
+
+@pytest.fixture
+def app(tmp_path, dataset_dir):
+    return make_app(tmp_path, dataset_dir)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def empty_client(tmp_path, dataset_dir):
+    write_json(dataset_dir / 'publications.json', {'publications': []})
+    return make_app(tmp_path, dataset_dir).test_client()
+
+
+def test_each_app_has_its_own_services(tmp_path, dataset_dir, app):
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    (other_dir / 'events.json').write_text('{"events": []}', encoding='utf-8')
+    other = make_app(tmp_path, other_dir, JOURNAL_DIR=str(tmp_path / 'other-journal'))
+
+    services, other_services = app.extensions['admin'], other.extensions['admin']
+    for name in ('store', 'changes', 'jobs', 'image_jobs', 'exports', 'journal'):
+        assert getattr(services, name) is not getattr(other_services, name)
+    assert [event['id'] for event in app.test_client().get('/api/events').json['events']] == ['e001']
+    assert other.test_client().get('/api/events').json == {'events': []}
+
+
+def test_pages_link_blueprint_endpoints(client):
+    html = client.get('/publications').get_data(as_text=True)
+    assert 'href="/members"' in html and 'href="/events"' in html
+    assert 'active" href="/publications"' in html
+
+
+@pytest.mark.parametrize('method, kwargs', [
+    ('put', {'json': {'id': 'jz2', 'type': 'journal', 'title': 'Changed', 'authors': 'A', 'venue': 'J',
+                      'year': 2024}}),
+    ('patch', {'json': {'title': 'Changed'}, 'content_type': 'application/merge-patch+json'}),
+    ('patch', {'json': [{'op': 'replace', 'path': '/title', 'value': 'Changed'}],
+               'content_type': 'application/json-patch+json'}),
+])
+def test_if_match_rejects_stale_versions(client, dataset_dir, method, kwargs):
+    etag = client.get('/api/publications/jz2').headers['ETag']
+    send = getattr(client, method)
+
+    response = send('/api/publications/jz2', headers={'If-Match': '"stale"'}, **kwargs)
+    assert response.status_code == 412
+    assert response.json['success'] is False and f'"{response.json["version"]}"' == etag
+    assert read_json(dataset_dir / 'publications.json')['publications'][0]['title'] == 'Second'
+
+    response = send('/api/publications/jz2', headers={'If-Match': etag}, **kwargs)
+    assert response.status_code == 200 and response.json['publication']['title'] == 'Changed'
+    assert response.headers['ETag'] != etag
+    # 原本的 ETag 已經過期
+    assert send('/api/publications/jz2', headers={'If-Match': etag}, **kwargs).status_code == 412
+
+
+def test_failed_save_leaves_no_journal_entry(app, client, monkeypatch):
+    services = app.extensions['admin']
+
+    def fail(filename, data):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(services.store, 'save', fail)
+        response = client.patch('/api/events/e001', json={'title': 'Lost'})
+    assert response.status_code == 500
+    assert services.journal.entries('events.json') == []
+
+    assert client.patch('/api/events/e001', json={'title': 'Saved'}).status_code == 200
+    entries = services.journal.entries('events.json')
+    assert [(entry['op'], entry['changes'][0]['after']['title']) for entry in entries] == [('patch_event', 'Saved')]
+
+
+def test_background_export_runs_in_app_context(tmp_path, dataset_dir):
+    db_path = str(tmp_path / 'dataset.sqlite3')
+    import_json(str(dataset_dir), db_path)
+    app = make_app(tmp_path, dataset_dir, STORAGE_BACKEND='sqlite', SQLITE_PATH=db_path)
+    services = app.extensions['admin']
+    assert app.test_client().patch('/api/events/e001', json={'title': 'Mirrored'}).status_code == 200
+    assert services.exports.flush(timeout=10)
+    assert read_json(dataset_dir / 'events.json')['events'][0]['title'] == 'Mirrored'
+
+
+def test_merged_publication_can_be_exported_and_imported(client):
+    client.put('/api/publications/c1', json={'id': 'c1', 'type': 'conference', 'title': 'Second', 'authors': 'A',
+                                             'venue': 'C', 'year': 2024})
+    assert client.post('/api/publications/merge', json={'keep': 'jz2', 'remove': 'c1'}).json['publication'] == \
+        {'id': 'jz2', 'type': 'journal', 'title': 'Second', 'authors': 'A', 'venue': 'J', 'year': 2024,
+         'aliases': ['c1']}
+
+    exported = client.get('/api/publications/export?format=ndjson').get_data()
+    response = client.post('/api/publications/import?format=ndjson&dry_run=1', data=exported)
+    assert response.status_code == 200
+    assert response.json['publications'][0]['title'] == 'Second' and 'aliases' not in response.json['publications'][0]
+
+
+def test_sort_empty_publications(empty_client):
+    assert empty_client.post('/api/publications/sort').json == {'success': True, 'total': 0}
+
+
+def test_crawl_into_empty_publications(tmp_path, dataset_dir):
+    write_json(dataset_dir / 'publications.json', {'publications': []})
+    app = make_app(tmp_path, dataset_dir, DBLP_OFFLINE=True, DBLP_PARSER='xml', DBLP_HOST_DELAY=0,
+                   DBLP_CACHE_DIR=os.path.join(ADMIN_DIR, 'fixtures', 'dblp'),
+                   DBLP_STATE_FILE=str(tmp_path / 'crawl_state.json'))
+    client = app.test_client()
+    job_id = client.post('/api/publications/crawl', json={}).json['job_id']
+    deadline = time.monotonic() + 30
+    while (job := client.get(f'/api/publications/crawl/{job_id}').json)['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job['status'] == 'done', job['error']
+    assert job['result']['added'] > 0
+    assert len(read_json(dataset_dir / 'publications.json')['publications']) == job['result']['added']
+
+
+def test_import_into_empty_publications(empty_client, dataset_dir):
+    response = empty_client.post('/api/publications/import?format=ndjson',
+                                 data='{"type": "conference", "title": "T", "authors": "A", "year": 2024}\n')
+    assert response.status_code == 200 and response.json['ids'] == ['cz1']
+    assert [pub['id'] for pub in read_json(dataset_dir / 'publications.json')['publications']] == ['cz1']
+
+
+def test_batched_moves_match_single_moves_with_one_write(tmp_path, dataset_dir, app):
+    moves = [{'id': 'c1', 'before': 'jz2'}, {'id': 'jz2', 'before': 'c1'}, {'id': 'c1', 'after': 'jz2'}]
+    single_dir = tmp_path / 'single'
+    single_dir.mkdir()
+    for name in ('publications.json', 'members.json', 'events.json', 'assets.json'):
+        (single_dir / name).write_bytes((dataset_dir / name).read_bytes())
+    single = make_app(tmp_path, single_dir, JOURNAL_DIR=str(tmp_path / 'single-journal')).test_client()
+    for move in moves:
+        assert single.post('/api/publications/move', json=move).status_code == 200
+
+    store = app.extensions['admin'].store
+    writes = store.stats()['writes']
+    assert app.test_client().post('/api/publications/move', json={'moves': moves}).json == {'success': True, 'moved': 3}
+    assert store.stats()['writes'] == writes + 1
+    assert read_json(dataset_dir / 'publications.json') == read_json(single_dir / 'publications.json')
+
+
+def test_static_export_uses_configured_site_dir(tmp_path, dataset_dir):
+    real_page = os.path.join(os.path.dirname(ADMIN_DIR), 'events', 'index.html')
+    with open(real_page, 'rb') as f:
+        real_html = f.read()
+    page = tmp_path / 'site' / 'events' / 'index.html'
+    page.parent.mkdir(parents=True)
+    shutil.copy(real_page, page)
+
+    app = make_app(tmp_path, dataset_dir, STATIC_EXPORT=True, STATIC_PRERENDER=True)
+    assert app.test_client().patch('/api/events/e001', json={'title': 'Rendered here'}).status_code == 200
+    assert app.extensions['admin'].exports.flush(timeout=10)
+
+    assert 'Rendered here' in page.read_text(encoding='utf-8')
+    assert os.listdir(dataset_dir / 'dist')
+    with open(real_page, 'rb') as f:
+        assert f.read() == real_html
+
+
+@pytest.mark.skipif(not image_variants_available(), reason='Pillow is not installed')
+def test_uploads_and_variants_use_upload_folder(tmp_path, dataset_dir):
+    from PIL import Image
+
+    upload_dir = tmp_path / 'uploads'
+    app = make_app(tmp_path, dataset_dir, UPLOAD_FOLDER=str(upload_dir), IMAGE_VARIANTS=True)
+    client = app.test_client()
+    image = io.BytesIO()
+    Image.new('RGB', (400, 200), 'red').save(image, 'PNG')
+    image.seek(0)
+
+    result = client.post('/upload', data={'type': 'event', 'file': (image, 'party.png')}).json
+    assert result['success'] and result['path'].startswith('asset/event/')
+    assert (upload_dir / result['path'][len('asset/'):]).is_file()
+    assert client.get('/' + result['path']).status_code == 200
+
+    job = app.extensions['admin'].image_jobs.get(result['variants_job'])
+    deadline = time.monotonic() + 30
+    while not job.finished:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job.status == 'done', job.error
+    variants = job.result['webp']
+    assert all(path.startswith('asset/event/') and (upload_dir / path[len('asset/'):]).is_file()
+               for path in variants.values())
+    assert not (tmp_path / 'site' / 'asset').exists()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+from change_feed import ChangeFeed, format_event, record_events
+from dataset_store import freeze
+
+
+def parse(message):
+    """SSE 訊息 → (id, event, data)；註解（keepalive）與 retry 回傳 None"""
+    fields = {}
+    for line in message.strip().split('\n'):
+        name, _, value = line.partition(': ')
+        if name in ('id', 'event', 'data'):
+            fields[name] = fields.get(name, '') + value
+    if 'event' not in fields:
+        return None
+    return fields.get('id'), fields['event'], json.loads(fields['data'])
+
+
+def read(stream, count):
+    """讀取 count 則事件（略過 retry 與 keepalive）"""
+    messages = []
+    while len(messages) < count:
+        message = parse(next(stream))
+        if message is not None:
+            messages.append(message)
+    return messages
+
+
+def change(record_id, title='T'):
+    return {'type': 'update', 'id': record_id, 'record': {'id': record_id, 'title': title}}
+
+
+def test_record_events_uses_identity_and_orders_operations():
+    a, b, c = {'id': 'a'}, {'id': 'b'}, {'id': 'c'}
+    old = freeze({'contact': {'name': 'x'}, 'items': [a, b, c]})
+    new = freeze({'contact': {'name': 'y'}, 'items': [dict(c, t=1), {'id': 'd'}, old['items'][0]]})
+    events = record_events('items', old, new)
+    assert [(event['type'], event.get('id')) for event in events] == [
+        ('delete', 'b'), ('update', 'c'), ('add', 'd'), ('reorder', None), ('fields', None)]
+    assert events[2]['position'] == 1
+    assert events[3]['order'] == ['c', 'd', 'a']
+    assert events[4]['fields'] == {'contact': {'name': 'y'}}
+    assert record_events('items', new, new) == []
+
+
+def test_new_client_only_receives_later_events():
+    feed = ChangeFeed()
+    feed.publish('publications', [change('p1')])
+    stream = feed.stream(heartbeat=0.01)
+    ready = read(stream, 1)[0]
+    assert ready[1] == 'ready' and ready[0] == f'{feed.epoch}-1'
+    feed.publish('publications', [change('p2')])
+    event_id, name, data = read(stream, 1)[0]
+    assert (event_id, name, data['id'], data['dataset']) == (f'{feed.epoch}-2', 'change', 'p2', 'publications')
+
+
+def test_replay_after_last_event_id():
+    feed = ChangeFeed()
+    for record_id in ('p1', 'p2', 'p3'):
+        feed.publish('publications', [change(record_id)])
+    feed.publish('members', [change('m1')])
+    stream = feed.stream(f'{feed.epoch}-1', datasets={'publications'}, heartbeat=0.01)
+    messages = read(stream, 3)
+    assert messages[0][1] == 'ready'
+    assert [data['id'] for _, _, data in messages[1:]] == ['p2', 'p3']
+    # 被篩選掉的事件也會推進位置：之後只收到新的事件
+    feed.publish('publications', [change('p4')])
+    assert read(stream, 1)[0][2]['id'] == 'p4'
+
+
+def test_reset_for_unknown_epoch_or_future_id():
+    feed = ChangeFeed()
+    feed.publish('publications', [change('p1')])
+    for last_event_id in ('deadbeef-1', f'{feed.epoch}-99', 'garbage'):
+        _, name, _ = read(feed.stream(last_event_id, heartbeat=0.01), 1)[0]
+        assert name == 'reset'
+
+
+def test_reset_when_events_fell_out_of_history():
+    feed = ChangeFeed(history=3)
+    for i in range(5):
+        feed.publish('publications', [change(f'p{i}')])
+    stream = feed.stream(f'{feed.epoch}-1', heartbeat=0.01)
+    messages = read(stream, 2)
+    assert [name for _, name, _ in messages] == ['ready', 'reset']
+    assert messages[1][0] == f'{feed.epoch}-5'
+    feed.publish('publications', [change('p5')])
+    assert read(stream, 1)[0][2]['id'] == 'p5'
+
+
+def test_waiting_client_is_woken_and_keepalive_sent():
+    feed = ChangeFeed()
+    stream = feed.stream(heartbeat=0.01)
+    read(stream, 1)
+    assert next(stream) == ': keepalive\n\n'
+    threading.Timer(0.05, feed.publish, ('events', [change('e1')])).start()
+    assert read(stream, 1)[0][2]['id'] == 'e1'
+    assert feed.stats()['clients'] == 1
+    stream.close()
+    assert feed.stats()['clients'] == 0
+
+
+def test_format_event_splits_multiline_data():
+    message = format_event('x-1', 'change', {'text': 'a\nb'})
+    assert message.endswith('\n\n')
+    assert parse(message) == ('x-1', 'change', {'text': 'a\nb'})
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from crawl_state import CrawlState
+from dblp_parser import DblpEntry
+from conftest import read_json
+
+PUBLICATIONS = [
+    {'id': 'cz9', 'type': 'conference', 'title': 'Added by hand'},
+    {'id': 'c3', 'type': 'conference', 'title': 'C3', 'location': 'Taipei'},
+    {'id': 'c2', 'type': 'conference', 'title': 'C2', 'location': 'Tokyo'},
+    {'id': 'c1', 'type': 'conference', 'title': 'C1', 'location': 'Seoul'},
+    {'id': 'c0', 'type': 'conference', 'title': 'Not crawled yet'},
+]
+
+
+def make_state(tmp_path):
+    state = CrawlState(str(tmp_path / 'state' / 'crawl_state.json'), {'parser': 'xml'})
+    state.record([DblpEntry({'id': f'c{i}'}, None, f'conf/k{i}', f'h{i}') for i in (3, 2, 1)])
+    return state
+
+
+def visit_all(visit, keys):
+    """依序拜訪（DBLP 由新到舊），遇到 stop 時停止"""
+    results = []
+    for key in keys:
+        results.append(visit(key, 'h' + key[-1]))
+        if results[-1] == 'stop':
+            break
+    return results
+
+
+def test_stops_at_first_known_record_despite_manual_entries(tmp_path):
+    visit = make_state(tmp_path).visitor('xml', PUBLICATIONS)
+    assert visit('conf/k4', 'h4') == 'parse'
+    assert visit_all(visit, ['conf/k3', 'conf/k2', 'conf/k1']) == ['stop']
+
+
+def test_known_conference_without_location_is_parsed_before_stopping(tmp_path):
+    pubs = [dict(pub, location='') if pub['id'] == 'c2' else pub for pub in PUBLICATIONS]
+    visit = make_state(tmp_path).visitor('xml', pubs)
+    assert visit_all(visit, ['conf/k3', 'conf/k2', 'conf/k1']) == ['skip', 'parse', 'stop']
+
+
+def test_changed_records_full_crawl_and_parser_change(tmp_path):
+    state = make_state(tmp_path)
+    visit = state.visitor('xml', PUBLICATIONS)
+    assert visit('conf/k3', 'changed') == 'parse' and state.changed == ['c3']
+    assert visit_all(state.visitor('xml', PUBLICATIONS, full=True), ['conf/k3', 'conf/k2']) == ['skip', 'skip']
+    assert visit_all(state.visitor('html', PUBLICATIONS), ['conf/k3']) == ['parse']
+
+
+def test_save_and_load(tmp_path):
+    state = make_state(tmp_path)
+    state.save()
+    assert set(read_json(state.path)) == {'parser', 'crawled_at', 'entries'}
+    loaded = CrawlState.load(state.path)
+    assert loaded.entries == state.entries and loaded.parser == 'xml'
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+import dataset_store
+from dataset_store import DatasetStore
+from conftest import read_json, write_json
+
+
+@pytest.fixture
+def store(tmp_path):
+    write_json(tmp_path / 'counter.json', {'n': 0, 'counter': []})
+    return DatasetStore(str(tmp_path))
+
+
+def slow_writes(monkeypatch, delay=0.002):
+    """讓每次寫入都慢一點，增加 thread 交錯的機會"""
+    write = dataset_store.write_json_atomic
+
+    def slow(filepath, data):
+        time.sleep(delay)
+        write(filepath, data)
+
+    monkeypatch.setattr(dataset_store, 'write_json_atomic', slow)
+
+
+def test_save_is_atomic_and_cached(store, tmp_path):
+    doc = store.load('counter.json')
+    doc['n'] = 1
+    saved = store.save('counter.json', doc)
+    assert read_json(tmp_path / 'counter.json')['n'] == 1
+    assert store.get('counter.json') is saved
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_views_are_read_only(store):
+    doc = store.get('counter.json')
+    with pytest.raises(TypeError):
+        doc['n'] = 2
+    with pytest.raises(TypeError):
+        doc['counter'].append(1)
+
+
+def test_external_edit_invalidates_cache(store, tmp_path):
+    store.get('counter.json')
+    time.sleep(0.01)
+    write_json(tmp_path / 'counter.json', {'n': 41, 'counter': [1]})
+    assert store.get('counter.json')['n'] == 41
+
+
+def test_concurrent_writers_are_serialized_in_save_order(store, tmp_path, monkeypatch):
+    """持有 mutation 的整段期間（含寫入磁碟）不會有其他寫入者插入，事件依儲存順序送出"""
+    slow_writes(monkeypatch)
+    published = []
+
+    def writer():
+        for _ in range(10):
+            with store.mutation('counter.json'):
+                doc = store.load('counter.json')
+                doc['n'] += 1
+                store.save('counter.json', doc)
+                # 與 save_json() 中的 publish_changes 相同：在鎖內送出事件
+                published.append(doc['n'])
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert published == list(range(1, 81))
+    assert read_json(tmp_path / 'counter.json')['n'] == 80
+    assert store.get('counter.json')['n'] == 80
+
+
+def test_failed_write_is_not_seen_by_later_writers(store, tmp_path, monkeypatch):
+    """寫入失敗的變更不會被之後的寫入者讀到並寫入磁碟"""
+    write = dataset_store.write_json_atomic
+    started, release = threading.Event(), threading.Event()
+
+    def failing(filepath, data):
+        if data.get('bad'):
+            started.set()
+            release.wait(5)
+            raise OSError('disk full')
+        write(filepath, data)
+
+    monkeypatch.setattr(dataset_store, 'write_json_atomic', failing)
+    errors, seen = [], []
+
+    def bad_writer():
+        with store.mutation('counter.json'):
+            doc = store.load('counter.json')
+            doc['bad'] = True
+            try:
+                store.save('counter.json', doc)
+            except OSError as e:
+                errors.append(e)
+
+    def good_writer():
+        with store.mutation('counter.json'):
+            doc = store.load('counter.json')
+            seen.append(dict(doc))
+            doc['n'] += 1
+            store.save('counter.json', doc)
+
+    a = threading.Thread(target=bad_writer)
+    a.start()
+    assert started.wait(5)
+    b = threading.Thread(target=good_writer)
+    b.start()
+    time.sleep(0.05)
+    # A 還在寫入，B 必須等待
+    assert not seen
+    release.set()
+    a.join(5)
+    b.join(5)
+
+    assert len(errors) == 1
+    assert 'bad' not in seen[0]
+    on_disk = read_json(tmp_path / 'counter.json')
+    assert on_disk == {'n': 1, 'counter': []}
+    assert 'bad' not in store.get('counter.json')
+
+
+def test_failed_write_keeps_previous_cache(store, tmp_path, monkeypatch):
+    def failing(filepath, data):
+        raise OSError('disk full')
+
+    before = store.get('counter.json')
+    monkeypatch.setattr(dataset_store, 'write_json_atomic', failing)
+    doc = store.load('counter.json')
+    doc['n'] = 5
+    with pytest.raises(OSError):
+        store.save('counter.json', doc)
+    assert store.get('counter.json') is before
+    assert read_json(tmp_path / 'counter.json')['n'] == 0
+
+
+def test_mutation_is_reentrant(store):
+    with store.mutation('counter.json'):
+        with store.mutation('counter.json'):
+            doc = store.load('counter.json')
+            doc['n'] = 3
+            store.save('counter.json', doc)
+    assert store.get('counter.json')['n'] == 3
+
+
+# ==================== IdIndex / DatasetModel ====================
+
+def make_model(n):
+    items = [{'id': f'{"jz" if i % 3 else "c"}{i}'} for i in range(n)]
+    return dataset_store.DatasetModel({'items': items}, 'items', dataset_store.IdIndex(items))
+
+
+def assert_consistent(model):
+    """增量維護的索引與重新建立的索引相同"""
+    rebuilt = dataset_store.IdIndex(model.items)
+    for pos, record in enumerate(model.items):
+        assert model.position(record['id']) == pos
+    assert {record_id: model.position(record_id) for record_id in model.index.keys} == \
+        {record_id: rebuilt.position(record_id) for record_id in rebuilt.keys}
+    for prefix in ('jz', 'c', 'x'):
+        assert model.index.next_num(prefix) == rebuilt.next_num(prefix)
+
+
+@pytest.mark.parametrize('pos', [0, 1, 5, 9, 10])
+def test_insert_keeps_index_consistent(pos):
+    model = make_model(10)
+    model.insert(pos, {'id': 'x1'})
+    assert model.items[pos]['id'] == 'x1'
+    assert_consistent(model)
+
+
+@pytest.mark.parametrize('record_id', ['c0', 'jz1', 'jz5', 'c9'])
+def test_remove_keeps_index_consistent(record_id):
+    model = make_model(10)
+    assert model.remove(record_id)
+    assert model.get(record_id) is None
+    assert_consistent(model)
+
+
+def test_move_and_replace_keep_index_consistent():
+    model = make_model(10)
+    assert model.move('c9', before='c0')
+    assert model.move('jz1', after='jz8')
+    assert model.move('jz2')
+    assert not model.move('missing', before='c0')
+    assert model.replace('jz4', {'id': 'jz40'})
+    assert [record['id'] for record in model.items][:2] == ['c9', 'c0']
+    assert model.items[-1]['id'] == 'jz2'
+    assert_consistent(model)
+
+
+def test_random_operations_match_rebuilt_index():
+    import random
+    rng = random.Random(7)
+    model = make_model(50)
+    counter = 100
+    for _ in range(500):
+        op = rng.choice(('insert', 'remove', 'move', 'replace'))
+        ids = [record['id'] for record in model.items]
+        if op == 'insert' or not ids:
+            counter += 1
+            model.insert(rng.randint(0, len(ids)), {'id': f'{rng.choice(("jz", "c", "x"))}{counter}'})
+        elif op == 'remove':
+            model.remove(rng.choice(ids))
+        elif op == 'move':
+            model.move(rng.choice(ids), before=rng.choice(ids))
+        else:
+            counter += 1
+            model.replace(rng.choice(ids), {'id': f'jz{counter}'})
+        assert_consistent(model)
+
+
+def test_next_num_after_removing_the_largest():
+    model = make_model(10)
+    assert model.next_id('jz') == 'jz9'
+    model.remove('jz8')
+    model.remove('jz7')
+    assert model.next_id('jz') == 'jz6'
+    assert model.next_id('m', 3) == 'm001'
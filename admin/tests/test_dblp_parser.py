@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+import dblp_parser
+from conftest import ADMIN_DIR
+
+FIXTURE_DIR = os.path.join(ADMIN_DIR, 'fixtures', 'dblp')
+PERSON_PATH = os.path.join(FIXTURE_DIR, 'dblp.org', 'pid', 'p', 'HsingKuoKennethPao')
+
+
+@pytest.fixture(scope='module')
+def pages():
+    with open(PERSON_PATH + '.html', 'r', encoding='utf-8') as f:
+        html_text = f.read()
+    with open(PERSON_PATH + '.xml', 'rb') as f:
+        xml_content = f.read()
+    return {'html': html_text, 'lxml': html_text, 'xml': xml_content}
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with open(os.path.join(FIXTURE_DIR, 'expected.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse(name, pages, visit=None):
+    _, fn, _ = dblp_parser.PARSERS[name]
+    return fn(pages[name], visit=visit)
+
+
+def comparable(entries):
+    """key / digest 依來源格式不同，只比較解析出的出版物"""
+    return [(entry.pub, entry.conf_url) for entry in entries]
+
+
+@pytest.mark.parametrize('name', dblp_parser.available_parsers())
+def test_parser_matches_expected(name, pages, expected):
+    entries = parse(name, pages)
+    assert [entry.pub['id'] for entry in entries] == [item['id'] for item in expected]
+    for entry, item in zip(entries, expected):
+        for field, value in item.items():
+            got = entry.conf_url if field == 'conf_url' else entry.pub[field]
+            assert got == value, (item['id'], field)
+
+
+def test_backends_return_identical_entries(pages):
+    results = {name: comparable(parse(name, pages)) for name in dblp_parser.available_parsers()}
+    reference = results.pop('html')
+    for name, entries in results.items():
+        assert entries == reference, name
+
+
+@pytest.mark.parametrize('name', dblp_parser.available_parsers())
+def test_visit_skip_and_stop(name, pages):
+    """已知的記錄略過，遇到 stop 之後不再解析"""
+    entries = parse(name, pages)
+    keys = [entry.key for entry in entries]
+    skipped = {keys[1]}
+
+    def visit(key, digest):
+        if key == keys[3]:
+            return 'stop'
+        return 'skip' if key in skipped else 'parse'
+
+    partial = parse(name, pages, visit)
+    assert [entry.pub['id'] for entry in partial] == [entries[0].pub['id'], entries[2].pub['id']]
+    # 略過的記錄仍佔用編號（XML 依各類型的總數倒數）
+    assert comparable(partial) == comparable([entries[0], entries[2]])
+
+
+def test_informal_entries_are_ignored(pages):
+    ids = [entry.pub['id'] for entry in parse('xml', pages)]
+    assert all(pub_id[0] in 'jc' for pub_id in ids)
+    assert len(ids) == len(set(ids))
+
+
+def test_parse_citation_formats():
+    assert dblp_parser.parse_citation('journal', 'A: Title. Neurocomputing 647: 130485 (2025)', 'Title.') == \
+        {'venue': 'Neurocomputing', 'year': 2025, 'volume': '647', 'pages': '130485'}
+    fields = dblp_parser.parse_citation('conference', 'A: Title. IEEE BD 2024: 141-146', 'Title.')
+    assert (fields['venue'], fields['year']) == ('IEEE BD', 2024)
+
+
+def test_parse_conference_html():
+    page = ('<html><body><h1>46th EMBC 2024: Orlando, FL, USA</h1>'
+            '<cite class="data"><span itemprop="name">46th Annual International Conference of the IEEE EMBS, '
+            'EMBC 2024, Orlando, FL, USA, July 15-19, 2024</span></cite></body></html>')
+    details = dblp_parser.parse_conference_html(page)
+    assert (details['location'], details['date']) == ('Orlando, FL, USA', 'July 15-19, 2024')
+    assert details['venue'].startswith('46th Annual International Conference of the IEEE EMBS,')
+    assert details['venue'].endswith('EMBC 2024')
+    assert dblp_parser.parse_conference_html('<html><body></body></html>') is None
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import itertools
+import random
+
+from duplicates import (DuplicateIndex, alias_map, author_keys, find_duplicates, jaccard, merge_records, minhash,
+                        title_shingles)
+
+WORDS = ('deep', 'learning', 'image', 'retrieval', 'network', 'graph', 'attention', 'robust', 'video', 'semantic',
+         'segmentation', 'federated', 'privacy', 'edge', 'detection', 'transformer', 'sparse', 'adaptive')
+
+
+def make_records(n, seed=7):
+    rng = random.Random(seed)
+    return [{'id': f'c{i}', 'type': 'conference', 'year': rng.randint(2015, 2024),
+             'title': ' '.join(rng.sample(WORDS, 7)), 'authors': f'Author {i}, Chen {i % 5}'}
+            for i in range(n)]
+
+
+def test_minhash_estimates_jaccard():
+    a = title_shingles('Deep Learning for Image Retrieval on Edge Devices')
+    b = title_shingles('Deep Learning for Image Retrieval on Mobile Devices')
+    signature_a, signature_b = minhash(a), minhash(b)
+    estimate = sum(x == y for x, y in zip(signature_a, signature_b)) / len(signature_a)
+    assert abs(estimate - jaccard(a, b)) < 0.15
+    assert minhash(a) == signature_a
+
+
+def test_normalization_ignores_case_accents_and_punctuation():
+    assert title_shingles('Réseaux: Deep-Learning!') == title_shingles('reseaux deep learning')
+    assert author_keys('Ting-Feng Ho 0001, Lê Văn Minh and J. Smith') == {'ho', 'minh', 'smith'}
+
+
+def test_finds_near_duplicates():
+    records = [
+        {'id': 'cz1', 'type': 'conference', 'year': 2023, 'title': 'Robust Video Segmentation with Transformers',
+         'authors': 'T.-F. Ho, W. Chen'},
+        {'id': 'c17', 'type': 'conference', 'year': 2023, 'title': 'Robust video segmentation with transformers.',
+         'authors': 'Ting-Feng Ho 0001, Wei Chen'},
+        # 同名的期刊延伸版本
+        {'id': 'j4', 'type': 'journal', 'year': 2024, 'title': 'Robust Video Segmentation with Transformers',
+         'authors': 'Ting-Feng Ho, Wei Chen'},
+        # 年份差兩年以上不視為重複
+        {'id': 'c2', 'type': 'conference', 'year': 2020, 'title': 'Robust Video Segmentation with Transformers',
+         'authors': 'Ting-Feng Ho, Wei Chen'},
+        {'id': 'c3', 'type': 'conference', 'year': 2023, 'title': 'Sparse Graph Attention Networks',
+         'authors': 'Ting-Feng Ho'},
+    ]
+    pairs = find_duplicates(records)
+    assert [(pair.id, pair.duplicate_of) for pair in pairs] == [('c17', 'cz1')]
+    assert pairs[0].score == 1.0
+
+    index = DuplicateIndex(records)
+    assert {pair.duplicate_of for pair in index.match(dict(records[0], id='new', year=2024))} == {'c17', 'cz1'}
+
+
+def test_lsh_finds_the_same_pairs_as_brute_force_with_fewer_comparisons():
+    records = make_records(400)
+    # 每 10 筆加入一筆標題多一個字的重複記錄
+    for i in range(0, 400, 10):
+        records.append(dict(records[i], id=f'cz{i}', title=records[i]['title'].title() + ' system.'))
+
+    index = DuplicateIndex(records)
+    found = {(pair.id, pair.duplicate_of) for pair in index.pairs()}
+
+    # 相似度 0.8 時 16 個 band × 4 列的 LSH 漏掉的機率約 0.0002
+    expected = set()
+    for a, b in itertools.combinations(records, 2):
+        if abs(a['year'] - b['year']) <= 1 and jaccard(title_shingles(a['title']), title_shingles(b['title'])) >= 0.8:
+            expected.add(tuple(sorted((a['id'], b['id']))))
+    assert len(expected) >= 40
+    assert expected <= found
+    assert index.comparisons < len(records) * (len(records) - 1) / 2 / 20
+
+
+def test_add_and_remove_update_buckets():
+    records = make_records(5)
+    index = DuplicateIndex(records)
+    copy = dict(records[0], id='copy')
+    index.add(copy)
+    assert [pair.duplicate_of for pair in index.match(records[0])] == ['copy']
+    index.remove('copy')
+    assert index.match(records[0]) == []
+    assert len(index) == 5
+
+
+def test_merge_records_fills_missing_fields_and_aliases():
+    keep = {'id': 'c17', 'title': 'T', 'venue': '', 'aliases': ['c9']}
+    remove = {'id': 'cz1', 'title': 'Other', 'venue': 'ICIP', 'url': 'https://example.com', 'aliases': ['cz0']}
+    merged = merge_records(keep, remove)
+    assert merged == {'id': 'c17', 'title': 'T', 'venue': 'ICIP', 'aliases': ['c9', 'cz1', 'cz0'],
+                      'url': 'https://example.com'}
+    assert keep['aliases'] == ['c9']
+    assert alias_map([merged]) == {'c9': 'c17', 'cz1': 'c17', 'cz0': 'c17'}
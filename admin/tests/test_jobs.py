@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from jobs import DebouncedTask, JobRunner
+
+
+def test_debounced_task_coalesces_triggers():
+    calls = []
+    task = DebouncedTask(calls.append, delay=0.05)
+    for name in ('b.json', 'a.json', 'b.json'):
+        task.trigger(name)
+    assert not calls
+    assert task.flush(5)
+    assert calls == [['a.json', 'b.json']]
+
+
+def test_debounced_task_runs_again_for_triggers_during_a_run():
+    calls = []
+    started, release = threading.Event(), threading.Event()
+
+    def run(keys):
+        calls.append(keys)
+        started.set()
+        release.wait(5)
+
+    task = DebouncedTask(run, delay=0.01)
+    task.trigger('a.json')
+    assert started.wait(5)
+    task.trigger('b.json')
+    release.set()
+    assert task.flush(5)
+    assert calls == [['a.json'], ['b.json']]
+    assert task.runs == 2
+
+
+def test_debounced_task_max_delay():
+    calls = []
+    task = DebouncedTask(calls.append, delay=0.2, max_delay=0.1)
+    start = time.monotonic()
+    task.trigger('a.json')
+    while not calls and time.monotonic() - start < 5:
+        task.trigger('a.json')
+        time.sleep(0.01)
+    assert calls and time.monotonic() - start < 1
+
+
+def test_debounced_task_survives_errors():
+    calls = []
+
+    def run(keys):
+        calls.append(keys)
+        raise RuntimeError('boom')
+
+    task = DebouncedTask(run, delay=0)
+    task.trigger('a.json')
+    assert task.flush(5)
+    task.trigger('b.json')
+    assert task.flush(5)
+    assert calls == [['a.json'], ['b.json']]
+
+
+def test_job_runner_reports_progress_and_result():
+    runner = JobRunner()
+
+    def work(job, n):
+        job.update(done=n)
+        return n * 2
+
+    job = runner.submit('double', work, 21)
+    for _ in range(500):
+        if job.finished:
+            break
+        time.sleep(0.01)
+    assert job.to_dict()['status'] == 'done'
+    assert job.result == 42 and job.progress == {'done': 21}
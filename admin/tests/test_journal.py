@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import journal as journal_module
+from dataset_store import freeze
+from journal import Journal, JournalConflict, JournalError
+
+FILENAME = 'publications.json'
+
+
+def doc(*records, **fields):
+    return freeze(dict(fields, publications=[{'id': record_id, 'title': title} for record_id, title in records]))
+
+
+def edit(current, record_id, title):
+    """copy-on-write 修改一筆記錄（其他記錄仍是同一個物件）"""
+    items = [dict(record, title=title) if record['id'] == record_id else record for record in current['publications']]
+    return freeze(dict(current, publications=items))
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return Journal(str(tmp_path / 'journal'), snapshot_every=3, keep_snapshots=2)
+
+
+def save_all(journal, *versions):
+    for old, new in zip(versions, versions[1:]):
+        journal.record(FILENAME, old, new, 'save')
+
+
+def test_record_only_changed_records(journal):
+    v0 = doc(('a', 'A'), ('b', 'B'))
+    v1 = edit(v0, 'b', 'B2')
+    entry = journal.record(FILENAME, v0, v1, 'edit', user='x')
+    assert entry['seq'] == 1 and entry['op'] == 'edit' and entry['user'] == 'x'
+    assert entry['changes'] == [{'id': 'b', 'pos': 1, 'old_pos': 1, 'before': {'id': 'b', 'title': 'B'},
+                                 'after': {'id': 'b', 'title': 'B2'}}]
+    assert journal.record(FILENAME, v1, v1, 'noop') is None
+
+
+def test_undo_redo(journal):
+    v0 = doc(('a', 'A'))
+    v1 = edit(v0, 'a', 'A1')
+    v2 = freeze({'publications': [{'id': 'c', 'title': 'C'}, *v1['publications']]})
+    save_all(journal, v0, v1, v2)
+
+    undone, meta = journal.undo(FILENAME, v2)
+    assert undone == v1 and meta == {'undoes': 2}
+    journal.record(FILENAME, v2, undone, 'undo', **meta)
+    undone2, meta = journal.undo(FILENAME, undone)
+    assert undone2 == v0 and meta == {'undoes': 1}
+    journal.record(FILENAME, undone, undone2, 'undo', **meta)
+
+    redone, meta = journal.redo(FILENAME, undone2)
+    assert redone == v1 and meta == {'redoes': 1}
+    journal.record(FILENAME, undone2, redone, 'redo', **meta)
+    assert journal.stacks(FILENAME) == ([1], [2])
+
+    # 新的變更清除可重做的紀錄
+    v3 = edit(redone, 'a', 'A3')
+    journal.record(FILENAME, redone, v3, 'save')
+    assert journal.stacks(FILENAME)[1] == []
+    with pytest.raises(JournalError):
+        journal.redo(FILENAME, v3)
+
+
+def test_undo_conflict_when_record_changed_later(journal):
+    v0 = doc(('a', 'A'))
+    v1 = edit(v0, 'a', 'A1')
+    journal.record(FILENAME, v0, v1, 'save')
+    with pytest.raises(JournalConflict):
+        journal.undo(FILENAME, edit(v1, 'a', 'changed elsewhere'))
+
+
+def test_rollback_across_snapshots(journal):
+    versions = [doc(('a', 'A0'), ('b', 'B'))]
+    for i in range(1, 11):
+        versions.append(edit(versions[-1], 'a', f'A{i}'))
+    save_all(journal, *versions)
+
+    # snapshot_every=3、keep_snapshots=2：只保留 seq 6 與 9 的快照
+    assert sorted(name for name in os.listdir(os.path.join(journal.journal_dir, 'publications'))
+                  if name.endswith('.snapshot.json')) == ['00000006.snapshot.json', '00000009.snapshot.json']
+    assert [entry['seq'] for entry in journal.entries(FILENAME)] == [7, 8, 9, 10]
+    for seq in (6, 7, 8, 10):
+        assert journal.state_at(FILENAME, seq=seq) == versions[seq]
+    with pytest.raises(JournalError):
+        journal.state_at(FILENAME, seq=3)
+
+    ts = journal.entries(FILENAME)[1]['ts']
+    assert journal.state_at(FILENAME, ts=ts) == versions[8]
+
+
+def test_reopen_matches_memory(journal, tmp_path):
+    versions = [doc(('a', 'A0'))]
+    for i in range(1, 6):
+        versions.append(edit(versions[-1], 'a', f'A{i}'))
+    save_all(journal, *versions)
+
+    reopened = Journal(journal.journal_dir, snapshot_every=3, keep_snapshots=2)
+    assert reopened.entries(FILENAME) == journal.entries(FILENAME)
+    assert reopened.recover(FILENAME) == versions[-1]
+    # 重新開啟後的記錄接在原本的 seq 之後，沒有 external 紀錄
+    entry = reopened.record(FILENAME, versions[-1], edit(versions[-1], 'a', 'A6'), 'save')
+    assert entry['seq'] == 6
+
+
+def test_external_change_is_recorded_before_next_entry(journal):
+    v0 = doc(('a', 'A'))
+    v1 = edit(v0, 'a', 'A1')
+    journal.record(FILENAME, v0, v1, 'save')
+    outside = edit(v1, 'a', 'edited by hand')
+    journal.record(FILENAME, outside, edit(outside, 'a', 'A2'), 'save')
+    entries = journal.entries(FILENAME)
+    assert [entry['op'] for entry in entries] == ['save', 'external', 'save']
+    assert entries[1]['changes'][0]['after']['title'] == 'edited by hand'
+
+
+def test_version_is_hashed_once_per_save(journal, monkeypatch):
+    calls = []
+    version = journal_module.doc_version
+    monkeypatch.setattr(journal_module, 'doc_version', lambda d: calls.append(1) or version(d))
+    v0 = doc(('a', 'A'))
+    v1 = edit(v0, 'a', 'A1')
+    journal.record(FILENAME, v0, v1, 'save')
+    calls.clear()
+    journal.record(FILENAME, v1, edit(v1, 'a', 'A2'), 'save')
+    assert len(calls) == 1
+
+
+def test_entries_are_not_reread(journal, monkeypatch):
+    v0 = doc(('a', 'A'))
+    save_all(journal, v0, edit(v0, 'a', 'A1'))
+    journal.entries(FILENAME)
+    monkeypatch.setattr(journal, '_read_entries', lambda *args: pytest.fail('segment reread'))
+    v2 = edit(edit(v0, 'a', 'A1'), 'a', 'A2')
+    journal.record(FILENAME, edit(v0, 'a', 'A1'), v2, 'save')
+    assert len(journal.entries(FILENAME)) == 2
+    assert journal.stacks(FILENAME) == ([1, 2], [])
+
+
+def test_partial_last_line_is_dropped_on_reopen(journal):
+    v0 = doc(('a', 'A'))
+    v1 = edit(v0, 'a', 'A1')
+    journal.record(FILENAME, v0, v1, 'save')
+    log_path = os.path.join(journal.journal_dir, 'publications', '00000000.log')
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write('{"seq": 2, "truncat')
+
+    reopened = Journal(journal.journal_dir)
+    v2 = edit(v1, 'a', 'A2')
+    reopened.record(FILENAME, v1, v2, 'save')
+    assert [entry['seq'] for entry in Journal(journal.journal_dir).entries(FILENAME)] == [1, 2]
+    assert Journal(journal.journal_dir).recover(FILENAME) == v2
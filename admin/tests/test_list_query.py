@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from list_query import ListQuery, QueryError, decode_cursor, is_query, parse_query
+
+TYPES = ('journal', 'conference', 'book')
+
+
+def make_items(n=50, seed=1):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        record = {'id': f'p{i:03d}', 'type': rng.choice(TYPES), 'title': f'Title {rng.randint(0, 20)}'}
+        if i % 7:
+            record['year'] = rng.randint(2015, 2024)
+        items.append(record)
+    return items
+
+
+def query(**params):
+    return parse_query(MultiDict(params))
+
+
+def expected(items, q):
+    """不使用索引的參考實作"""
+    result = []
+    for record in items:
+        if any(str(record.get(field)) not in values for field, values in q.filters.items()):
+            continue
+        year = record.get('year')
+        if q.year_min is not None and (year is None or year < q.year_min):
+            continue
+        if q.year_max is not None and (year is None or year > q.year_max):
+            continue
+        result.append(record)
+    for field, descending in reversed(q.sort):
+        present = [r for r in result if r.get(field) is not None]
+        missing = [r for r in result if r.get(field) is None]
+        # reverse=True 仍是穩定排序：同值的記錄保持文件順序
+        present.sort(key=lambda r: r[field], reverse=descending)
+        result = present + missing
+    return result
+
+
+def pages(items, params, engine=None):
+    """依 next_cursor 取得所有頁面"""
+    engine = engine or ListQuery()
+    collected = []
+    cursor = None
+    while True:
+        args = dict(params, **({'cursor': cursor} if cursor else {}))
+        page = engine.run('publications', items, query(**args))
+        collected.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return collected, page.total
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'type': 'journal'},
+    {'type': 'journal,book', 'year_min': '2018'},
+    {'year': '2020'},
+    {'sort': '-year'},
+    {'sort': 'year,-title'},
+    {'type': 'conference', 'sort': '-year,title'},
+])
+@pytest.mark.parametrize('limit', ['1', '3', '500'])
+def test_cursor_pages_match_reference(params, limit):
+    items = make_items()
+    q = query(**params)
+    got, total = pages(items, dict(params, limit=limit))
+    want = expected(items, q)
+    assert total == len(want)
+    assert [r['id'] for r in got] == [r['id'] for r in want]
+
+
+def test_records_without_sort_field_are_last():
+    items = make_items()
+    for params in ({'sort': 'year'}, {'sort': '-year'}):
+        got, _ = pages(items, dict(params, limit='4'))
+        missing = [r for r in got if 'year' not in r]
+        assert missing and got[-len(missing):] == missing
+
+
+def test_cursor_survives_insert_before_it():
+    """文件在兩頁之間有新增記錄：下一頁從 cursor 的記錄之後繼續，不重複也不遺漏"""
+    items = make_items(10)
+    engine = ListQuery()
+    first = engine.run('publications', items, query(limit='4'))
+    changed = [{'id': 'new', 'type': 'journal'}] + items
+    rest = engine.run('publications', changed, query(limit='100', cursor=first.next_cursor))
+    assert [r['id'] for r in first.items + rest.items] == [r['id'] for r in items]
+
+
+def test_projection_keeps_id_and_skips_missing_fields():
+    items = make_items(10)
+    page = ListQuery().run('publications', items, query(fields='year,title'))
+    assert all(list(r)[0] == 'id' and set(r) <= {'id', 'year', 'title'} for r in page.items)
+    assert 'year' not in page.items[0]  # p000 沒有 year
+    assert page.items[1] == {'id': 'p001', 'year': items[1]['year'], 'title': items[1]['title']}
+
+
+def test_index_is_reused_until_document_changes():
+    items = make_items(10)
+    engine = ListQuery()
+    assert engine.index('publications', items) is engine.index('publications', items)
+    assert engine.index('publications', list(items)) is not engine.index('publications', items)
+
+
+@pytest.mark.parametrize('params', [
+    {'limit': '0'},
+    {'limit': 'ten'},
+    {'year': 'x'},
+    {'sort': 'title;drop'},
+    {'fields': 'a b'},
+    {'cursor': '!!!'},
+])
+def test_invalid_params(params):
+    with pytest.raises(QueryError):
+        query(**params)
+
+
+def test_cursor_must_match_sort():
+    items = make_items(10)
+    page = ListQuery().run('publications', items, query(sort='-year', limit='2'))
+    assert decode_cursor(page.next_cursor, (('year', True),))['id'] == page.items[-1]['id']
+    with pytest.raises(QueryError):
+        query(sort='year', cursor=page.next_cursor)
+
+
+def test_is_query():
+    assert not is_query(MultiDict({'callback': 'x'}))
+    assert is_query(MultiDict({'fields': 'id'}))
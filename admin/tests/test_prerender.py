@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""預先渲染的 HTML 必須與 data-loader.js 在瀏覽器中產生的相同（以 node 執行 data-loader.js 比對）"""
+import os
+
+import pytest
+
+from dataset_store import DatasetStore, thaw
+from prerender import Prerenderer, render_event, render_member_year, render_photo, render_publication
+from static_export import build_events, build_members, build_publications
+from conftest import read_json, run_data_loader
+
+SITE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VARIANTS = {
+    'avif': {'160': 'asset/member/李 小明.160w.avif', '320': 'asset/member/李 小明.320w.avif'},
+    'webp': {'160': 'asset/member/李 小明.160w.webp'},
+    'jpeg': {'160': 'asset/member/李 小明.160w.jpg'},
+}
+
+PUBLICATIONS = [
+    {'id': 'jz1', 'type': 'journal', 'authors': 'A. Chen, Ting-Feng Ho and B. Lin', 'title': 'T1', 'venue': 'J1',
+     'volume': '12', 'pages': '1-10', 'year': 2024, 'highlight_author': 'Ting-Feng Ho', 'note': 'SCI'},
+    {'id': 'jz2', 'type': 'journal', 'authors': 'A. Chen', 'title': 'T2', 'venue': 'J2', 'year': 2023,
+     'highlight_author': 'Nobody'},
+    {'id': 'cz1', 'type': 'conference', 'authors': 'Ting-Feng Ho', 'title': 'T3', 'venue': 'C1', 'year': 2022,
+     'location': 'Taipei, Taiwan', 'date': 'Dec. 2022', 'highlight_author': 'Ting-Feng Ho'},
+    {'id': 'cz2', 'type': 'conference', 'authors': 'B. Lin', 'title': 'T4', 'venue': 'C2', 'year': 2021,
+     'highlight_author': 'Ting-Feng Ho'},
+    {'id': 'cz3', 'type': 'conference', 'authors': 'B. Lin', 'title': 'T6', 'venue': 'C3', 'year': 2019},
+    {'id': 'bz1', 'type': 'book', 'authors': 'B. Lin', 'title': 'T5', 'venue': 'Springer', 'year': 2020,
+     'editors': 'E. Editor', 'publisher': 'Springer', 'highlight_author': 'Ting-Feng Ho'},
+]
+
+MEMBERS = {'contact_person': {'name': 'C', 'email': 'c@example.com', 'photo': 'asset/member/c.png'},
+           'members': [
+               {'id': 'm001', 'name': 'Li', 'name_zh': '李小明', 'degree': 'PhD', 'year': 2024, 'status': 'active',
+                'photo': 'asset/member/李 小明.png', 'photo_variants': VARIANTS,
+                'linkedin': 'https://linkedin.com/in/x', 'website': 'https://example.com'},
+               {'id': 'm002', 'name': 'Wang', 'degree': 'Master', 'year': 2022, 'status': 'graduated',
+                'photo': 'asset/member/wang.png'},
+               {'id': 'm003', 'name': 'Chen', 'degree': 'Master', 'year': 2024, 'status': 'active',
+                'photo': 'asset/member/chen.png', 'photo_variants': {'webp': {'320': 'asset/member/chen.320w.webp'},
+                                                                     'png': {'320': 'asset/member/chen.320w.png'}}},
+           ]}
+
+EVENTS = [
+    {'id': 'e001', 'title': 'Lunch', 'date': '2024-01-17', 'date_display': '2024 Jan 17',
+     'photo': 'asset/event/Team Lunch_20240117.png'},
+    {'id': 'e002', 'title': '迎新', 'date': '2024-09-01', 'date_display': '2024 Sep 1', 'photo': 'asset/event/a.jpg',
+     'photo_variants': {'webp': {'480': 'asset/event/a.480w.webp'}, 'jpeg': {'480': 'asset/event/a.480w.jpg'}}},
+]
+
+
+def test_render_photo_matches():
+    args = [['asset/x y.png', None, 'class="a"', '50vw'], ['asset/李 小明.png', VARIANTS, 'class="b"', '100vw']]
+    assert run_data_loader('input.map(args => renderPhoto(...args))', args) == \
+        [render_photo(*arg) for arg in args]
+
+
+def check_publications(doc):
+    groups = build_publications(doc)
+    pubs = [pub for name, items in groups.items() for pub in items]
+    assert run_data_loader('input.map(renderPublication)', pubs) == [render_publication(pub) for pub in pubs]
+
+
+def check_members(doc):
+    years = build_members(doc)['members']['years']
+    assert run_data_loader('input.map(group => renderMemberYear(group.year, group.members))', years) == \
+        [render_member_year(group['year'], group['members']) for group in years]
+
+
+def check_events(doc):
+    events = build_events(doc)['events']
+    assert run_data_loader('input.map(renderEvent)', events) == [render_event(event) for event in events]
+
+
+def test_fixture_records_match_data_loader():
+    check_publications({'publications': PUBLICATIONS})
+    check_members(MEMBERS)
+    check_events({'events': EVENTS})
+
+
+@pytest.mark.parametrize('filename, check', [
+    ('publications.json', check_publications),
+    ('members.json', check_members),
+    ('events.json', check_events),
+])
+def test_site_dataset_matches_data_loader(filename, check):
+    check(read_json(os.path.join(SITE_DIR, 'dataset', filename)))
+
+
+def test_render_replaces_regions_and_skips_unchanged_pages(tmp_path, dataset_dir):
+    page = tmp_path / 'events' / 'index.html'
+    page.parent.mkdir()
+    page.write_text('<head><!-- prerender:bundles --><!-- /prerender:bundles --></head>\n'
+                    '<div class="waterfall"><!-- prerender:events -->STALE<!-- /prerender:events --></div>\n',
+                    encoding='utf-8')
+    store = DatasetStore(str(dataset_dir))
+    prerenderer = Prerenderer(str(tmp_path), store.get)
+
+    assert prerenderer.render('events.json', bundles={'events': 'events.abc.json'}) == ['events/index.html']
+    html = page.read_text(encoding='utf-8')
+    assert '<meta name="prerendered-bundles" content="events.abc.json">' in html
+    assert render_event(thaw(store.get('events.json'))['events'][0]) in html
+    assert 'STALE' not in html
+    assert prerenderer.render('events.json', bundles={'events': 'events.abc.json'}) == []
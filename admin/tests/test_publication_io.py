@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+from duplicates import merge_records
+from publication_io import (FIELDS, PublicationFormatError, detect_format, export_publications, read_publications,
+                            validate_publication)
+
+PUBLICATIONS = [
+    {'id': 'j3', 'type': 'journal', 'authors': 'Hsing-Kuo Pao, Ting-Feng Ho', 'title': 'Graph & Co: 100% {robust}',
+     'venue': 'IEEE Trans. Image Process.', 'year': 2024, 'volume': '33', 'pages': '1-12', 'note': 'SCI',
+     'highlight_author': 'Hsing-Kuo Pao'},
+    {'id': 'cz2', 'type': 'conference', 'authors': 'Lê Văn Minh, Hsing-Kuo Pao', 'title': 'Edge "Detection"',
+     'venue': 'ICIP', 'year': 2023, 'location': 'Kuala Lumpur, Malaysia', 'date': 'Oct. 2023',
+     'highlight_author': 'Hsing-Kuo Pao'},
+    {'id': 'bz1', 'type': 'book', 'authors': 'Hsing-Kuo Pao', 'title': 'Chapter', 'venue': 'Handbook', 'year': 2020,
+     'editors': 'A. Editor, B. Editor', 'publisher': 'Springer', 'highlight_author': 'Hsing-Kuo Pao'},
+]
+
+
+def round_trip(fmt, pubs):
+    text = ''.join(export_publications(fmt, pubs, chunk_size=10))
+    results = list(read_publications(fmt, io.StringIO(text, newline='')))
+    assert [error for _, _, error in results] == [None] * len(pubs)
+    return [pub for _, pub, _ in results]
+
+
+def expected(pub):
+    return {field: value for field, value in pub.items() if field in FIELDS and field != 'id'}
+
+
+@pytest.mark.parametrize('fmt', ['bibtex', 'csv', 'ndjson'])
+def test_export_then_import_keeps_content(fmt):
+    assert round_trip(fmt, PUBLICATIONS) == [expected(pub) for pub in PUBLICATIONS]
+
+
+@pytest.mark.parametrize('fmt', ['bibtex', 'csv', 'ndjson'])
+def test_merged_record_round_trips(fmt):
+    duplicate = {'id': 'c17', 'type': 'conference', 'authors': 'Lê Văn Minh, Hsing-Kuo Pao',
+                 'title': 'Edge Detection', 'venue': '', 'year': 2023, 'pages': '5-9', 'url': 'https://example.com',
+                 'aliases': ['c9']}
+    merged = merge_records(PUBLICATIONS[1], duplicate)
+    assert merged['aliases'] == ['c17', 'c9'] and merged['url'] == 'https://example.com'
+    assert round_trip(fmt, [merged]) == [expected(merged)]
+
+
+def test_validate_publication():
+    pub = validate_publication({'id': 'x', 'title': ' T ', 'authors': 'A. Chen, Hsing-Kuo Pao', 'year': '2024',
+                                'note': '  '}, highlights=('Hsing-Kuo Pao',))
+    assert pub == {'title': 'T', 'authors': 'A. Chen, Hsing-Kuo Pao', 'year': 2024, 'type': 'journal', 'venue': '',
+                   'highlight_author': 'Hsing-Kuo Pao'}
+    for record, message in [
+        ({'title': 'T', 'authors': 'A', 'year': 2024, 'aliases': []}, 'Unknown fields: aliases'),
+        ({'title': 'T', 'authors': 'A'}, 'Missing fields: year'),
+        ({'title': 'T', 'authors': 'A', 'year': 1800}, 'Invalid year'),
+        ({'title': 'T', 'authors': 'A', 'year': True}, 'Invalid year'),
+        ({'title': 'T', 'authors': 'A', 'year': 2024, 'type': 'poster'}, 'Invalid type'),
+        ({'title': 'T', 'authors': ['A'], 'year': 2024}, 'authors must be a string'),
+        (['T'], 'Record must be an object'),
+    ]:
+        with pytest.raises(PublicationFormatError, match=message):
+            validate_publication(record)
+
+
+def test_bibtex_parser():
+    text = '''@comment{ignored}
+@string{tip = "IEEE Trans. " # "Image Process."}
+@ARTICLE{pao24,
+  author = {Pao, Hsing-Kuo and M{\\"u}ller, J. and van der Berg, Jr, Anna},
+  title = {{Deep} Learning \\& {\\'E}tude},
+  journal = tip,
+  year = 2024,
+  month = oct,
+  pages = "1--12",
+}
+@inproceedings(c1, author = {A. Chen}, title = {T (2)}, booktitle = {ICIP}, address = {Taipei}, year = {2023})
+@misc{m1, title = {Unsupported}}
+'''
+    results = list(read_publications('bibtex', io.StringIO(text)))
+    assert [(line, error is None) for line, _, error in results] == [(3, True), (11, True), (12, False)]
+    assert results[0][1] == {'type': 'journal', 'authors': 'Hsing-Kuo Pao, J. Müller, Anna van der Berg Jr',
+                             'title': 'Deep Learning & Étude', 'venue': 'IEEE Trans. Image Process.',
+                             'year': 2024, 'pages': '1--12'}
+    assert results[1][1] == {'type': 'conference', 'authors': 'A. Chen', 'title': 'T (2)', 'venue': 'ICIP',
+                             'year': 2023, 'location': 'Taipei'}
+    assert 'Unsupported entry type: @misc' in str(results[2][2])
+
+
+def test_bibtex_unterminated_entry_stops_reading():
+    with pytest.raises(PublicationFormatError) as error:
+        list(read_publications('bibtex', io.StringIO('@article{a, title = {T}, year = 2024}\n@article{b,\n  title = {')))
+    assert error.value.line == 2
+
+
+def test_csv_parser():
+    text = 'type,title,authors,year\nconference,T1,A,2023\njournal,T2,B,20x4\njournal,T3,C,2024,extra\n\n'
+    results = list(read_publications('csv', io.StringIO(text, newline='')))
+    assert results[0] == (2, {'type': 'conference', 'title': 'T1', 'authors': 'A', 'year': 2023, 'venue': ''}, None)
+    assert [(line, str(error)) for line, _, error in results[1:]] == [(3, "Invalid year: '20x4'"),
+                                                                      (4, 'Too many columns')]
+    with pytest.raises(PublicationFormatError, match='Unknown columns: aliases'):
+        list(read_publications('csv', io.StringIO('title,aliases\nT,c1\n')))
+
+
+def test_ndjson_parser():
+    text = '{"title": "T", "authors": "A", "year": 2024}\n\nnot json\n{"title": "T", "authors": "A", "year": 2024, "aliases": ["c1"]}\n'
+    results = list(read_publications('ndjson', io.StringIO(text)))
+    assert [line for line, _, _ in results] == [1, 3, 4]
+    assert results[0][1]['title'] == 'T'
+    assert str(results[1][2]).startswith('Invalid JSON')
+    assert str(results[2][2]) == 'Unknown fields: aliases'
+
+
+def test_detect_format():
+    assert detect_format('refs.BIB') == 'bibtex'
+    assert detect_format('pubs.jsonl') == 'ndjson'
+    assert detect_format(None, 'text/csv; charset=utf-8') == 'csv'
+    assert detect_format('upload', 'text/x-bibtex') == 'bibtex'
+    assert detect_format('notes.txt', 'text/plain') is None
+
+
+def test_export_is_chunked():
+    chunks = list(export_publications('ndjson', PUBLICATIONS * 10, chunk_size=1000))
+    assert len(chunks) > 1 and all(chunk.endswith('\n') for chunk in chunks)
+    assert ''.join(chunks) == ''.join(export_publications('ndjson', PUBLICATIONS * 10))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from record_patch import PatchError, PatchTestFailed, apply_json_patch, apply_merge_patch, record_version
+
+# RFC 6902 附錄 A 的範例：(文件, patch, 結果)
+RFC6902_EXAMPLES = [
+    ({'foo': 'bar'}, [{'op': 'add', 'path': '/baz', 'value': 'qux'}], {'baz': 'qux', 'foo': 'bar'}),
+    ({'foo': ['bar', 'baz']}, [{'op': 'add', 'path': '/foo/1', 'value': 'qux'}], {'foo': ['bar', 'qux', 'baz']}),
+    ({'baz': 'qux', 'foo': 'bar'}, [{'op': 'remove', 'path': '/baz'}], {'foo': 'bar'}),
+    ({'foo': ['bar', 'qux', 'baz']}, [{'op': 'remove', 'path': '/foo/1'}], {'foo': ['bar', 'baz']}),
+    ({'baz': 'qux', 'foo': 'bar'}, [{'op': 'replace', 'path': '/baz', 'value': 'boo'}], {'baz': 'boo', 'foo': 'bar'}),
+    ({'foo': {'bar': 'baz', 'waldo': 'fred'}, 'qux': {'corge': 'grault'}},
+     [{'op': 'move', 'from': '/foo/waldo', 'path': '/qux/thud'}],
+     {'foo': {'bar': 'baz'}, 'qux': {'corge': 'grault', 'thud': 'fred'}}),
+    ({'foo': ['all', 'grass', 'cows', 'eat']}, [{'op': 'move', 'from': '/foo/1', 'path': '/foo/3'}],
+     {'foo': ['all', 'cows', 'eat', 'grass']}),
+    ({'baz': 'qux', 'foo': ['a', 2, 'c']},
+     [{'op': 'test', 'path': '/baz', 'value': 'qux'}, {'op': 'test', 'path': '/foo/1', 'value': 2}],
+     {'baz': 'qux', 'foo': ['a', 2, 'c']}),
+    ({'foo': 'bar'}, [{'op': 'add', 'path': '/child', 'value': {'grandchild': {}}}],
+     {'foo': 'bar', 'child': {'grandchild': {}}}),
+    ({'foo': ['bar']}, [{'op': 'add', 'path': '/foo/-', 'value': ['abc', 'def']}], {'foo': ['bar', ['abc', 'def']]}),
+    ({'/': 9, '~1': 10}, [{'op': 'test', 'path': '/~01', 'value': 10}], {'/': 9, '~1': 10}),
+    ({'foo': 'bar'}, [{'op': 'copy', 'from': '/foo', 'path': '/baz'}], {'foo': 'bar', 'baz': 'bar'}),
+    ({'foo': 1}, [{'op': 'replace', 'path': '', 'value': {'bar': 2}}], {'bar': 2}),
+]
+
+
+@pytest.mark.parametrize('doc, patch, expected', RFC6902_EXAMPLES)
+def test_rfc6902_examples(doc, patch, expected):
+    assert apply_json_patch(doc, patch) == expected
+
+
+@pytest.mark.parametrize('doc, patch', [
+    ({'baz': 'qux'}, [{'op': 'test', 'path': '/baz', 'value': 'bar'}]),
+    ({'/': 9, '~1': 10}, [{'op': 'test', 'path': '/~01', 'value': '10'}]),
+    ({'flag': True}, [{'op': 'test', 'path': '/flag', 'value': 1}]),
+    ({'n': 0}, [{'op': 'test', 'path': '/n', 'value': False}]),
+])
+def test_failed_test_operation(doc, patch):
+    with pytest.raises(PatchTestFailed):
+        apply_json_patch(doc, patch)
+
+
+def test_numbers_compare_by_value():
+    assert apply_json_patch({'n': 1}, [{'op': 'test', 'path': '/n', 'value': 1.0}]) == {'n': 1}
+
+
+@pytest.mark.parametrize('doc, patch', [
+    ({'foo': 'bar'}, [{'op': 'add', 'path': '/baz/bat', 'value': 'qux'}]),
+    ({'foo': 'bar'}, [{'op': 'remove', 'path': '/missing'}]),
+    ({'foo': 'bar'}, [{'op': 'replace', 'path': '/missing', 'value': 1}]),
+    ({'foo': ['a']}, [{'op': 'add', 'path': '/foo/01', 'value': 'b'}]),
+    ({'foo': ['a']}, [{'op': 'add', 'path': '/foo/2', 'value': 'b'}]),
+    ({'foo': {'bar': 1}}, [{'op': 'move', 'from': '/foo', 'path': '/foo/bar/baz'}]),
+    ({'foo': 'bar'}, [{'op': 'add', 'path': 'foo', 'value': 1}]),
+    ({'foo': 'bar'}, [{'op': 'add', 'path': '/x'}]),
+    ({'foo': 'bar'}, [{'op': 'frobnicate', 'path': '/foo'}]),
+    ({'foo': 'bar'}, {'op': 'add', 'path': '/x', 'value': 1}),
+    ({'foo': 'bar'}, [{'op': 'remove', 'path': ''}]),
+])
+def test_invalid_patches(doc, patch):
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, patch)
+
+
+def test_patch_is_atomic_and_does_not_modify_input():
+    record = {'id': 'p1', 'tags': ['a']}
+    with pytest.raises(PatchError):
+        apply_json_patch(record, [{'op': 'add', 'path': '/tags/-', 'value': 'b'},
+                                  {'op': 'remove', 'path': '/missing'}])
+    assert record == {'id': 'p1', 'tags': ['a']}
+    patched = apply_json_patch(record, [{'op': 'add', 'path': '/tags/-', 'value': 'b'}])
+    assert patched == {'id': 'p1', 'tags': ['a', 'b']} and record['tags'] == ['a']
+
+
+# RFC 7396 附錄 A 的範例
+@pytest.mark.parametrize('target, patch, expected', [
+    ({'a': 'b'}, {'a': 'c'}, {'a': 'c'}),
+    ({'a': 'b'}, {'b': 'c'}, {'a': 'b', 'b': 'c'}),
+    ({'a': 'b'}, {'a': None}, {}),
+    ({'a': 'b', 'b': 'c'}, {'a': None}, {'b': 'c'}),
+    ({'a': ['b']}, {'a': 'c'}, {'a': 'c'}),
+    ({'a': 'c'}, {'a': ['b']}, {'a': ['b']}),
+    ({'a': {'b': 'c'}}, {'a': {'b': 'd', 'c': None}}, {'a': {'b': 'd'}}),
+    ({'a': [{'b': 'c'}]}, {'a': [1]}, {'a': [1]}),
+    ({'e': None}, {'a': 1}, {'e': None, 'a': 1}),
+    ({}, {'a': {'bb': {'ccc': None}}}, {'a': {'bb': {}}}),
+])
+def test_rfc7396_examples(target, patch, expected):
+    assert apply_merge_patch(target, patch) == expected
+
+
+def test_merge_patch_does_not_modify_input():
+    record = {'id': 'p1', 'extra': {'a': 1}}
+    assert apply_merge_patch(record, {'extra': {'b': 2}, 'note': 'x'}) == \
+        {'id': 'p1', 'extra': {'a': 1, 'b': 2}, 'note': 'x'}
+    assert record == {'id': 'p1', 'extra': {'a': 1}}
+
+
+def test_record_version_depends_only_on_content():
+    assert record_version({'id': 'p1', 'title': 'T'}) == record_version({'title': 'T', 'id': 'p1'})
+    assert record_version({'id': 'p1', 'title': 'T'}) != record_version({'id': 'p1', 'title': 'U'})
+    assert len(record_version({})) == 16
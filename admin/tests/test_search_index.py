@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from search_index import SearchIndex, build_static, query_terms, tokenize
+from conftest import run_data_loader
+
+PUBLICATIONS = [
+    {'id': 'p1', 'title': '基於深度學習的影像辨識', 'authors': '何廷峰, 王小明', 'venue': 'TANET', 'year': 2023},
+    {'id': 'p2', 'title': 'Deep Learning for Image Retrieval', 'authors': 'Ting-Feng Ho', 'venue': 'ICIP',
+     'year': 2024},
+    {'id': 'p3', 'title': '影像壓縮', 'authors': '王大明', 'venue': 'CVGIP', 'year': 2022},
+]
+MEMBERS = [
+    {'id': 'm1', 'name': '何廷峰', 'degree': 'PhD', 'year': 2024},
+    {'id': 'm2', 'name': 'Lê Văn Minh', 'degree': 'Master', 'year': 2023},
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.sync('publications', PUBLICATIONS)
+    index.sync('members', MEMBERS)
+    return index
+
+
+def ids(hits):
+    return [hit.record['id'] for hit in hits]
+
+
+def test_cjk_tokens_include_characters_and_bigrams():
+    assert tokenize('何廷峰') == ['何', '廷', '峰', '何廷', '廷峰']
+    assert query_terms('何廷峰') == ['何廷', '廷峰']
+    assert query_terms('峰') == ['峰']
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('何廷峰', ['m1', 'p1']),
+    ('何廷', ['m1', 'p1']),
+    ('峰', ['m1', 'p1']),
+    ('影像', ['p1', 'p3']),
+    ('王 影像', ['p1', 'p3']),
+    ('深度學習 影像', ['p1']),
+    ('大明', ['p3']),
+    ('Ｄｅｅｐ', ['p2']),
+    ('le van', ['m2']),
+])
+def test_cjk_and_normalized_queries(index, text, expected):
+    hits, total = index.search(text)
+    assert sorted(ids(hits)) == expected
+    assert total == len(expected)
+
+
+def test_all_terms_must_match_and_prefixes_score_lower(index):
+    assert index.search('影像 ICIP')[0] == []
+    hits, _ = index.search('imag')
+    assert ids(hits) == ['p2']
+    exact, _ = index.search('image')
+    assert hits[0].score < exact[0].score
+
+
+def test_field_weights_rank_results(index):
+    # members 的 name（權重 3）高於 publications 的 authors（權重 2）
+    hits, _ = index.search('何廷峰')
+    assert ids(hits) == ['m1', 'p1']
+    hits, _ = index.search('ho', ['publications'])
+    assert ids(hits) == ['p2']
+
+
+def test_sync_only_reindexes_changed_records(index):
+    changed = [PUBLICATIONS[0], dict(PUBLICATIONS[1], title='影像檢索'), PUBLICATIONS[2]]
+    assert index.sync('publications', changed) == 1
+    assert index.sync('publications', changed) == 0
+    assert sorted(ids(index.search('影像')[0])) == ['p1', 'p2', 'p3']
+    assert index.sync('publications', changed[:1]) == 2
+    assert ids(index.search('影像')[0]) == ['p1']
+
+
+def test_datasets_filter(index):
+    hits, _ = index.search('何廷峰', ['members'])
+    assert ids(hits) == ['m1']
+
+
+@pytest.mark.parametrize('text', ['何廷峰', '峰', 'Deep Learning for the Image', 'Lê Văn', 'ＡＢＣ 123', '影像 壓縮x'])
+def test_query_terms_match_data_loader(text):
+    assert run_data_loader('searchTerms(input)', text) == query_terms(text)
+
+
+def test_static_index_search_matches_data_loader():
+    """data-loader.js 以 search.<dataset> bundle 查詢的結果與 admin 的 SearchIndex 相同"""
+    index = SearchIndex()
+    index.sync('publications', PUBLICATIONS)
+    static = build_static('publications', {'publications': PUBLICATIONS})['search.publications']
+    for text in ('影像', '何廷峰', 'deep', '王 影像'):
+        scores = run_data_loader(
+            'input.index.sortedTerms = Object.keys(input.index.terms).sort(), '
+            'searchIndex(input.index, searchTerms(input.text))', {'index': static, 'text': text})
+        hits, _ = index.search(text, ['publications'])
+        assert {static['docs'][int(doc)][0]: round(score, 4) for doc, score in scores.items()} == \
+            {hit.record['id']: hit.score for hit in hits}
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from sqlite_store import SqliteStore, export_json, import_json
+from conftest import read_json
+
+
+@pytest.fixture
+def db_path(tmp_path, dataset_dir):
+    path = str(tmp_path / 'dataset.sqlite3')
+    import_json(str(dataset_dir), path)
+    return path
+
+
+def test_round_trip_matches_json(db_path, dataset_dir, tmp_path):
+    out = tmp_path / 'out'
+    out.mkdir()
+    export_json(db_path, str(out))
+    for name in ('publications.json', 'members.json', 'events.json', 'assets.json'):
+        assert read_json(out / name) == read_json(dataset_dir / name)
+
+
+def test_save_writes_only_changed_rows(db_path):
+    store = SqliteStore(db_path)
+    with store.mutation('publications.json'):
+        model = store.model('publications.json')
+        model.replace('jz2', dict(model.get('jz2'), title='Changed'))
+        store.save('publications.json', model)
+    # 修改的記錄：新增一列、刪除舊的一列；c1 沒有寫入
+    assert store.rows_written == 2
+
+    other = SqliteStore(db_path)
+    assert other.get('publications.json')['publications'][0]['title'] == 'Changed'
+
+
+def test_write_json_mirrors_saved_data(db_path, dataset_dir):
+    store = SqliteStore(db_path)
+    doc = store.load('events.json')
+    doc['events'][0] = dict(doc['events'][0], title='Picnic')
+    store.save('events.json', doc)
+    assert store.write_json(str(dataset_dir), 'events.json') == ['events.json']
+    assert read_json(dataset_dir / 'events.json')['events'][0]['title'] == 'Picnic'
+    assert read_json(dataset_dir / 'publications.json')['publications'][0]['id'] == 'jz2'
+
+
+def test_writers_in_other_processes_are_serialized(db_path):
+    """兩個 SqliteStore（各自的連線與 process 內的鎖，等同兩個 worker）同時修改：依序執行，沒有 ConflictError"""
+    stores = [SqliteStore(db_path), SqliteStore(db_path)]
+    errors = []
+
+    def writer(store):
+        try:
+            for _ in range(10):
+                with store.mutation('events.json'):
+                    doc = store.load('events.json')
+                    doc['events'].append({'id': f'e{len(doc["events"]) + 1:03d}', 'title': 'New'})
+                    store.save('events.json', doc)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(store,)) for store in stores for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    events = SqliteStore(db_path).get('events.json')['events']
+    assert len(events) == 61
+    assert len({event['id'] for event in events}) == 61
+
+
+def test_failed_save_rolls_back(db_path, monkeypatch):
+    store = SqliteStore(db_path)
+    with store.mutation('events.json'):
+        doc = store.load('events.json')
+        doc['events'][0] = dict(doc['events'][0], title='Lost')
+        monkeypatch.setattr(store, '_write_records', lambda *args: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            store.save('events.json', doc)
+    assert SqliteStore(db_path).get('events.json')['events'][0]['title'] == 'Party'
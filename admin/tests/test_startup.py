@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""import app 不應載入只有爬蟲、縮圖或 SQLite 後端才需要的套件，也不應建立任何 app"""
+import json
+import subprocess
+import sys
+
+from conftest import ADMIN_DIR
+
+# 在新的 process 中 import app（模組沒有被快取），印出花費的秒數與已載入的套件
+IMPORT_APP = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import app
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules),
+                  'has_app': hasattr(app, 'app')}))
+"""
+
+LAZY_MODULES = ('requests', 'bs4', 'lxml', 'PIL', 'sqlite3', 'sqlite_store', 'http_cache')
+
+# import app 的時間上限（秒）；目前約 0.25 秒，留足夠的空間給較慢的機器
+IMPORT_BUDGET = 1.5
+
+
+def test_import_app_is_fast_and_lazy():
+    result = subprocess.run([sys.executable, '-c', IMPORT_APP, ADMIN_DIR], capture_output=True, text=True,
+                            check=True)
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    assert [name for name in LAZY_MODULES if name in measured['modules']] == []
+    assert not measured['has_app']
+    assert measured['seconds'] < IMPORT_BUDGET
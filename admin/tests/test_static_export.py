@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from dataset_store import DatasetStore
+from static_export import StaticExporter
+from conftest import read_json, write_json
+
+
+@pytest.fixture
+def exporter(dataset_dir):
+    store = DatasetStore(str(dataset_dir))
+    return StaticExporter(str(dataset_dir / 'dist'), store.get)
+
+
+def test_bundles_are_split_and_content_addressed(exporter, dataset_dir):
+    bundles = exporter.export()
+    assert set(bundles) >= {'publications.journal', 'publications.conference', 'members', 'events',
+                            'search.publications'}
+    journal = read_json(dataset_dir / 'dist' / bundles['publications.journal'])
+    assert [pub['id'] for pub in journal] == ['jz2']
+    members = read_json(dataset_dir / 'dist' / bundles['members'])
+    assert members['years'][0]['year'] == 2024
+
+
+def test_manifest_does_not_change_without_content_changes(exporter, dataset_dir):
+    exporter.export()
+    manifest_path = dataset_dir / 'dist' / 'manifest.json'
+    first = manifest_path.read_bytes()
+    assert 'generated_at' not in read_json(manifest_path)
+    mtime = os.stat(manifest_path).st_mtime_ns
+
+    exporter.export()
+    assert manifest_path.read_bytes() == first
+    assert os.stat(manifest_path).st_mtime_ns == mtime
+
+    # 同樣的內容在另一個目錄匯出，manifest 完全相同
+    other = StaticExporter(str(dataset_dir / 'dist2'), exporter.load)
+    other.export()
+    assert (dataset_dir / 'dist2' / 'manifest.json').read_bytes() == first
+
+
+def test_changed_dataset_only_replaces_its_bundles(exporter, dataset_dir):
+    before = exporter.export()
+    data = read_json(dataset_dir / 'events.json')
+    data['events'].append({'id': 'e002', 'title': 'Trip', 'date': '2025-01-01', 'photo': 'asset/event/b.jpg'})
+    write_json(dataset_dir / 'events.json', data)
+    os.utime(dataset_dir / 'events.json', ns=(1, 1))
+
+    after = exporter.export('events.json')
+    assert after['events'] != before['events']
+    assert after['publications.journal'] == before['publications.journal']
+    events = read_json(dataset_dir / 'dist' / after['events'])
+    assert [event['id'] for event in events] == ['e002', 'e001']
+    # 上一版的 bundle 保留到下一次變更
+    assert (dataset_dir / 'dist' / before['events']).exists()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""公開網站（static-web-server）的快取 header 規則"""
+
+import fnmatch
+import os
+
+import pytest
+
+from asset_store import HASH_LENGTH, is_content_addressed
+from conftest import ADMIN_DIR
+
+tomllib = pytest.importorskip('tomllib')
+
+CONFIG_PATH = os.path.join(os.path.dirname(ADMIN_DIR), '.config', 'static-web-server.toml')
+
+
+def cache_control(path):
+    """依設定檔的順序套用規則（後面的規則覆寫前面的同名 header）"""
+    with open(CONFIG_PATH, 'rb') as f:
+        rules = tomllib.load(f)['advanced']['headers']
+    value = None
+    for rule in rules:
+        if rule['source'] == '**' or fnmatch.fnmatchcase(path, rule['source']):
+            value = rule['headers'].get('Cache-Control', value)
+    return value
+
+
+@pytest.mark.parametrize('path', [
+    '/dataset/dist/events.3c870d0462.json',
+    '/dataset/dist/publications.journal.d6e732e3c7.json',
+    '/asset/member/' + 'a1' * (HASH_LENGTH // 2) + '.jpg',
+    '/asset/event/' + 'a1' * (HASH_LENGTH // 2) + '.320w.webp',
+])
+def test_content_addressed_paths_are_immutable(path):
+    assert 'immutable' in cache_control(path)
+
+
+@pytest.mark.parametrize('path', [
+    '/dataset/dist/manifest.json',
+    '/dataset/publications.json',
+    '/asset/member/pp.png',
+    '/asset/member/Ting-Feng Ho.320w.webp',
+    '/professor/index.html',
+])
+def test_mutable_paths_are_not_cached(path):
+    assert cache_control(path).startswith('no-store')
+
+
+def test_asset_rule_matches_asset_store_names():
+    name = 'f' * HASH_LENGTH
+    for filename in (f'{name}.png', f'{name}.640w.avif'):
+        assert is_content_addressed(filename)
+        assert 'immutable' in cache_control(f'/asset/general/{filename}')
@@ -1,23 +1,235 @@
 /**
  * Data Loader - 從 JSON 文件載入資料並渲染到頁面
+ *
+ * 優先讀取 admin 匯出的靜態 bundle（dataset/dist，已分組排序、檔名含雜湊可長期快取），
+ * 沒有 bundle 時退回讀取原始的 dataset/*.json。
+ * 頁面已由 admin 以目前的 bundle 預先渲染（admin/prerender.py）時不再重新載入。
  */
 
+// ==================== Bundles ====================
+const DIST_URL = '../dataset/dist/';
+let manifestPromise = null;
+
+function loadManifest() {
+  // manifest 會隨每次儲存變動，不使用快取
+  if (!manifestPromise) {
+    manifestPromise = fetch(DIST_URL + 'manifest.json', { cache: 'no-cache' })
+      .then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+      .then(manifest => manifest.bundles || {});
+  }
+  return manifestPromise;
+}
+
+function loadBundles(names) {
+  // 回傳 { name: data }；任一 bundle 不存在時 reject
+  return loadManifest().then(bundles => Promise.all(names.map(name => {
+    if (!bundles[name]) throw new Error(`Missing bundle ${name}`);
+    return fetch(DIST_URL + bundles[name]).then(response => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      return response.json();
+    });
+  }))).then(results => {
+    const data = {};
+    names.forEach((name, i) => { data[name] = results[i]; });
+    return data;
+  });
+}
+
+function isPrerendered(names) {
+  // <meta name="prerendered-bundles"> 記錄頁面渲染時的 bundle；與 manifest 相同表示內容仍是最新的
+  const meta = document.querySelector('meta[name="prerendered-bundles"]');
+  if (!meta || !meta.content) return Promise.resolve(false);
+  const rendered = new Set(meta.content.split(' '));
+  return loadManifest()
+    .then(bundles => names.every(name => bundles[name] && rendered.has(bundles[name])))
+    .catch(() => false);
+}
+
+function unlessPrerendered(names, load) {
+  isPrerendered(names).then(current => {
+    if (!current) load();
+  });
+}
+
+// ==================== Photos ====================
+function variantSrcset(paths) {
+  // { "160": "asset/...160w.webp", ... } → "../asset/...160w.webp 160w, ..."（檔名可能含空白，需編碼）
+  return Object.keys(paths).map(width => `${encodeURI(`../${paths[width]}`)} ${width}w`).join(', ');
+}
+
+function renderPhoto(photo, variants, attrs, sizes) {
+  // 有縮圖時輸出 <picture>，由瀏覽器依顯示寬度與支援的格式挑選（AVIF → WebP → 原格式）
+  const img = (srcset) => `<img ${attrs} src="../${photo}"${srcset ? ` srcset="${srcset}" sizes="${sizes}"` : ''} loading="lazy">`;
+  if (!variants) {
+    return img('');
+  }
+
+  const sources = ['avif', 'webp']
+    .filter(format => variants[format])
+    .map(format => `<source type="image/${format}" srcset="${variantSrcset(variants[format])}" sizes="${sizes}">`);
+  const fallback = variants.jpeg || variants.png;
+
+  return `<picture>${sources.join('')}${img(fallback ? variantSrcset(fallback) : '')}</picture>`;
+}
+
+// ==================== Search ====================
+// 與 admin/search_index.py 相同的分詞規則，查詢 admin 匯出的 search.<dataset> bundle
+const SEARCH_TOKEN_RE = /[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+/g;
+const SEARCH_STOP_WORDS = new Set(['a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'of', 'on', 'or', 'the', 'to', 'with']);
+const SEARCH_PREFIX_FACTOR = 0.7;
+const searchIndexes = {};
+
+function searchTerms(text) {
+  // 英文依單字、CJK 以 bigram（單一字時以該字）查詢
+  const normalized = text.toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '').normalize('NFC');
+  const terms = [];
+  (normalized.match(SEARCH_TOKEN_RE) || []).forEach(run => {
+    if (/^[a-z0-9]/.test(run)) {
+      if (!SEARCH_STOP_WORDS.has(run)) terms.push(run);
+    } else if (run.length === 1) {
+      terms.push(run);
+    } else {
+      for (let i = 0; i < run.length - 1; i++) terms.push(run.slice(i, i + 2));
+    }
+  });
+  return [...new Set(terms)];
+}
+
+function loadSearchIndex(name) {
+  if (!searchIndexes[name]) {
+    searchIndexes[name] = loadBundles([`search.${name}`]).then(data => {
+      const index = data[`search.${name}`];
+      index.sortedTerms = Object.keys(index.terms).sort();
+      return index;
+    });
+  }
+  return searchIndexes[name];
+}
+
+function expandTerm(sortedTerms, term) {
+  // 以 term 為前綴的所有詞（二分搜尋起點）
+  let low = 0;
+  let high = sortedTerms.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (sortedTerms[mid] < term) low = mid + 1; else high = mid;
+  }
+  const matched = [];
+  for (let i = low; i < sortedTerms.length && sortedTerms[i].startsWith(term); i++) matched.push(sortedTerms[i]);
+  return matched;
+}
+
+function searchIndex(index, terms) {
+  // 回傳 { doc 編號: 分數 }；所有查詢詞都要符合
+  let scores = null;
+  for (const term of terms) {
+    const best = {};
+    expandTerm(index.sortedTerms, term).forEach(matched => {
+      const postings = index.terms[matched];
+      const idf = Math.log(1 + index.docs.length / (postings.length / 2));
+      const factor = matched === term ? 1 : SEARCH_PREFIX_FACTOR;
+      for (let i = 0; i < postings.length; i += 2) {
+        const score = postings[i + 1] * idf * factor;
+        if (score > (best[postings[i]] || 0)) best[postings[i]] = score;
+      }
+    });
+    if (scores === null) {
+      scores = best;
+    } else {
+      const merged = {};
+      Object.keys(best).forEach(doc => { if (doc in scores) merged[doc] = scores[doc] + best[doc]; });
+      scores = merged;
+    }
+    if (Object.keys(scores).length === 0) break;
+  }
+  return scores || {};
+}
+
+function searchSite(text, names = ['publications', 'members', 'events'], limit = 20) {
+  // 回傳 [{ dataset, id, title, detail, year, score }]，依分數排序
+  const terms = searchTerms(text);
+  if (terms.length === 0) return Promise.resolve([]);
+  return Promise.all(names.map(loadSearchIndex)).then(indexes => {
+    const results = [];
+    indexes.forEach((index, i) => {
+      const scores = searchIndex(index, terms);
+      Object.keys(scores).forEach(doc => {
+        const [id, title, detail, year] = index.docs[doc];
+        results.push({ dataset: names[i], id, title, detail, year, score: scores[doc] });
+      });
+    });
+    results.sort((a, b) => b.score - a.score || (b.year || 0) - (a.year || 0));
+    return results.slice(0, limit);
+  });
+}
+
 // ==================== Publications ====================
+const PUBLICATION_TYPES = ['journal', 'conference', 'book', 'dissertation'];
+
 function loadPublications() {
-  fetch('../dataset/publications.json')
-    .then(response => response.json())
+  const names = PUBLICATION_TYPES.map(type => `publications.${type}`);
+  unlessPrerendered(names, () => loadBundles(names)
     .then(data => {
-      renderPublications(data.publications);
+      const groups = {};
+      PUBLICATION_TYPES.forEach(type => { groups[type] = data[`publications.${type}`]; });
+      renderPublicationGroups(groups);
     })
-    .catch(error => console.error('Error loading publications:', error));
+    .catch(() => fetch('../dataset/publications.json')
+      .then(response => response.json())
+      .then(data => {
+        renderPublications(data.publications);
+      }))
+    .catch(error => console.error('Error loading publications:', error)));
+}
+
+function setupPublicationSearch() {
+  const input = document.getElementById('publicationSearch');
+  const container = document.getElementById('publicationSearchResults');
+  if (!input || !container) return;
+
+  let pending = null;
+  input.addEventListener('input', () => {
+    clearTimeout(pending);
+    pending = setTimeout(() => {
+      const text = input.value;
+      searchSite(text, ['publications'])
+        .then(results => {
+          if (input.value !== text) return;
+          if (!text.trim()) {
+            container.innerHTML = '';
+          } else if (results.length === 0) {
+            container.innerHTML = '<p class="text-muted">No matching publications.</p>';
+          } else {
+            container.innerHTML = results.map(result => `
+              <p class="mb-2"><font face="Times New Roman">
+                "${result.title}"<br><i>${result.detail}</i>${result.year ? `, ${result.year}` : ''}
+              </font></p>
+            `).join('');
+          }
+        })
+        .catch(error => console.error('Error searching publications:', error));
+    }, 150);
+  });
 }
 
 function renderPublications(publications) {
   // 按類型分組（保持原有順序，因為後端已經確保手動新增的在最前面）
-  const journals = publications.filter(p => p.type === 'journal');
-  const conferences = publications.filter(p => p.type === 'conference');
-  const books = publications.filter(p => p.type === 'book');
-  const dissertations = publications.filter(p => p.type === 'dissertation');
+  const groups = {};
+  PUBLICATION_TYPES.forEach(type => { groups[type] = []; });
+  publications.forEach(pub => {
+    if (groups[pub.type]) groups[pub.type].push(pub);
+  });
+  renderPublicationGroups(groups);
+}
+
+function renderPublicationGroups(groups) {
+  const journals = groups.journal;
+  const conferences = groups.conference;
+  const books = groups.book;
+  const dissertations = groups.dissertation;
 
   // 渲染 Journal
   const journalContainer = document.getElementById('nav-journal');
@@ -114,18 +326,19 @@ function renderPublication(pub) {
 
 // ==================== Members ====================
 function loadMembers() {
-  fetch('../dataset/members.json')
-    .then(response => response.json())
+  unlessPrerendered(['members'], () => loadBundles(['members'])
     .then(data => {
-      renderMembers(data);
+      renderMemberGroups(data.members);
     })
-    .catch(error => console.error('Error loading members:', error));
+    .catch(() => fetch('../dataset/members.json')
+      .then(response => response.json())
+      .then(data => {
+        renderMembers(data);
+      }))
+    .catch(error => console.error('Error loading members:', error)));
 }
 
 function renderMembers(data) {
-  // 更新聯絡人資訊
-  updateContactPerson(data.contact_person, data.lab_info);
-  
   // 按年份分組成員
   const membersByYear = {};
   data.members.forEach(member => {
@@ -134,13 +347,24 @@ function renderMembers(data) {
     }
     membersByYear[member.year].push(member);
   });
-  
-  // 渲染成員列表
+
+  const years = Object.keys(membersByYear).sort((a, b) => b - a); // 降序排列
+  renderMemberGroups({
+    contact_person: data.contact_person,
+    lab_info: data.lab_info,
+    years: years.map(year => ({ year: year, members: membersByYear[year] }))
+  });
+}
+
+function renderMemberGroups(data) {
+  // 更新聯絡人資訊
+  updateContactPerson(data.contact_person, data.lab_info);
+
+  // 渲染成員列表（已依年份降序分組）
   const membersContainer = document.getElementById('members-container');
   if (membersContainer) {
-    const years = Object.keys(membersByYear).sort((a, b) => b - a); // 降序排列
-    membersContainer.innerHTML = years.map(year => {
-      return renderMemberYear(year, membersByYear[year]);
+    membersContainer.innerHTML = data.years.map(group => {
+      return renderMemberYear(group.year, group.members);
     }).join('');
   }
 }
@@ -150,6 +374,12 @@ function updateContactPerson(contactPerson, labInfo) {
   const contactPhoto = document.getElementById('contact-person-photo');
   if (contactPhoto) {
     contactPhoto.src = `../${contactPerson.photo}`;
+    // 單一 <img> 無法依格式挑選，使用 WebP 縮圖
+    const variants = contactPerson.photo_variants;
+    if (variants && variants.webp) {
+      contactPhoto.sizes = `${contactPhoto.clientWidth || 320}px`;
+      contactPhoto.srcset = variantSrcset(variants.webp);
+    }
   }
   
   // 更新聯絡人姓名
@@ -187,7 +417,7 @@ function renderMember(member) {
   return `
     <div class="col-6 col-md-4 col-lg-3 col-xl-2">
       <div class="div-square mt-3">
-        <img class="div-square-content img-fluid hwAuto rounded-circle my-border" src="../${member.photo}">
+        ${renderPhoto(member.photo, member.photo_variants, 'class="div-square-content img-fluid hwAuto rounded-circle my-border"', '(min-width: 1200px) 16vw, (min-width: 992px) 25vw, (min-width: 768px) 33vw, 50vw')}
       </div>
       <h4 class="mt-1 mb-0 text-center">${displayName}</h4>
       <h4 class="fw-bolder mt-0 mb-3 text-center text-primary">${websiteIcon}${member.degree}${graduatedIcon}${linkedinIcon}</h4>
@@ -197,18 +427,26 @@ function renderMember(member) {
 
 // ==================== Events ====================
 function loadEvents() {
-  fetch('../dataset/events.json')
-    .then(response => response.json())
+  unlessPrerendered(['events'], () => loadBundles(['events'])
     .then(data => {
-      renderEvents(data.events);
+      // bundle 已依日期降序排列
+      renderEventList(data.events);
     })
-    .catch(error => console.error('Error loading events:', error));
+    .catch(() => fetch('../dataset/events.json')
+      .then(response => response.json())
+      .then(data => {
+        renderEvents(data.events);
+      }))
+    .catch(error => console.error('Error loading events:', error)));
 }
 
 function renderEvents(events) {
   // 按日期降序排列
   events.sort((a, b) => new Date(b.date) - new Date(a.date));
+  renderEventList(events);
+}
 
+function renderEventList(events) {
   const eventsContainer = document.querySelector('.waterfall');
   if (eventsContainer) {
     eventsContainer.innerHTML = events.map(event => renderEvent(event)).join('');
@@ -218,7 +456,7 @@ function renderEvents(events) {
 function renderEvent(event) {
   return `
     <div class="waterfall-item mb-2">
-      <img class="waterfall-img rounded-top-4" src="../${event.photo}">
+      ${renderPhoto(event.photo, event.photo_variants, 'class="waterfall-img rounded-top-4"', '(min-width: 1200px) 25vw, (min-width: 992px) 33vw, (min-width: 576px) 50vw, 100vw')}
       <div class="p-1 p-md-2 border border-2 border-top-0 rounded-bottom-4">
         <h5 class="fw-bolder text-primary m-0">${event.title}</h5>
         <p class="fw-bolder m-0">${event.date_display}</p>
@@ -234,6 +472,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
   if (currentPath.includes('/professor/')) {
     loadPublications();
+    setupPublicationSearch();
   } else if (currentPath.includes('/laboratory/')) {
     loadMembers();
   } else if (currentPath.includes('/events/')) {
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
+import glob
 import py_compile
 import sys
 
 try:
-    py_compile.compile('admin/app.py', doraise=True)
+    for path in sorted(glob.glob('admin/*.py')):
+        py_compile.compile(path, doraise=True)
     print("✅ Syntax is correct!")
     sys.exit(0)
 except py_compile.PyCompileError as e: